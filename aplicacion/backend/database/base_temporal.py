@@ -0,0 +1,25 @@
+"""
+Base temporal para benchmarks y scripts de verificación.
+
+Importado antes que database.py, hace que el engine use una base nueva en un
+directorio temporal (MANOLI_DB_PATH) en lugar de manoli.db:
+
+    from aplicacion.backend.database.base_temporal import DIRECTORIO, RUTA  # antes que database
+
+DIRECTORIO sirve también para los archivos auxiliares del script (CSV, Excel).
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+if "aplicacion.backend.database.database" in sys.modules:
+    # El engine ya apunta a manoli.db: seguir escribiría sobre la base real
+    raise RuntimeError("base_temporal tiene que importarse antes que aplicacion.backend.database.database")
+
+# Nombre del script que se está corriendo (bench_ventas, verificar_fusion, ...)
+_nombre = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] not in ("", "-c") else "script"
+
+DIRECTORIO = tempfile.mkdtemp(prefix=f"manoli_{_nombre}_")
+RUTA = os.path.join(DIRECTORIO, f"{_nombre}.db")
+os.environ["MANOLI_DB_PATH"] = RUTA
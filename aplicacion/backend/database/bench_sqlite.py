@@ -0,0 +1,107 @@
+"""
+Benchmark de los perfiles de conexión SQLite (database.PERFILES_SQLITE).
+
+Para cada perfil arma una base temporal y mide:
+- escritura: ventas insertadas de a una, con un commit por venta (como el motor de ventas)
+- concurrencia: un hilo escribe ventas sin pausa mientras otros hilos leen
+  los totales del día (como la interfaz y el hilo de vencimientos), durante
+  unos segundos: lecturas y escrituras completadas, peor espera de un lector
+  y errores "database is locked"
+
+No toca manoli.db.
+
+python -m aplicacion.backend.database.bench_sqlite [ventas] [segundos] [lectores]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+from aplicacion.backend.database.database import Base, VentaRegistro, PERFILES_SQLITE, crear_engine
+
+
+def _venta():
+    ahora = datetime.now().isoformat()
+    return {"fecha": ahora, "total": 100.0, "metodo_pago": "efectivo", "usuario_id": 1, "estado": True}
+
+
+def medir_escritura(engine, ventas: int) -> float:
+    """Ventas por segundo con un commit por venta"""
+    inicio = time.perf_counter()
+    for _ in range(ventas):
+        with engine.begin() as conn:
+            conn.execute(insert(VentaRegistro), _venta())
+    return ventas / (time.perf_counter() - inicio)
+
+
+def medir_concurrencia(engine, segundos: float, lectores: int) -> dict:
+    fin = time.perf_counter() + segundos
+    hoy = datetime.now().date().isoformat()
+    resultado = {"escrituras": 0, "lecturas": 0, "errores": 0, "espera_max": 0.0}
+    lock = threading.Lock()
+
+    def escritor():
+        while time.perf_counter() < fin:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(VentaRegistro), _venta())
+                with lock:
+                    resultado["escrituras"] += 1
+            except OperationalError:
+                with lock:
+                    resultado["errores"] += 1
+
+    def lector():
+        consulta = text("SELECT COUNT(*), SUM(total) FROM ventas_registro WHERE dia = :dia AND estado = 1")
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(consulta, {"dia": hoy}).one()
+                espera = time.perf_counter() - inicio
+                with lock:
+                    resultado["lecturas"] += 1
+                    resultado["espera_max"] = max(resultado["espera_max"], espera)
+            except OperationalError:
+                with lock:
+                    resultado["errores"] += 1
+
+    hilos = [threading.Thread(target=escritor)] + [threading.Thread(target=lector) for _ in range(lectores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultado
+
+
+def main():
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    lectores = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    tmp_dir = tempfile.mkdtemp(prefix="manoli_bench_sqlite_")
+
+    filas = []
+    for perfil in PERFILES_SQLITE:
+        engine = crear_engine(os.path.join(tmp_dir, f"{perfil}.db"), perfil)
+        Base.metadata.create_all(engine)
+        escritura = medir_escritura(engine, ventas)
+        concurrencia = medir_concurrencia(engine, segundos, lectores)
+        engine.dispose()
+        filas.append((perfil, escritura, concurrencia))
+
+    print(f"Base temporal: {tmp_dir}")
+    print(f"{ventas} ventas de a una; {segundos:.0f} s con 1 escritor y {lectores} lectores\n")
+    print(f"{'Perfil':<12} {'Ventas/s':>10} {'Escrituras':>11} {'Lecturas':>10} {'Espera máx (ms)':>16} {'Errores':>8}")
+    print("-" * 72)
+    for perfil, escritura, c in filas:
+        print(f"{perfil:<12} {escritura:>10.0f} {c['escrituras']:>11} {c['lecturas']:>10} "
+              f"{c['espera_max'] * 1000:>16.1f} {c['errores']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,74 @@
 # aplicacion/backend/database/database.py
 from __future__ import annotations
+import os
 from pathlib import Path
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, Text, ForeignKey, REAL, event
+from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, Text, ForeignKey, REAL, Index, event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # === RUTA FIJA: aplicacion/manoli.db ===
 APP_DIR = Path(__file__).resolve().parents[2]     # .../aplicacion
 DB_PATH = APP_DIR / "manoli.db"                   # SIEMPRE ahí
+# Solo para benchmarks/scripts de mantenimiento que trabajan sobre una base temporal
+if os.environ.get("MANOLI_DB_PATH"):
+    DB_PATH = Path(os.environ["MANOLI_DB_PATH"])
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
-    future=True,
-    echo=False,
-    connect_args={"check_same_thread": False},     # PyQt + hilos
-)
+# === PERFIL DE CONEXIÓN SQLITE ===
+# La interfaz, el hilo de vencimientos, el bus de eventos y el backup SNAP
+# usan la base al mismo tiempo. "rendimiento" activa WAL (los lectores no
+# bloquean al que escribe ni al revés), synchronous=NORMAL (seguro con WAL),
+# más caché y mmap, temporales en memoria y busy_timeout para esperar el lock
+# en lugar de fallar con "database is locked". "compatible" deja los valores
+# por defecto de SQLite (journal de rollback). Se elige con MANOLI_DB_PERFIL.
+PERFILES_SQLITE = {
+    "compatible": {
+        "journal_mode": "DELETE",      # WAL queda grabado en el archivo: se revierte explícitamente
+    },
+    "rendimiento": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -20000,          # ~20 MB (negativo = KiB)
+        "mmap_size": 268435456,        # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,          # ms
+    },
+}
+PERFIL_SQLITE = os.environ.get("MANOLI_DB_PERFIL", "rendimiento")
+
+
+def crear_engine(ruta, perfil: str = PERFIL_SQLITE):
+    """
+    Engine SQLite con los PRAGMA del perfil aplicados en cada conexión nueva.
+    QueuePool reutiliza un puñado de conexiones entre hilos (check_same_thread
+    desactivado), así los PRAGMA por conexión se pagan una sola vez.
+    """
+    pragmas = PERFILES_SQLITE[perfil]
+    nuevo = create_engine(
+        f"sqlite:///{ruta}",
+        future=True,
+        echo=False,
+        connect_args={"check_same_thread": False},     # PyQt + hilos
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+    )
+
+    @event.listens_for(nuevo, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nombre, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nombre} = {valor}")
+        finally:
+            cursor.close()
+
+    return nuevo
+
+
+engine = crear_engine(DB_PATH)
 # Base declarativa
 Base = declarative_base()
 # Engine apuntando a SQLite
@@ -83,6 +136,18 @@ class StockUnidad(Base):
 
     producto = relationship("Producto", back_populates="unidades")
 
+    # Búsqueda del escáner: un código identifica a una sola unidad (NULL no compite)
+    __table_args__ = (
+        Index("ux_stock_unidades_codigo_barras", "codigo_barras", unique=True),
+        Index("ix_stock_unidades_producto_estado", "producto_id", "estado"),
+        Index("ix_stock_unidades_fecha_vencimiento", "fecha_vencimiento"),
+    )
+
+def _dia_de_fecha(contexto):
+    """Día YYYY-MM-DD de la fecha ISO de la venta"""
+    fecha = contexto.get_current_parameters().get("fecha")
+    return str(fecha)[:10] if fecha else None
+
 # Tabla de ventas_registro
 class VentaRegistro(Base):
     __tablename__ = 'ventas_registro'
@@ -92,8 +157,13 @@ class VentaRegistro(Base):
     metodo_pago = Column(String)
     usuario_id = Column(Integer, ForeignKey('usuarios.id'))
     estado = Column(Boolean, default=True)  # True = realizada, False = cancelada
+    dia = Column(String, default=_dia_de_fecha)  # YYYY-MM-DD, se completa a partir de fecha
     detalles = relationship("VentaDetalle", back_populates="venta")
 
+    __table_args__ = (
+        Index("ix_ventas_registro_dia_estado", "dia", "estado"),
+    )
+
 # Tabla de ventas_detalle - ACTUALIZADA
 class VentaDetalle(Base):
     __tablename__ = 'ventas_detalle'
@@ -113,6 +183,10 @@ class VentaDetalle(Base):
     producto = relationship("Producto")
     unidad = relationship("StockUnidad")
 
+    __table_args__ = (
+        Index("ix_ventas_detalle_venta_id", "venta_id"),
+    )
+
 # Tabla de cierre de caja - NUEVA
 class CierreCaja(Base):
     __tablename__ = 'cierre_caja'
@@ -128,6 +202,10 @@ class CierreCaja(Base):
     
     usuario = relationship("Usuario", backref="cierres_caja")
 
+    __table_args__ = (
+        Index("ix_cierre_caja_fecha", "fecha"),
+    )
+
 # Tabla de ganancias
 class Ganancia(Base):
     __tablename__ = 'ganancias'
@@ -136,6 +214,17 @@ class Ganancia(Base):
     ganancia_bruta = Column(REAL)
     ganancia_neta = Column(REAL)
 
+# Tabla de resumen diario de ventas (se mantiene al confirmar/cancelar ventas)
+class ResumenVentasDiario(Base):
+    __tablename__ = 'ventas_resumen_diario'
+    fecha = Column(String, primary_key=True)  # YYYY-MM-DD
+    cantidad_ventas = Column(Integer, default=0)
+    total_ventas = Column(REAL, default=0.0)
+    costo_productos = Column(REAL, default=0.0)
+    unidades_vendidas = Column(REAL, default=0.0)
+    total_efectivo = Column(REAL, default=0.0)
+    total_transferencia = Column(REAL, default=0.0)
+
 # Tabla de usuarios
 class Usuario(Base):
     __tablename__ = 'usuarios'
@@ -200,6 +289,36 @@ class ConfiguracionSistema(Base):
     nombre = Column(String)
     valor = Column(String)
 
+def crear_indice_codigo_barras():
+    """
+    create_all no agrega índices a tablas que ya existen, así que se crea
+    a mano. Si una base vieja tiene códigos repetidos el índice único falla:
+    en ese caso se deja un índice común para no perder la búsqueda rápida.
+    """
+    with engine.connect() as conn:
+        existentes = {
+            fila[0] for fila in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'stock_unidades'"
+            )
+        }
+    if existentes & {"ux_stock_unidades_codigo_barras", "ix_stock_unidades_codigo_barras"}:
+        return
+
+    indice = next(i for i in StockUnidad.__table__.indexes if i.name == "ux_stock_unidades_codigo_barras")
+    try:
+        indice.create(bind=engine, checkfirst=True)
+    except IntegrityError:
+        print("[WARN] Hay códigos de barras repetidos en stock_unidades, se crea índice no único")
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_stock_unidades_codigo_barras "
+                "ON stock_unidades (codigo_barras)"
+            )
+
 # Crear todas las tablas
 def crear_tablas():
-    Base.metadata.create_all(engine)
\ No newline at end of file
+    Base.metadata.create_all(engine)
+    crear_indice_codigo_barras()
+    # create_all no toca tablas existentes: columnas e índices nuevos van por migraciones
+    from aplicacion.backend.database.migraciones import migrar
+    migrar()
\ No newline at end of file
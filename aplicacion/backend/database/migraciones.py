@@ -0,0 +1,124 @@
+"""
+Migraciones de esquema para bases manoli.db existentes.
+
+Base.metadata.create_all crea las tablas que faltan pero no agrega columnas
+ni índices a tablas que ya existen. Cada migración lleva un número y la
+versión aplicada se guarda en PRAGMA user_version; migrar() corre, en orden
+y cada una en su propia transacción, las que todavía no se aplicaron. Las
+migraciones son idempotentes (revisan el esquema antes de tocarlo), así que
+sobre una base recién creada por create_all solo avanzan la versión.
+
+python -m aplicacion.backend.database.migraciones
+
+corre las migraciones pendientes y muestra el EXPLAIN QUERY PLAN de las
+consultas frecuentes antes y después.
+"""
+from typing import Callable, Dict, List, Tuple
+
+from aplicacion.backend.database.database import (
+    engine, StockUnidad, VentaRegistro, VentaDetalle, CierreCaja
+)
+
+
+def _columnas(conn, tabla: str) -> List[str]:
+    return [fila[1] for fila in conn.exec_driver_sql(f"PRAGMA table_info({tabla})")]
+
+
+def _crear_indices(conn, tabla, nombres: List[str]):
+    for indice in tabla.indexes:
+        if indice.name in nombres:
+            indice.create(bind=conn, checkfirst=True)
+
+
+def _columna_dia_ventas(conn):
+    """ventas_registro.dia: día YYYY-MM-DD ordenable, para no filtrar con LIKE sobre fecha"""
+    if "dia" not in _columnas(conn, "ventas_registro"):
+        conn.exec_driver_sql("ALTER TABLE ventas_registro ADD COLUMN dia VARCHAR")
+    conn.exec_driver_sql(
+        "UPDATE ventas_registro SET dia = substr(fecha, 1, 10) WHERE dia IS NULL AND fecha IS NOT NULL"
+    )
+
+
+def _indices_consultas_frecuentes(conn):
+    _crear_indices(conn, VentaRegistro.__table__, ["ix_ventas_registro_dia_estado"])
+    _crear_indices(conn, VentaDetalle.__table__, ["ix_ventas_detalle_venta_id"])
+    _crear_indices(conn, StockUnidad.__table__, ["ix_stock_unidades_producto_estado",
+                                                 "ix_stock_unidades_fecha_vencimiento"])
+    _crear_indices(conn, CierreCaja.__table__, ["ix_cierre_caja_fecha"])
+
+
+def _indice_busqueda_productos(conn):
+    from aplicacion.backend.stock.busqueda import crear_indice_busqueda
+    crear_indice_busqueda(conn)
+
+
+# (versión, descripción, función) en orden de aplicación
+MIGRACIONES: List[Tuple[int, str, Callable]] = [
+    (1, "Columna dia en ventas_registro", _columna_dia_ventas),
+    (2, "Índices de ventas, detalles, unidades y cierres de caja", _indices_consultas_frecuentes),
+    (3, "Índice de búsqueda de productos (FTS5)", _indice_busqueda_productos),
+]
+
+
+def version_actual(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def migrar() -> List[int]:
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas"""
+    aplicadas = []
+    for version, descripcion, funcion in MIGRACIONES:
+        with engine.begin() as conn:
+            if version_actual(conn) >= version:
+                continue
+            funcion(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+        print(f"Migración {version} aplicada: {descripcion}")
+        aplicadas.append(version)
+    return aplicadas
+
+
+# Consultas de los caminos más usados, para revisar que usen índice
+CONSULTAS_FRECUENTES: Dict[str, str] = {
+    "ventas del día": "SELECT id, total FROM ventas_registro WHERE dia = '2025-01-01' AND estado = 1",
+    "detalles de una venta": "SELECT * FROM ventas_detalle WHERE venta_id = 1",
+    "unidades activas de un producto": "SELECT id FROM stock_unidades WHERE producto_id = 1 AND estado = 'activo'",
+    "unidades vencidas": "SELECT id FROM stock_unidades WHERE fecha_vencimiento IS NOT NULL AND fecha_vencimiento <= '2025-01-01'",
+    "cierres de un rango": "SELECT * FROM cierre_caja WHERE fecha >= '2025-01-01' AND fecha <= '2025-01-31'",
+    "código escaneado": "SELECT id FROM stock_unidades WHERE codigo_barras = '7790000000000'",
+}
+
+
+def plan_consultas(conn) -> Dict[str, str]:
+    """EXPLAIN QUERY PLAN de cada consulta frecuente (detalle de cada paso, separado por ' | ')"""
+    planes = {}
+    for nombre, sql in CONSULTAS_FRECUENTES.items():
+        try:
+            pasos = [fila[-1] for fila in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+        except Exception as e:
+            pasos = [f"error: {e}"]
+        planes[nombre] = " | ".join(pasos)
+    return planes
+
+
+def usa_indice(plan: str) -> bool:
+    return "USING" in plan and "INDEX" in plan
+
+
+if __name__ == "__main__":
+    with engine.connect() as conn:
+        antes = plan_consultas(conn)
+        print(f"Versión de esquema: {version_actual(conn)}")
+
+    aplicadas = migrar()
+    if not aplicadas:
+        print("No hay migraciones pendientes")
+
+    with engine.connect() as conn:
+        despues = plan_consultas(conn)
+        print(f"Versión de esquema: {version_actual(conn)}\n")
+
+    for nombre in CONSULTAS_FRECUENTES:
+        print(f"{nombre}:")
+        print(f"  antes:   {antes[nombre]}")
+        print(f"  después: {despues[nombre]}")
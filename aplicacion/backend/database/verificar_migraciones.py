@@ -0,0 +1,107 @@
+"""
+Verificación de las migraciones sobre una base con el esquema anterior.
+
+Arma una base temporal como la que tenían las instalaciones existentes (sin
+ventas_registro.dia ni los índices nuevos), con algunas ventas, unidades y
+cierres. Revisa con EXPLAIN QUERY PLAN que antes de migrar las consultas
+frecuentes recorren la tabla entera, corre migrar() y revisa que después
+usen índice, que dia quede completo y que una segunda pasada no haga nada.
+Sale con código 1 si algo no se cumple.
+
+python -m aplicacion.backend.database.verificar_migraciones
+"""
+import sys
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from aplicacion.backend.database.database import Base, engine
+from aplicacion.backend.database.migraciones import (
+    MIGRACIONES, CONSULTAS_FRECUENTES, migrar, plan_consultas, usa_indice, version_actual
+)
+
+INDICES_NUEVOS = [
+    "ix_ventas_registro_dia_estado",
+    "ix_ventas_detalle_venta_id",
+    "ix_stock_unidades_producto_estado",
+    "ix_stock_unidades_fecha_vencimiento",
+    "ix_cierre_caja_fecha",
+]
+
+
+def _armar_base_anterior():
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for nombre in INDICES_NUEVOS:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {nombre}")
+        conn.exec_driver_sql("ALTER TABLE ventas_registro DROP COLUMN dia")
+        conn.exec_driver_sql("PRAGMA user_version = 0")
+
+        conn.exec_driver_sql("INSERT INTO productos (id, nombre, cantidad) VALUES (1, 'PRODUCTO', 10)")
+        for n in range(20):
+            conn.exec_driver_sql(
+                "INSERT INTO stock_unidades (producto_id, codigo_barras, estado, fecha_vencimiento) "
+                f"VALUES (1, 'M{n:012d}', '{'activo' if n % 2 else 'inactivo'}', '2025-01-{n + 1:02d}')"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO ventas_registro (fecha, total, metodo_pago, usuario_id, estado) "
+                f"VALUES ('2025-01-{n % 5 + 1:02d}T10:{n:02d}:00', 100, 'efectivo', 1, 1)"
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO ventas_detalle (venta_id, producto_id, cantidad, precio_unitario, subtotal, tipo_venta) "
+                f"VALUES ({n + 1}, 1, 1, 100, 100, 'producto_id')"
+            )
+        conn.exec_driver_sql("INSERT INTO cierre_caja (fecha, monto_total) VALUES ('2025-01-01', 100)")
+
+
+def main():
+    _armar_base_anterior()
+    print(f"Base temporal: {RUTA}\n")
+
+    with engine.connect() as conn:
+        antes = plan_consultas(conn)
+
+    aplicadas = migrar()
+    repetidas = migrar()
+
+    with engine.connect() as conn:
+        despues = plan_consultas(conn)
+        version = version_actual(conn)
+        sin_dia = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM ventas_registro WHERE dia IS NULL OR dia != substr(fecha, 1, 10)"
+        ).scalar()
+
+    ok = True
+    print(f"\n{'Consulta':<34} {'Antes':<8} {'Después':<8}")
+    print("-" * 52)
+    for nombre in CONSULTAS_FRECUENTES:
+        # el código de barras ya tenía índice en el esquema anterior
+        esperado_antes = nombre == "código escaneado"
+        bien = usa_indice(antes[nombre]) == esperado_antes and usa_indice(despues[nombre])
+        ok &= bien
+        print(f"{nombre:<34} {'índice' if usa_indice(antes[nombre]) else 'scan':<8} "
+              f"{'índice' if usa_indice(despues[nombre]) else 'scan':<8} {'✓' if bien else '✗'}")
+        if not bien:
+            print(f"    antes:   {antes[nombre]}\n    después: {despues[nombre]}")
+    print("-" * 52)
+
+    ultima = MIGRACIONES[-1][0]
+    if aplicadas != [v for v, _, _ in MIGRACIONES] or repetidas or version != ultima:
+        print(f"✗ Versiones: aplicadas {aplicadas}, segunda pasada {repetidas}, user_version {version}")
+        ok = False
+    else:
+        print(f"✓ Versión de esquema {version}, segunda pasada sin cambios")
+    if sin_dia:
+        print(f"✗ {sin_dia} ventas sin dia")
+        ok = False
+    else:
+        print("✓ ventas_registro.dia completo")
+
+    engine.dispose()
+    if not ok:
+        print("\nLA MIGRACIÓN NO QUEDÓ COMO SE ESPERABA")
+        sys.exit(1)
+    print("\nMigraciones correctas")
+
+
+if __name__ == "__main__":
+    main()
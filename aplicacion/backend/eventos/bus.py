@@ -0,0 +1,87 @@
+"""
+Bus de eventos en proceso.
+
+Los manejadores se ejecutan en un único hilo de fondo, en el orden en que
+se publican los eventos. Así el trabajo posterior a una venta (limpiezas,
+exportar JSON, registrar ganancias) no bloquea el hilo de la interfaz y
+las escrituras a SQLite quedan serializadas entre sí.
+"""
+from __future__ import annotations
+import queue
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Any, List, Tuple
+
+# Nombres de eventos
+VENTA_CONFIRMADA = "venta_confirmada"          # {"venta_id", "productos_ids"}
+POSTVENTA_COMPLETADA = "postventa_completada"  # {"venta_id", "productos_ids"}
+CATALOGO_ACTUALIZADO = "catalogo_actualizado"  # {"productos", "eliminados", "categorias", "proveedores"}
+
+
+class BusEventos:
+    def __init__(self):
+        self._suscriptores: Dict[str, List[Callable[[Dict[str, Any]], None]]] = defaultdict(list)
+        self._cola: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def suscribir(self, evento: str, manejador: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            if manejador not in self._suscriptores[evento]:
+                self._suscriptores[evento].append(manejador)
+
+    def desuscribir(self, evento: str, manejador: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            if manejador in self._suscriptores[evento]:
+                self._suscriptores[evento].remove(manejador)
+
+    def suscribir_widget(self, widget, suscripciones: List[Tuple[str, Callable[[Dict[str, Any]], None]]]):
+        """
+        Suscribe los manejadores de un widget de Qt y los desuscribe cuando se
+        destruye (pestañas que se cierran con deleteLater).
+
+        Los manejadores se guardan acá: cada acceso a señal.emit da un objeto
+        nuevo y desuscribir con otro acceso no lo encontraría.
+        """
+        suscripciones = list(suscripciones)
+        for evento, manejador in suscripciones:
+            self.suscribir(evento, manejador)
+
+        # Sin referencia al widget: al emitirse destroyed ya no existe
+        def desuscribir(*_):
+            for evento, manejador in suscripciones:
+                self.desuscribir(evento, manejador)
+        widget.destroyed.connect(desuscribir)
+
+    def publicar(self, evento: str, datos: Dict[str, Any]):
+        """Encola el evento y vuelve enseguida; los manejadores corren en segundo plano"""
+        self._iniciar()
+        self._cola.put((evento, datos))
+
+    def esperar(self):
+        """Bloquea hasta que se procesen todos los eventos pendientes (scripts/CLI)"""
+        self._cola.join()
+
+    def _iniciar(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._worker, name="bus-eventos", daemon=True)
+                self._hilo.start()
+
+    def _worker(self):
+        while True:
+            evento, datos = self._cola.get()
+            try:
+                with self._lock:
+                    manejadores = list(self._suscriptores.get(evento, []))
+                for manejador in manejadores:
+                    try:
+                        manejador(datos)
+                    except Exception as e:
+                        print(f"[WARN] Manejador de '{evento}' falló: {e}")
+            finally:
+                self._cola.task_done()
+
+
+# Instancia compartida por todo el proceso
+bus = BusEventos()
@@ -0,0 +1,175 @@
+"""
+Consultas agregadas de ventas para el cálculo de ganancias.
+
+calcular_ganancias_fecha y calcular_ganancia_neta_simple_fecha traían las
+ventas del día y por cada detalle consultaban StockUnidad y Producto por
+separado (varias consultas por ítem vendido). Acá se resuelve todo con un
+JOIN ventas_registro ⋈ ventas_detalle ⋈ productos:
+
+- los detalles por 'codigo_barras' toman el producto a través de la unidad
+  (stock_unidades.producto_id), los de 'producto_id' directamente
+- los detalles de otro tipo, o cuya unidad/producto ya no existe, no
+  aportan costo (igual que antes)
+
+Las sumas se hacen en Python en el mismo orden (venta, detalle) que el
+cálculo anterior, así los totales coinciden exactamente. resumen_diario
+agrupa un rango de fechas por día directamente en SQL (las sumas pueden
+diferir en el último decimal respecto del cálculo día por día).
+"""
+from typing import List, Dict, Any, Tuple
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from aplicacion.backend.database.database import VentaRegistro, VentaDetalle, Producto, StockUnidad
+
+
+def filtro_ventas_fecha(fecha: str):
+    """Ventas realizadas (no canceladas) de una fecha YYYY-MM-DD (usa el índice por dia)"""
+    return and_(
+        VentaRegistro.dia == fecha,
+        VentaRegistro.estado == True
+    )
+
+
+def producto_vendido_expr():
+    """Id del producto al que se imputa el costo de cada detalle"""
+    return case(
+        (
+            and_(VentaDetalle.tipo_venta == "codigo_barras",
+                 VentaDetalle.unidad_id.isnot(None), VentaDetalle.unidad_id != 0),
+            StockUnidad.producto_id
+        ),
+        (
+            and_(VentaDetalle.tipo_venta == "producto_id",
+                 VentaDetalle.producto_id.isnot(None), VentaDetalle.producto_id != 0),
+            VentaDetalle.producto_id
+        ),
+    )
+
+
+def totales_ventas(session: Session, filtro) -> Tuple[int, float]:
+    """(cantidad de ventas, total vendido)"""
+    cantidad = 0
+    total = 0.0
+    for (monto,) in session.query(VentaRegistro.total).filter(filtro).order_by(VentaRegistro.id):
+        cantidad += 1
+        total += monto
+    return cantidad, total
+
+
+def detalles_con_producto(session: Session, filtro) -> List[Any]:
+    """
+    Detalles de las ventas filtradas con su producto resuelto, en orden
+    (venta, detalle). Cada fila: cantidad, precio_unitario, tipo_venta,
+    producto_id, nombre, costo_unitario, precio_redondeado.
+    """
+    producto_id = producto_vendido_expr()
+    return (
+        session.query(
+            VentaDetalle.cantidad,
+            VentaDetalle.precio_unitario,
+            VentaDetalle.tipo_venta,
+            Producto.id.label("producto_id"),
+            Producto.nombre,
+            Producto.costo_unitario,
+            Producto.precio_redondeado,
+        )
+        .select_from(VentaDetalle)
+        .join(VentaRegistro, VentaRegistro.id == VentaDetalle.venta_id)
+        .outerjoin(StockUnidad, StockUnidad.id == VentaDetalle.unidad_id)
+        .join(Producto, Producto.id == producto_id)
+        .filter(filtro)
+        .order_by(VentaRegistro.id, VentaDetalle.id)
+        .all()
+    )
+
+
+def ventas_por_producto(session: Session, filtro) -> List[Dict[str, Any]]:
+    """Desglose por producto (GROUP BY): cantidad, importe vendido y costo, de mayor a menor importe"""
+    producto_id = producto_vendido_expr()
+    costo = func.coalesce(Producto.costo_unitario, 0.0)
+    filas = (
+        session.query(
+            Producto.id,
+            Producto.nombre,
+            func.count(VentaDetalle.id),
+            func.sum(VentaDetalle.cantidad),
+            func.sum(VentaDetalle.precio_unitario * VentaDetalle.cantidad),
+            func.sum(costo * VentaDetalle.cantidad),
+        )
+        .select_from(VentaDetalle)
+        .join(VentaRegistro, VentaRegistro.id == VentaDetalle.venta_id)
+        .outerjoin(StockUnidad, StockUnidad.id == VentaDetalle.unidad_id)
+        .join(Producto, Producto.id == producto_id)
+        .filter(filtro)
+        .group_by(Producto.id, Producto.nombre)
+        .order_by(func.sum(VentaDetalle.precio_unitario * VentaDetalle.cantidad).desc())
+        .all()
+    )
+    return [
+        {
+            "producto_id": pid,
+            "producto": nombre,
+            "lineas": lineas,
+            "cantidad": cantidad or 0.0,
+            "total_vendido": vendido or 0.0,
+            "costo_total": costo_total or 0.0,
+            "ganancia": (vendido or 0.0) - (costo_total or 0.0),
+        }
+        for pid, nombre, lineas, cantidad, vendido, costo_total in filas
+    ]
+
+
+def filtro_ventas_rango(fecha_inicio: str, fecha_fin: str):
+    """Ventas realizadas entre dos fechas YYYY-MM-DD (ambas inclusive)"""
+    return and_(
+        VentaRegistro.dia >= fecha_inicio,
+        VentaRegistro.dia <= fecha_fin,
+        VentaRegistro.estado == True
+    )
+
+
+def resumen_diario(session: Session, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
+    """
+    Totales por día de un rango en una sola sentencia (GROUP BY dia).
+    Solo devuelve los días con ventas, ordenados por fecha:
+    {"fecha", "cantidad_ventas", "total_ventas", "total_costos_productos"}
+    """
+    filtro = filtro_ventas_rango(fecha_inicio, fecha_fin)
+    dia = VentaRegistro.dia
+
+    ventas = (
+        select(dia.label("dia"),
+               func.count(VentaRegistro.id).label("cantidad"),
+               func.sum(VentaRegistro.total).label("total"))
+        .where(filtro)
+        .group_by(dia)
+        .subquery()
+    )
+    costos = (
+        select(dia.label("dia"),
+               func.sum(func.coalesce(Producto.costo_unitario, 0.0) * VentaDetalle.cantidad).label("costo"))
+        .select_from(VentaDetalle)
+        .join(VentaRegistro, VentaRegistro.id == VentaDetalle.venta_id)
+        .outerjoin(StockUnidad, StockUnidad.id == VentaDetalle.unidad_id)
+        .join(Producto, Producto.id == producto_vendido_expr())
+        .where(filtro)
+        .group_by(dia)
+        .subquery()
+    )
+    filas = session.execute(
+        select(ventas.c.dia, ventas.c.cantidad, ventas.c.total, func.coalesce(costos.c.costo, 0.0))
+        .select_from(ventas)
+        .outerjoin(costos, costos.c.dia == ventas.c.dia)
+        .order_by(ventas.c.dia)
+    ).all()
+    return [
+        {
+            "fecha": fecha,
+            "cantidad_ventas": cantidad,
+            "total_ventas": total or 0.0,
+            "total_costos_productos": costo or 0.0,
+        }
+        for fecha, cantidad, total, costo in filas
+    ]
@@ -4,6 +4,7 @@ Encapsula los métodos del CRUD para uso desde frontend y testing
 """
 
 from aplicacion.backend.metricas.ganancias import crud
+from aplicacion.backend.metricas.ganancias import resumen_diario
 from datetime import date, timedelta
 
 # ===============================
@@ -34,6 +35,12 @@ def calcular_ganancia_neta_simple_hoy_controller() -> dict:
     """
     return crud.GananciasCRUD.calcular_ganancia_neta_simple_hoy()
 
+def ventas_por_producto_fecha_controller(fecha: str) -> dict:
+    """
+    Controlador para el desglose por producto de lo vendido en una fecha.
+    """
+    return crud.GananciasCRUD.ventas_por_producto_fecha(fecha)
+
 def comparar_ganancia_hoy_vs_ayer_controller() -> dict:
     """
     Controlador para comparar ganancia de hoy vs ayer.
@@ -46,6 +53,18 @@ def registrar_ganancias_fecha_controller(fecha: str, sobrescribir: bool = False)
     """
     return crud.GananciasCRUD.registrar_ganancias_fecha(fecha, sobrescribir)
 
+def calcular_ganancias_rango_controller(fecha_inicio: str, fecha_fin: str) -> dict:
+    """
+    Controlador para calcular ganancias día por día de un rango (sin registrar).
+    """
+    return crud.GananciasCRUD.calcular_ganancias_rango(fecha_inicio, fecha_fin)
+
+def registrar_ganancias_rango_controller(fecha_inicio: str, fecha_fin: str, sobrescribir: bool = False) -> dict:
+    """
+    Controlador para registrar en bloque las ganancias de los días con ventas de un rango.
+    """
+    return crud.GananciasCRUD.registrar_ganancias_rango(fecha_inicio, fecha_fin, sobrescribir)
+
 def registrar_ganancias_hoy_controller(sobrescribir: bool = False) -> dict:
     """
     Controlador para calcular y registrar ganancias del día actual.
@@ -100,6 +119,35 @@ def listar_ganancias_mes_controller(year: int, month: int) -> dict:
     
     return crud.GananciasCRUD.listar_ganancias_rango(fecha_inicio, fecha_fin.isoformat())
 
+def resumen_ventas_rango_controller(fecha_inicio: str, fecha_fin: str) -> dict:
+    """
+    Controlador para los totales de un rango leídos del resumen diario de ventas.
+    """
+    return crud.GananciasCRUD.resumen_ventas_rango(fecha_inicio, fecha_fin)
+
+def resumen_ventas_semana_controller() -> dict:
+    """
+    Controlador para el resumen de ventas de la última semana.
+    """
+    hoy = date.today()
+    hace_7_dias = hoy - timedelta(days=7)
+    
+    return crud.GananciasCRUD.resumen_ventas_rango(hace_7_dias.isoformat(), hoy.isoformat())
+
+def resumen_ventas_mes_actual_controller() -> dict:
+    """
+    Controlador para el resumen de ventas del mes actual.
+    """
+    hoy = date.today()
+    
+    return crud.GananciasCRUD.resumen_ventas_rango(date(hoy.year, hoy.month, 1).isoformat(), hoy.isoformat())
+
+def reconstruir_resumen_ventas_controller(fecha_inicio: str = None, fecha_fin: str = None) -> dict:
+    """
+    Controlador para reconstruir el resumen diario de ventas (todo el historial si no se pasan fechas).
+    """
+    return resumen_diario.reconstruir(fecha_inicio, fecha_fin)
+
 # ===============================
 # CONTROLADORES DE ELIMINACIÓN
 # ===============================
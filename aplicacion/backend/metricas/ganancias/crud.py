@@ -7,13 +7,16 @@ from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert
 
 # Importar desde tu aplicación
 from aplicacion.backend.database.database import (
-    SessionLocal, Ganancia, VentaRegistro, VentaDetalle, 
-    Producto, StockUnidad, CostoOperativo, Impuesto
+    SessionLocal, Ganancia, CostoOperativo, Impuesto
 )
+from aplicacion.backend.metricas.ganancias.agregados import (
+    filtro_ventas_fecha, totales_ventas, detalles_con_producto, ventas_por_producto, resumen_diario
+)
+from aplicacion.backend.metricas.ganancias.resumen_diario import leer_resumen
 
 
 class GananciasCRUD:
@@ -46,14 +49,10 @@ class GananciasCRUD:
                 Ganancia.fecha == fecha
             ).first()
             
-            ventas_fecha = session.query(VentaRegistro).filter(
-                and_(
-                    VentaRegistro.fecha.like(f"{fecha}%"),
-                    VentaRegistro.estado == True
-                )
-            ).all()
+            filtro = filtro_ventas_fecha(fecha)
+            cantidad_ventas, ganancia_bruta_total = totales_ventas(session, filtro)
             
-            if not ventas_fecha:
+            if not cantidad_ventas:
                 return {
                     "success": True,
                     "message": f"No hay ventas registradas para la fecha {fecha}",
@@ -71,53 +70,27 @@ class GananciasCRUD:
                     }
                 }
             
-            ganancia_bruta_total = 0.0
             total_costos_productos = 0.0
             detalles_calculo = []
             
-            for venta in ventas_fecha:
-                ganancia_bruta_total += venta.total
-            
-            for venta in ventas_fecha:
-                detalles_venta = session.query(VentaDetalle).filter(
-                    VentaDetalle.venta_id == venta.id
-                ).all()
+            # Un solo JOIN para todos los detalles del día (antes: consultas por ítem)
+            for fila in detalles_con_producto(session, filtro):
+                costo_unitario = fila.costo_unitario or 0.0
+                precio_venta = fila.precio_unitario
+                cantidad = fila.cantidad
+                
+                costo_total_item = costo_unitario * cantidad
+                total_costos_productos += costo_total_item
                 
-                for detalle in detalles_venta:
-                    producto = None
-                    
-                    if detalle.tipo_venta == 'codigo_barras' and detalle.unidad_id:
-                        unidad_stock = session.query(StockUnidad).filter(
-                            StockUnidad.id == detalle.unidad_id
-                        ).first()
-                        
-                        if unidad_stock:
-                            producto = session.query(Producto).filter(
-                                Producto.id == unidad_stock.producto_id
-                            ).first()
-                    
-                    elif detalle.tipo_venta == 'producto_id' and detalle.producto_id:
-                        producto = session.query(Producto).filter(
-                            Producto.id == detalle.producto_id
-                        ).first()
-                    
-                    if producto:
-                        costo_unitario = producto.costo_unitario or 0.0
-                        precio_venta = detalle.precio_unitario
-                        cantidad = detalle.cantidad
-                        
-                        costo_total_item = costo_unitario * cantidad
-                        total_costos_productos += costo_total_item
-                        
-                        detalles_calculo.append({
-                            "producto": producto.nombre,
-                            "cantidad": cantidad,
-                            "precio_venta": precio_venta,
-                            "costo_unitario": costo_unitario,
-                            "costo_total": costo_total_item,
-                            "subtotal_venta": precio_venta * cantidad,
-                            "tipo_venta": detalle.tipo_venta
-                        })
+                detalles_calculo.append({
+                    "producto": fila.nombre,
+                    "cantidad": cantidad,
+                    "precio_venta": precio_venta,
+                    "costo_unitario": costo_unitario,
+                    "costo_total": costo_total_item,
+                    "subtotal_venta": precio_venta * cantidad,
+                    "tipo_venta": fila.tipo_venta
+                })
             
             costos_operativos = session.query(CostoOperativo).filter(
                 CostoOperativo.activo == True
@@ -181,7 +154,7 @@ class GananciasCRUD:
                 "total_costos_operativos_diarios": total_costos_operativos_diarios,
                 "total_impuestos_fijos_diarios": total_impuestos_fijos_diarios,
                 "total_impuestos_porcentuales_diarios": total_impuestos_porcentuales_diarios,
-                "cantidad_ventas": len(ventas_fecha),
+                "cantidad_ventas": cantidad_ventas,
                 "detalles_productos": detalles_calculo,
                 "costos_aplicados": costos_aplicados,
                 "impuestos_aplicados": impuestos_aplicados,
@@ -312,14 +285,10 @@ class GananciasCRUD:
         session = GananciasCRUD.get_session()
         
         try:
-            ventas_fecha = session.query(VentaRegistro).filter(
-                and_(
-                    VentaRegistro.fecha.like(f"{fecha}%"),
-                    VentaRegistro.estado == True
-                )
-            ).all()
+            filtro = filtro_ventas_fecha(fecha)
+            cantidad_ventas, total_vendido = totales_ventas(session, filtro)
             
-            if not ventas_fecha:
+            if not cantidad_ventas:
                 return {
                     "success": True,
                     "message": f"No hay ventas registradas para la fecha {fecha}",
@@ -333,56 +302,30 @@ class GananciasCRUD:
                     }
                 }
             
-            total_vendido = 0.0
             total_costos_productos = 0.0
             detalles_productos = []
             
-            for venta in ventas_fecha:
-                total_vendido += venta.total
+            for fila in detalles_con_producto(session, filtro):
+                precio_venta_unitario = fila.precio_redondeado or fila.precio_unitario
+                costo_unitario = fila.costo_unitario or 0.0
+                cantidad = fila.cantidad
+                
+                ganancia_unitaria = precio_venta_unitario - costo_unitario
+                ganancia_total_producto = ganancia_unitaria * cantidad
+                costo_total_producto = costo_unitario * cantidad
                 
-                detalles_venta = session.query(VentaDetalle).filter(
-                    VentaDetalle.venta_id == venta.id
-                ).all()
+                total_costos_productos += costo_total_producto
                 
-                for detalle in detalles_venta:
-                    producto = None
-                    
-                    if detalle.tipo_venta == 'codigo_barras' and detalle.unidad_id:
-                        unidad_stock = session.query(StockUnidad).filter(
-                            StockUnidad.id == detalle.unidad_id
-                        ).first()
-                        
-                        if unidad_stock:
-                            producto = session.query(Producto).filter(
-                                Producto.id == unidad_stock.producto_id
-                            ).first()
-                    
-                    elif detalle.tipo_venta == 'producto_id' and detalle.producto_id:
-                        producto = session.query(Producto).filter(
-                            Producto.id == detalle.producto_id
-                        ).first()
-                    
-                    if producto:
-                        precio_venta_unitario = producto.precio_redondeado or detalle.precio_unitario
-                        costo_unitario = producto.costo_unitario or 0.0
-                        cantidad = detalle.cantidad
-                        
-                        ganancia_unitaria = precio_venta_unitario - costo_unitario
-                        ganancia_total_producto = ganancia_unitaria * cantidad
-                        costo_total_producto = costo_unitario * cantidad
-                        
-                        total_costos_productos += costo_total_producto
-                        
-                        detalles_productos.append({
-                            "producto": producto.nombre,
-                            "cantidad": cantidad,
-                            "precio_venta_unitario": precio_venta_unitario,
-                            "costo_unitario": costo_unitario,
-                            "ganancia_unitaria": ganancia_unitaria,
-                            "ganancia_total_producto": ganancia_total_producto,
-                            "costo_total_producto": costo_total_producto,
-                            "tipo_venta": detalle.tipo_venta
-                        })
+                detalles_productos.append({
+                    "producto": fila.nombre,
+                    "cantidad": cantidad,
+                    "precio_venta_unitario": precio_venta_unitario,
+                    "costo_unitario": costo_unitario,
+                    "ganancia_unitaria": ganancia_unitaria,
+                    "ganancia_total_producto": ganancia_total_producto,
+                    "costo_total_producto": costo_total_producto,
+                    "tipo_venta": fila.tipo_venta
+                })
             
             ganancia_neta_simple = total_vendido - total_costos_productos
             
@@ -394,7 +337,7 @@ class GananciasCRUD:
                     "total_vendido": total_vendido,
                     "total_costos_productos": total_costos_productos,
                     "ganancia_neta_simple": ganancia_neta_simple,
-                    "cantidad_ventas": len(ventas_fecha),
+                    "cantidad_ventas": cantidad_ventas,
                     "detalles_productos": detalles_productos
                 }
             }
@@ -414,6 +357,237 @@ class GananciasCRUD:
         finally:
             session.close()
     
+    @staticmethod
+    def ventas_por_producto_fecha(fecha: str) -> Dict[str, Any]:
+        """
+        Desglose de lo vendido en una fecha agrupado por producto
+        
+        Args:
+            fecha (str): Fecha en formato YYYY-MM-DD
+        
+        Returns:
+            Dict: data = lista de {"producto_id", "producto", "lineas", "cantidad",
+                  "total_vendido", "costo_total", "ganancia"} ordenada por importe
+        """
+        session = GananciasCRUD.get_session()
+        
+        try:
+            productos = ventas_por_producto(session, filtro_ventas_fecha(fecha))
+            return {
+                "success": True,
+                "message": f"{len(productos)} productos vendidos el {fecha}",
+                "data": productos
+            }
+            
+        except SQLAlchemyError as e:
+            return {
+                "success": False,
+                "message": f"Error de base de datos: {str(e)}",
+                "data": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error inesperado: {str(e)}",
+                "data": None
+            }
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _cargos_diarios(session: Session) -> Tuple[float, float, List[float]]:
+        """
+        Costos operativos e impuestos prorrateados por día, con el mismo criterio
+        que calcular_ganancias_fecha: (costos operativos, impuestos fijos,
+        porcentajes diarios de los impuestos porcentuales)
+        """
+        total_costos_operativos_diarios = 0.0
+        for costo in session.query(CostoOperativo).filter(CostoOperativo.activo == True).all():
+            total_costos_operativos_diarios += costo.monto / 30
+        
+        total_impuestos_fijos_diarios = 0.0
+        porcentajes_diarios = []
+        for impuesto in session.query(Impuesto).filter(Impuesto.activo == True).all():
+            if impuesto.tipo == 'fijo':
+                total_impuestos_fijos_diarios += impuesto.valor / 30
+            elif impuesto.tipo == 'porcentaje':
+                porcentajes_diarios.append(impuesto.valor / 30)
+        
+        return total_costos_operativos_diarios, total_impuestos_fijos_diarios, porcentajes_diarios
+    
+    @staticmethod
+    def _neta_dia(bruta: float, costos_productos: float,
+                  cargos: Tuple[float, float, List[float]]) -> Tuple[float, float]:
+        """(ganancia neta, impuestos porcentuales) de un día a partir de sus cargos diarios"""
+        costos_operativos, impuestos_fijos, porcentajes = cargos
+        impuestos_porcentuales = 0.0
+        for porcentaje_diario in porcentajes:
+            impuestos_porcentuales += bruta * porcentaje_diario / 100
+        
+        neta = (bruta -
+                costos_productos -
+                costos_operativos -
+                impuestos_fijos -
+                impuestos_porcentuales)
+        return neta, impuestos_porcentuales
+    
+    @staticmethod
+    def _filas_ganancias_rango(session: Session, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
+        cargos = GananciasCRUD._cargos_diarios(session)
+        costos_operativos, impuestos_fijos, _ = cargos
+        
+        filas = []
+        for dia in resumen_diario(session, fecha_inicio, fecha_fin):
+            bruta = dia["total_ventas"]
+            neta, impuestos_porcentuales = GananciasCRUD._neta_dia(bruta, dia["total_costos_productos"], cargos)
+            
+            filas.append({
+                "fecha": dia["fecha"],
+                "ganancia_bruta": bruta,
+                "ganancia_neta": neta,
+                "total_ventas": bruta,
+                "total_costos_productos": dia["total_costos_productos"],
+                "total_costos_operativos_diarios": costos_operativos,
+                "total_impuestos_fijos_diarios": impuestos_fijos,
+                "total_impuestos_porcentuales_diarios": impuestos_porcentuales,
+                "cantidad_ventas": dia["cantidad_ventas"]
+            })
+        return filas
+    
+    @staticmethod
+    def calcular_ganancias_rango(fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+        """
+        Calcula las ganancias de cada día de un rango sin registrarlas,
+        con una consulta agrupada por día en lugar de un cálculo por fecha
+        
+        Args:
+            fecha_inicio (str): Fecha inicial YYYY-MM-DD (inclusive)
+            fecha_fin (str): Fecha final YYYY-MM-DD (inclusive)
+        
+        Returns:
+            Dict: data = {"dias": [...], "resumen": {...}}; solo se listan los
+                  días con ventas, con las mismas claves que calcular_ganancias_fecha
+        """
+        session = GananciasCRUD.get_session()
+        
+        try:
+            dias = GananciasCRUD._filas_ganancias_rango(session, fecha_inicio, fecha_fin)
+            
+            total_bruta = 0.0
+            total_neta = 0.0
+            for dia in dias:
+                total_bruta += dia["ganancia_bruta"]
+                total_neta += dia["ganancia_neta"]
+            
+            return {
+                "success": True,
+                "message": f"Ganancias calculadas para {len(dias)} días con ventas",
+                "data": {
+                    "dias": dias,
+                    "resumen": {
+                        "cantidad_dias": len(dias),
+                        "cantidad_ventas": sum(dia["cantidad_ventas"] for dia in dias),
+                        "total_bruta": total_bruta,
+                        "total_neta": total_neta
+                    }
+                }
+            }
+            
+        except SQLAlchemyError as e:
+            return {
+                "success": False,
+                "message": f"Error de base de datos: {str(e)}",
+                "data": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error inesperado: {str(e)}",
+                "data": None
+            }
+        finally:
+            session.close()
+    
+    @staticmethod
+    def registrar_ganancias_rango(fecha_inicio: str, fecha_fin: str, sobrescribir: bool = False) -> Dict[str, Any]:
+        """
+        Calcula y registra en una sola transacción las ganancias de todos los
+        días con ventas de un rango
+        
+        Args:
+            fecha_inicio (str): Fecha inicial YYYY-MM-DD (inclusive)
+            fecha_fin (str): Fecha final YYYY-MM-DD (inclusive)
+            sobrescribir (bool): Actualizar los días que ya estaban registrados
+        
+        Returns:
+            Dict: data = {"creados": [fechas], "actualizados": [fechas], "omitidos": [fechas]}
+        """
+        session = GananciasCRUD.get_session()
+        
+        try:
+            filas = GananciasCRUD._filas_ganancias_rango(session, fecha_inicio, fecha_fin)
+            resultado = GananciasCRUD._upsert_ganancias(session, filas, sobrescribir)
+            session.commit()
+            
+            return {
+                "success": True,
+                "message": (f"{len(resultado['creados'])} días registrados, "
+                            f"{len(resultado['actualizados'])} actualizados, "
+                            f"{len(resultado['omitidos'])} ya existentes"),
+                "data": resultado
+            }
+            
+        except SQLAlchemyError as e:
+            session.rollback()
+            return {
+                "success": False,
+                "message": f"Error de base de datos: {str(e)}",
+                "data": None
+            }
+        except Exception as e:
+            session.rollback()
+            return {
+                "success": False,
+                "message": f"Error inesperado: {str(e)}",
+                "data": None
+            }
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _upsert_ganancias(session: Session, filas: List[Dict[str, Any]], sobrescribir: bool) -> Dict[str, List[str]]:
+        """Inserta/actualiza filas {"fecha", "ganancia_bruta", "ganancia_neta"} sin hacer commit"""
+        resultado = {"creados": [], "actualizados": [], "omitidos": []}
+        if not filas:
+            return resultado
+        
+        existentes = {
+            g.fecha: g for g in session.query(Ganancia).filter(
+                Ganancia.fecha.in_([fila["fecha"] for fila in filas])
+            ).all()
+        }
+        
+        nuevas = []
+        for fila in filas:
+            ganancia = existentes.get(fila["fecha"])
+            if ganancia is None:
+                nuevas.append({
+                    "fecha": fila["fecha"],
+                    "ganancia_bruta": fila["ganancia_bruta"],
+                    "ganancia_neta": fila["ganancia_neta"]
+                })
+                resultado["creados"].append(fila["fecha"])
+            elif sobrescribir:
+                ganancia.ganancia_bruta = fila["ganancia_bruta"]
+                ganancia.ganancia_neta = fila["ganancia_neta"]
+                resultado["actualizados"].append(fila["fecha"])
+            else:
+                resultado["omitidos"].append(fila["fecha"])
+        
+        if nuevas:
+            session.execute(insert(Ganancia), nuevas)
+        return resultado
+    
     @staticmethod
     def comparar_ganancia_hoy_vs_ayer() -> Dict[str, Any]:
 
@@ -620,6 +794,73 @@ class GananciasCRUD:
         finally:
             session.close()
     
+    @staticmethod
+    def resumen_ventas_rango(fecha_inicio: str, fecha_fin: str) -> Dict[str, Any]:
+        """
+        Totales de un rango leídos del resumen diario de ventas (una fila por
+        día con ventas), con la ganancia neta calculada con los cargos actuales.
+        Mismo formato que listar_ganancias_rango, más cantidad de ventas,
+        unidades y totales por método de pago.
+        """
+        session = GananciasCRUD.get_session()
+        
+        try:
+            cargos = GananciasCRUD._cargos_diarios(session)
+            
+            lista_ganancias = []
+            total_bruta = 0.0
+            total_neta = 0.0
+            totales = {"cantidad_ventas": 0, "unidades_vendidas": 0.0,
+                       "total_efectivo": 0.0, "total_transferencia": 0.0}
+            
+            for dia in leer_resumen(session, fecha_inicio, fecha_fin):
+                bruta = dia["total_ventas"]
+                neta, _ = GananciasCRUD._neta_dia(bruta, dia["costo_productos"], cargos)
+                lista_ganancias.append({
+                    "fecha": dia["fecha"],
+                    "ganancia_bruta": bruta,
+                    "ganancia_neta": neta,
+                    "cantidad_ventas": dia["cantidad_ventas"],
+                    "unidades_vendidas": dia["unidades_vendidas"],
+                    "total_efectivo": dia["total_efectivo"],
+                    "total_transferencia": dia["total_transferencia"]
+                })
+                total_bruta += bruta
+                total_neta += neta
+                for clave in totales:
+                    totales[clave] += dia[clave]
+            
+            return {
+                "success": True,
+                "message": f"Resumen de {len(lista_ganancias)} días con ventas",
+                "data": {
+                    "ganancias": lista_ganancias,
+                    "resumen": {
+                        "cantidad_dias": len(lista_ganancias),
+                        "total_bruta": total_bruta,
+                        "total_neta": total_neta,
+                        "promedio_bruta": total_bruta / len(lista_ganancias) if lista_ganancias else 0,
+                        "promedio_neta": total_neta / len(lista_ganancias) if lista_ganancias else 0,
+                        **totales
+                    }
+                }
+            }
+            
+        except SQLAlchemyError as e:
+            return {
+                "success": False,
+                "message": f"Error de base de datos: {str(e)}",
+                "data": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error inesperado: {str(e)}",
+                "data": None
+            }
+        finally:
+            session.close()
+    
     @staticmethod
     def obtener_resumen_mes_actual() -> Dict[str, Any]:
         """
@@ -0,0 +1,210 @@
+"""
+Resumen diario de ventas materializado (tabla ventas_resumen_diario).
+
+Por día guarda: cantidad de ventas, total vendido, costo de los productos,
+unidades vendidas (kg en granel) y totales en efectivo / transferencia.
+El motor de ventas suma cada venta y cancelar_ultima_venta la resta, los
+dos dentro de su propia transacción, así las tarjetas de semana/mes/año leen
+una fila por día en lugar de recorrer ventas_registro con LIKE.
+
+El costo se imputa igual que en el cálculo de ganancias, salvo que si la
+unidad vendida ya fue purgada se usa el producto_id del detalle (en el
+resumen el costo no "desaparece" cuando se limpian las unidades inactivas).
+Se calcula con el costo_unitario vigente al confirmar; reconstruir() lo
+recalcula con el vigente al momento de reconstruir.
+
+Reconstrucción (datos históricos o tras cambios manuales en la base):
+
+    python -m aplicacion.backend.metricas.ganancias.resumen_diario [desde] [hasta]
+"""
+import sys
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import and_, case, func, select, delete, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from aplicacion.backend.database.database import (
+    SessionLocal, VentaRegistro, VentaDetalle, Producto, StockUnidad, ResumenVentasDiario
+)
+
+CAMPOS = ["cantidad_ventas", "total_ventas", "costo_productos",
+          "unidades_vendidas", "total_efectivo", "total_transferencia"]
+
+
+def _producto_costeo():
+    """Producto al que se imputa el costo de cada detalle"""
+    return case(
+        (
+            and_(VentaDetalle.tipo_venta == "codigo_barras",
+                 VentaDetalle.unidad_id.isnot(None), VentaDetalle.unidad_id != 0),
+            func.coalesce(StockUnidad.producto_id, VentaDetalle.producto_id)
+        ),
+        (
+            and_(VentaDetalle.tipo_venta == "producto_id",
+                 VentaDetalle.producto_id.isnot(None), VentaDetalle.producto_id != 0),
+            VentaDetalle.producto_id
+        ),
+    )
+
+
+def _detalles_con_costo():
+    """SELECT base de unidades y costo sobre ventas_detalle ⋈ ventas_registro"""
+    return (
+        select()
+        .select_from(VentaDetalle)
+        .join(VentaRegistro, VentaRegistro.id == VentaDetalle.venta_id)
+        .outerjoin(StockUnidad, StockUnidad.id == VentaDetalle.unidad_id)
+        .outerjoin(Producto, Producto.id == _producto_costeo())
+    )
+
+
+_UNIDADES = func.coalesce(func.sum(VentaDetalle.cantidad), 0.0)
+_COSTO = func.coalesce(func.sum(func.coalesce(Producto.costo_unitario, 0.0) * VentaDetalle.cantidad), 0.0)
+
+
+def aplicar_venta(session: Session, venta_id: int, signo: int = 1):
+    """
+    Suma (signo=1) o resta (signo=-1) una venta en el resumen de su día.
+    No hace commit: se llama dentro de la transacción que confirma o cancela la venta.
+    """
+    venta = session.execute(
+        select(VentaRegistro.dia, VentaRegistro.total, VentaRegistro.metodo_pago)
+        .where(VentaRegistro.id == venta_id)
+    ).first()
+    if not venta or not venta.dia:
+        return
+
+    unidades, costo = session.execute(
+        _detalles_con_costo().add_columns(_UNIDADES, _COSTO).where(VentaDetalle.venta_id == venta_id)
+    ).one()
+
+    total = venta.total or 0.0
+    metodo = (venta.metodo_pago or "").lower()
+    valores = {
+        "fecha": venta.dia,
+        "cantidad_ventas": signo,
+        "total_ventas": signo * total,
+        "costo_productos": signo * costo,
+        "unidades_vendidas": signo * unidades,
+        "total_efectivo": signo * total if metodo == "efectivo" else 0.0,
+        "total_transferencia": signo * total if metodo == "transferencia" else 0.0,
+    }
+    stmt = sqlite_insert(ResumenVentasDiario).values(**valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResumenVentasDiario.fecha],
+        set_={campo: getattr(ResumenVentasDiario, campo) + getattr(stmt.excluded, campo) for campo in CAMPOS}
+    )
+    session.execute(stmt)
+
+
+def _filas_reconstruidas(session: Session, filtro) -> List[Dict[str, Any]]:
+    dia = VentaRegistro.dia
+    metodo = func.lower(func.coalesce(VentaRegistro.metodo_pago, ""))
+    ventas = (
+        select(
+            dia.label("dia"),
+            func.count(VentaRegistro.id).label("cantidad"),
+            func.coalesce(func.sum(VentaRegistro.total), 0.0).label("total"),
+            func.coalesce(func.sum(case((metodo == "efectivo", VentaRegistro.total), else_=0.0)), 0.0).label("efectivo"),
+            func.coalesce(func.sum(case((metodo == "transferencia", VentaRegistro.total), else_=0.0)), 0.0).label("transferencia"),
+        )
+        .where(filtro)
+        .group_by(dia)
+        .subquery()
+    )
+    detalles = (
+        _detalles_con_costo()
+        .add_columns(dia.label("dia"), _UNIDADES.label("unidades"), _COSTO.label("costo"))
+        .where(filtro)
+        .group_by(dia)
+        .subquery()
+    )
+    filas = session.execute(
+        select(ventas, func.coalesce(detalles.c.unidades, 0.0), func.coalesce(detalles.c.costo, 0.0))
+        .select_from(ventas)
+        .outerjoin(detalles, detalles.c.dia == ventas.c.dia)
+    ).all()
+    return [
+        {
+            "fecha": f[0],
+            "cantidad_ventas": f[1],
+            "total_ventas": f[2],
+            "total_efectivo": f[3],
+            "total_transferencia": f[4],
+            "unidades_vendidas": f[5],
+            "costo_productos": f[6],
+        }
+        for f in filas
+    ]
+
+
+def reconstruir(fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Recalcula el resumen desde ventas_registro/ventas_detalle para un rango
+    (o para toda la historia si no se indican fechas), en una transacción.
+    """
+    session = SessionLocal()
+    try:
+        condiciones = [VentaRegistro.estado == True]
+        borrar = delete(ResumenVentasDiario)
+        if fecha_inicio:
+            condiciones.append(VentaRegistro.dia >= fecha_inicio)
+            borrar = borrar.where(ResumenVentasDiario.fecha >= fecha_inicio)
+        if fecha_fin:
+            condiciones.append(VentaRegistro.dia <= fecha_fin)
+            borrar = borrar.where(ResumenVentasDiario.fecha <= fecha_fin)
+
+        filas = _filas_reconstruidas(session, and_(*condiciones))
+        session.execute(borrar)
+        if filas:
+            session.execute(insert(ResumenVentasDiario), filas)
+        session.commit()
+        return {"exito": True, "dias": len(filas)}
+    except Exception as e:
+        session.rollback()
+        return {"exito": False, "mensaje": str(e)}
+    finally:
+        session.close()
+
+
+def inicializar_si_vacio() -> bool:
+    """Llena el resumen la primera vez que se abre una base con ventas previas a la tabla"""
+    session = SessionLocal()
+    try:
+        if session.query(ResumenVentasDiario.fecha).first() is not None:
+            return False
+        if session.query(VentaRegistro.id).filter(VentaRegistro.estado == True).first() is None:
+            return False
+    finally:
+        session.close()
+
+    resultado = reconstruir()
+    if resultado["exito"]:
+        print(f"Resumen diario de ventas generado: {resultado['dias']} días")
+    else:
+        print(f"No se pudo generar el resumen diario de ventas: {resultado['mensaje']}")
+    return resultado["exito"]
+
+
+def leer_resumen(session: Session, fecha_inicio: str, fecha_fin: str) -> List[Dict[str, Any]]:
+    """Filas del resumen entre dos fechas (inclusive), ordenadas por fecha"""
+    filas = session.query(ResumenVentasDiario).filter(
+        and_(
+            ResumenVentasDiario.fecha >= fecha_inicio,
+            ResumenVentasDiario.fecha <= fecha_fin,
+            ResumenVentasDiario.cantidad_ventas > 0
+        )
+    ).order_by(ResumenVentasDiario.fecha).all()
+    return [{"fecha": f.fecha, **{campo: getattr(f, campo) or 0 for campo in CAMPOS}} for f in filas]
+
+
+if __name__ == "__main__":
+    desde = sys.argv[1] if len(sys.argv) > 1 else None
+    hasta = sys.argv[2] if len(sys.argv) > 2 else None
+    resultado = reconstruir(desde, hasta)
+    if resultado["exito"]:
+        print(f"Resumen reconstruido: {resultado['dias']} días")
+    else:
+        print(f"Error al reconstruir el resumen: {resultado['mensaje']}")
+        sys.exit(1)
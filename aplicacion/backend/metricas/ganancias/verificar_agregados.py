@@ -0,0 +1,269 @@
+"""
+Verificación del cálculo de ganancias con consultas agregadas (agregados.py)
+contra el cálculo anterior, que consultaba unidad y producto por cada detalle.
+
+Arma una base temporal con casos borde (unidades purgadas, productos sin
+costo, ventas canceladas, ventas a granel, ids en 0) y compara, fecha por
+fecha, los resultados de calcular_ganancias_fecha y
+calcular_ganancia_neta_simple_fecha, y calcular_ganancias_rango contra el
+cálculo día por día. Después mide ambos caminos en un día
+con muchas ventas. Sale con código 1 si encuentra diferencias.
+
+python -m aplicacion.backend.metricas.ganancias.verificar_agregados [ventas_dia_cargado]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from sqlalchemy import and_, insert
+
+from aplicacion.backend.database.database import (
+    crear_tablas, engine, SessionLocal, Producto, StockUnidad, VentaRegistro, VentaDetalle,
+    CostoOperativo, Impuesto
+)
+from aplicacion.backend.metricas.ganancias.crud import GananciasCRUD
+
+FECHAS = ["2025-03-01", "2025-03-02", "2025-03-03"]
+FECHA_CARGADA = "2025-03-10"
+
+
+# ---------------- cálculo anterior (una consulta por detalle) ----------------
+def _producto_por_detalle(session, detalle):
+    if detalle.tipo_venta == 'codigo_barras' and detalle.unidad_id:
+        unidad_stock = session.query(StockUnidad).filter(StockUnidad.id == detalle.unidad_id).first()
+        if unidad_stock:
+            return session.query(Producto).filter(Producto.id == unidad_stock.producto_id).first()
+    elif detalle.tipo_venta == 'producto_id' and detalle.producto_id:
+        return session.query(Producto).filter(Producto.id == detalle.producto_id).first()
+    return None
+
+
+def anterior_ganancias(fecha):
+    session = SessionLocal()
+    try:
+        ventas = session.query(VentaRegistro).filter(
+            and_(VentaRegistro.fecha.like(f"{fecha}%"), VentaRegistro.estado == True)
+        ).all()
+        if not ventas:
+            # Sin ventas el resultado no trae detalles_productos
+            return {"cantidad_ventas": 0, "ganancia_bruta": 0.0, "total_costos_productos": 0.0}
+        total = 0.0
+        for venta in ventas:
+            total += venta.total
+        costos = 0.0
+        detalles = []
+        for venta in ventas:
+            for detalle in session.query(VentaDetalle).filter(VentaDetalle.venta_id == venta.id).all():
+                producto = _producto_por_detalle(session, detalle)
+                if producto:
+                    costo_unitario = producto.costo_unitario or 0.0
+                    costos += costo_unitario * detalle.cantidad
+                    detalles.append({
+                        "producto": producto.nombre,
+                        "cantidad": detalle.cantidad,
+                        "precio_venta": detalle.precio_unitario,
+                        "costo_unitario": costo_unitario,
+                        "costo_total": costo_unitario * detalle.cantidad,
+                        "subtotal_venta": detalle.precio_unitario * detalle.cantidad,
+                        "tipo_venta": detalle.tipo_venta
+                    })
+        return {"cantidad_ventas": len(ventas), "ganancia_bruta": total,
+                "total_costos_productos": costos, "detalles_productos": detalles}
+    finally:
+        session.close()
+
+
+def anterior_neta_simple(fecha):
+    session = SessionLocal()
+    try:
+        ventas = session.query(VentaRegistro).filter(
+            and_(VentaRegistro.fecha.like(f"{fecha}%"), VentaRegistro.estado == True)
+        ).all()
+        total = 0.0
+        costos = 0.0
+        detalles = []
+        for venta in ventas:
+            total += venta.total
+            for detalle in session.query(VentaDetalle).filter(VentaDetalle.venta_id == venta.id).all():
+                producto = _producto_por_detalle(session, detalle)
+                if producto:
+                    precio = producto.precio_redondeado or detalle.precio_unitario
+                    costo_unitario = producto.costo_unitario or 0.0
+                    costos += costo_unitario * detalle.cantidad
+                    detalles.append({
+                        "producto": producto.nombre,
+                        "cantidad": detalle.cantidad,
+                        "precio_venta_unitario": precio,
+                        "costo_unitario": costo_unitario,
+                        "ganancia_unitaria": precio - costo_unitario,
+                        "ganancia_total_producto": (precio - costo_unitario) * detalle.cantidad,
+                        "costo_total_producto": costo_unitario * detalle.cantidad,
+                        "tipo_venta": detalle.tipo_venta
+                    })
+        return {"cantidad_ventas": len(ventas), "total_vendido": total,
+                "total_costos_productos": costos, "ganancia_neta_simple": total - costos,
+                "detalles_productos": detalles}
+    finally:
+        session.close()
+
+
+# ---------------- datos ----------------
+def _cargar_datos(fechas, ventas_por_fecha, semilla=7):
+    rnd = random.Random(semilla)
+    session = SessionLocal()
+    try:
+        productos = []
+        for i in range(60):
+            productos.append(Producto(
+                nombre=f"PRODUCTO {i}", unidad_medida="kilogramos" if i % 10 == 0 else "unidad",
+                cantidad=1000, costo_unitario=None if i % 7 == 0 else round(rnd.uniform(10, 500), 2),
+                precio_venta=0, precio_redondeado=None if i % 11 == 0 else float(rnd.randint(20, 900)),
+                usa_redondeo=True, margen_ganancia=0.3, es_divisible=i % 10 == 0
+            ))
+        session.add_all(productos)
+        session.flush()
+        ids = [p.id for p in productos]
+
+        unidades = [StockUnidad(producto_id=rnd.choice(ids), codigo_barras=f"V{semilla:02d}{n:010d}", estado="inactivo")
+                    for n in range(len(fechas) * ventas_por_fecha * 3)]
+        session.add_all(unidades)
+        session.flush()
+        unidades_ids = [u.id for u in unidades]
+
+        detalles = []
+        for fecha in fechas:
+            for n in range(ventas_por_fecha):
+                venta = VentaRegistro(
+                    fecha=f"{fecha}T{8 + n % 12:02d}:{n % 60:02d}:00", total=0.0,
+                    metodo_pago="efectivo", usuario_id=1, estado=(n % 13 != 0)
+                )
+                session.add(venta)
+                session.flush()
+                total = 0.0
+                for _ in range(rnd.randint(1, 6)):
+                    tipo = rnd.choice(["codigo_barras", "codigo_barras", "producto_id", "producto_id",
+                                       "granel", "granel_codigo", "unidad_id"])
+                    precio = float(rnd.randint(20, 900))
+                    cantidad = round(rnd.uniform(0.1, 2.5), 3) if tipo.startswith("granel") else rnd.randint(1, 4)
+                    unidad_id = rnd.choice(unidades_ids + [None, 0, 10 ** 7]) if tipo in ("codigo_barras", "granel_codigo") else None
+                    producto_id = rnd.choice(ids + [0, 10 ** 7])
+                    detalles.append({
+                        "venta_id": venta.id, "unidad_id": unidad_id, "producto_id": producto_id,
+                        "cantidad": cantidad, "precio_unitario": precio, "subtotal": precio * cantidad,
+                        "tipo_venta": tipo
+                    })
+                    total += precio * cantidad
+                venta.total = total
+        session.execute(insert(VentaDetalle), detalles)
+
+        # Unidades purgadas después de la venta (purgar_unidades_inactivas)
+        for uid in rnd.sample(unidades_ids, len(unidades_ids) // 4):
+            session.query(StockUnidad).filter(StockUnidad.id == uid).delete()
+        session.commit()
+    finally:
+        session.close()
+
+
+def _comparar(nombre, esperado, obtenido):
+    diferencias = [k for k in esperado if esperado[k] != obtenido.get(k)]
+    if diferencias:
+        print(f"  ✗ {nombre}: difiere en {', '.join(diferencias)}")
+        return False
+    print(f"  ✓ {nombre}: {esperado['cantidad_ventas']} ventas, "
+          f"{len(esperado.get('detalles_productos', []))} detalles con producto")
+    return True
+
+
+def _comparar_rango(fecha_inicio, fecha_fin, tolerancia=1e-6):
+    """calcular_ganancias_rango contra calcular_ganancias_fecha día por día"""
+    dias = {d["fecha"]: d for d in GananciasCRUD.calcular_ganancias_rango(fecha_inicio, fecha_fin)["data"]["dias"]}
+    claves = ["ganancia_bruta", "ganancia_neta", "total_costos_productos",
+              "total_impuestos_porcentuales_diarios", "cantidad_ventas"]
+    fecha = date.fromisoformat(fecha_inicio)
+    ok = True
+    while fecha.isoformat() <= fecha_fin:
+        esperado = GananciasCRUD.calcular_ganancias_fecha(fecha.isoformat())["data"]
+        obtenido = dias.get(fecha.isoformat())
+        if esperado["cantidad_ventas"] == 0:
+            ok &= obtenido is None
+        else:
+            ok &= obtenido is not None and all(abs(esperado[k] - obtenido[k]) <= tolerancia for k in claves)
+        fecha += timedelta(days=1)
+    print(f"  {'✓' if ok else '✗'} calcular_ganancias_rango {fecha_inicio}..{fecha_fin}: {len(dias)} días con ventas")
+    return ok
+
+
+def main():
+    ventas_cargado = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    crear_tablas()
+    _cargar_datos(FECHAS, 40)
+    session = SessionLocal()
+    session.add_all([
+        CostoOperativo(nombre="ALQUILER", monto=90000.0, recurrente=True, activo=True),
+        Impuesto(nombre="MONOTRIBUTO", tipo="fijo", valor=15000.0, activo=True),
+        Impuesto(nombre="IIBB", tipo="porcentaje", valor=3.5, activo=True),
+    ])
+    session.commit()
+    session.close()
+    print(f"Base temporal: {RUTA}\n")
+
+    ok = True
+    for fecha in FECHAS + ["2025-02-28"]:
+        print(f"Fecha {fecha}")
+        ok &= _comparar("calcular_ganancias_fecha", anterior_ganancias(fecha),
+                        GananciasCRUD.calcular_ganancias_fecha(fecha)["data"])
+        ok &= _comparar("calcular_ganancia_neta_simple_fecha", anterior_neta_simple(fecha),
+                        GananciasCRUD.calcular_ganancia_neta_simple_fecha(fecha)["data"])
+
+    desglose = GananciasCRUD.ventas_por_producto_fecha(FECHAS[0])["data"]
+    esperado = anterior_ganancias(FECHAS[0])
+    lineas = sum(p["lineas"] for p in desglose)
+    if lineas != len(esperado["detalles_productos"]) or \
+            abs(sum(p["costo_total"] for p in desglose) - esperado["total_costos_productos"]) > 1e-6:
+        print("  ✗ ventas_por_producto_fecha no cierra con el detalle")
+        ok = False
+    else:
+        print(f"  ✓ ventas_por_producto_fecha: {len(desglose)} productos, {lineas} líneas")
+
+    print("\nRango agrupado por día")
+    ok &= _comparar_rango(FECHAS[0], FECHAS[-1])
+    registro = GananciasCRUD.registrar_ganancias_rango(FECHAS[0], FECHAS[-1])
+    repetido = GananciasCRUD.registrar_ganancias_rango(FECHAS[0], FECHAS[-1])
+    if len(registro["data"]["creados"]) != len(FECHAS) or len(repetido["data"]["omitidos"]) != len(FECHAS):
+        print(f"  ✗ registrar_ganancias_rango: {registro['message']} / {repetido['message']}")
+        ok = False
+    else:
+        print(f"  ✓ registrar_ganancias_rango: {registro['message']} / {repetido['message']}")
+
+    print(f"\nDía cargado: {ventas_cargado} ventas")
+    _cargar_datos([FECHA_CARGADA], ventas_cargado, semilla=11)
+
+    inicio = time.perf_counter()
+    esperado = anterior_ganancias(FECHA_CARGADA)
+    t_anterior = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtenido = GananciasCRUD.calcular_ganancias_fecha(FECHA_CARGADA)["data"]
+    t_agregado = time.perf_counter() - inicio
+    ok &= _comparar("calcular_ganancias_fecha", esperado, obtenido)
+
+    print(f"\n{'Camino':<28} {'Tiempo (s)':>12}")
+    print("-" * 42)
+    print(f"{'Consultas por detalle':<28} {t_anterior:>12.3f}")
+    print(f"{'JOIN agregado':<28} {t_agregado:>12.3f}")
+    print("-" * 42)
+    print(f"Aceleración: x{t_anterior / t_agregado:.1f}")
+
+    engine.dispose()
+    if not ok:
+        print("\nHAY DIFERENCIAS")
+        sys.exit(1)
+    print("\nResultados equivalentes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Índice en memoria para buscar productos mientras se escribe.
+
+La búsqueda de VentasTab corre en cada tecla. Consultar productos_fts
+(stock/busqueda.py) o recorrer el catálogo entero en cada tecla cuesta en
+proporción a la cantidad de productos; este índice hace que cada tecla
+trabaje sobre lo que hace falta para llenar la lista:
+
+- Listas de posiciones por prefijo: para cada palabra de cada nombre
+  (plegada con tokens_nombre) se guardan sus prefijos de hasta
+  LARGO_PREFIJO letras, y aparte los prefijos de la primera palabra.
+- Las listas están ordenadas por frecuencia de venta (cantidad de ventas
+  confirmadas que incluyen al producto). Filtrarlas conserva ese orden, así
+  que se recorren solo hasta juntar `limite` resultados; lo que quedó sin
+  revisar se guarda para la tecla siguiente.
+- Estrechamiento incremental: si el texto nuevo extiende al anterior
+  ("caf" -> "cafe" -> "cafe m"), todo resultado nuevo estaba entre los
+  resultados (o los pendientes de revisar) de la búsqueda anterior, y se
+  sigue desde ahí. Si no (se borró o se pegó otro texto), se parte de las
+  listas de prefijos.
+
+La relevancia va primero: los nombres que empiezan con lo escrito aparecen
+antes que los que lo tienen en otra palabra; dentro de cada grupo, por
+frecuencia de venta.
+
+Se reconstruye solo cuando cambian nombres o se agregan/quitan productos
+(CATALOGO_ACTUALIZADO); los cambios de stock o precio no lo tocan porque
+los productos se leen del catálogo al mostrarlos. Cada VENTA_CONFIRMADA
+suma frecuencia a los productos vendidos, que reordena lo que se muestra.
+"""
+from __future__ import annotations
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Callable
+
+from sqlalchemy import func
+
+from aplicacion.backend.database.database import SessionLocal, VentaRegistro, VentaDetalle
+from aplicacion.backend.eventos.bus import bus, CATALOGO_ACTUALIZADO, VENTA_CONFIRMADA
+from aplicacion.backend.stock.catalogo import catalogo, tokens_nombre
+
+# Largo máximo de los prefijos con lista propia; más allá se filtra
+LARGO_PREFIJO = 3
+
+
+def frecuencias_venta() -> Dict[int, int]:
+    """Cantidad de ventas confirmadas en las que aparece cada producto"""
+    session = SessionLocal()
+    try:
+        filas = (
+            session.query(VentaDetalle.producto_id, func.count(func.distinct(VentaDetalle.venta_id)))
+            .join(VentaRegistro, VentaRegistro.id == VentaDetalle.venta_id)
+            .filter(VentaRegistro.estado == 1, VentaDetalle.producto_id.isnot(None))
+            .group_by(VentaDetalle.producto_id)
+            .all()
+        )
+        return {pid: cantidad for pid, cantidad in filas}
+    finally:
+        session.close()
+
+
+def _coincide(clave: str, tokens: List[str]) -> bool:
+    """Cada token es prefijo de alguna palabra de `clave` (palabras con un espacio adelante)"""
+    return all(" " + t in clave for t in tokens)
+
+
+class _Recorrido:
+    """Filtrado perezoso de una lista de posiciones: lo encontrado hasta `cursor` y lo que falta revisar"""
+
+    def __init__(self, fuente: List[int]):
+        self.fuente = fuente
+        self.cursor = 0
+        self.encontrados: List[int] = []
+
+    def pendientes(self) -> List[int]:
+        """Candidatos para una búsqueda más específica: lo encontrado más lo no revisado"""
+        return self.encontrados + self.fuente[self.cursor:]
+
+    def juntar(self, condicion: Callable[[int], bool], cantidad: Optional[int],
+               descartar: Optional[Callable[[int], bool]] = None) -> List[int]:
+        """Avanza hasta tener `cantidad` posiciones que cumplan `condicion` y no `descartar` (todas si es None)"""
+        utiles = []
+        fuente = self.fuente
+        while self.cursor < len(fuente) and (cantidad is None or len(utiles) < cantidad):
+            pos = fuente[self.cursor]
+            self.cursor += 1
+            if condicion(pos):
+                self.encontrados.append(pos)
+                if not (descartar and descartar(pos)):
+                    utiles.append(pos)
+        return utiles
+
+
+class IndiceAutocompletar:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # por posición (orden de frecuencia): id y nombre plegado, " palabra palabra ..."
+        self._ids: List[int] = []
+        self._claves: List[str] = []
+        self._nombres: Dict[int, str] = {}
+        self._por_prefijo: Dict[str, List[int]] = {}
+        self._por_inicio: Dict[str, List[int]] = {}
+        self._frecuencias: Dict[int, int] = {}
+        self._construido = False
+        # última búsqueda: consulta plegada y recorridos (nombres que empiezan así / todos)
+        self._consulta: Optional[str] = None
+        self._inicio: Optional[_Recorrido] = None
+        self._todos: Optional[_Recorrido] = None
+
+    # ---------------- construcción ----------------
+    def construir(self, frecuencias: Optional[Dict[int, int]] = None,
+                  productos: Optional[List[Dict[str, Any]]] = None):
+        """Arma el índice desde el catálogo (o desde `productos`) y las frecuencias de venta"""
+        if frecuencias is None:
+            frecuencias = frecuencias_venta()
+        productos = list(catalogo.listar_productos() if productos is None else productos)
+        productos.sort(key=lambda p: (-frecuencias.get(p["id"], 0), str(p.get("nombre") or "")))
+
+        ids, claves = [], []
+        por_prefijo = defaultdict(list)
+        por_inicio = defaultdict(list)
+        for posicion, producto in enumerate(productos):
+            tokens = tokens_nombre(producto.get("nombre"))
+            ids.append(producto["id"])
+            claves.append("".join(" " + t for t in tokens))
+            prefijos = {t[:largo] for t in tokens for largo in range(1, min(len(t), LARGO_PREFIJO) + 1)}
+            for prefijo in prefijos:
+                por_prefijo[prefijo].append(posicion)
+            if tokens:
+                for largo in range(1, min(len(tokens[0]), LARGO_PREFIJO) + 1):
+                    por_inicio[tokens[0][:largo]].append(posicion)
+
+        with self._lock:
+            self._ids, self._claves = ids, claves
+            self._nombres = {p["id"]: p.get("nombre") for p in productos}
+            self._por_prefijo = dict(por_prefijo)
+            self._por_inicio = dict(por_inicio)
+            self._frecuencias = dict(frecuencias)
+            self._consulta = self._inicio = self._todos = None
+            self._construido = True
+
+    def _asegurar_construido(self):
+        if not self._construido:
+            self.construir()
+
+    def invalidar(self):
+        with self._lock:
+            self._construido = False
+            self._consulta = self._inicio = self._todos = None
+
+    # ---------------- eventos ----------------
+    def al_actualizar_catalogo(self, datos: Dict[str, Any]):
+        """Reconstruye (en el hilo del bus) solo si hay productos nuevos, eliminados o con otro nombre"""
+        with self._lock:
+            if not self._construido:
+                return
+            cambio = bool(datos.get("eliminados"))
+            for pid in datos.get("productos") or []:
+                if cambio:
+                    break
+                producto = catalogo.obtener_producto(pid)
+                cambio = producto is None or self._nombres.get(pid, object()) != producto.get("nombre")
+            frecuencias = dict(self._frecuencias)
+        if cambio:
+            self.construir(frecuencias)
+
+    def al_confirmar_venta(self, datos: Dict[str, Any]):
+        with self._lock:
+            for pid in datos.get("productos_ids") or []:
+                self._frecuencias[pid] = self._frecuencias.get(pid, 0) + 1
+
+    # ---------------- consultas ----------------
+    def _recorridos(self, consulta: str, tokens: List[str]):
+        """Sigue la búsqueda anterior si la consulta la extiende; si no, parte de las listas de prefijos"""
+        if self._consulta is not None and consulta.startswith(self._consulta):
+            return _Recorrido(self._inicio.pendientes()), _Recorrido(self._todos.pendientes())
+        listas = [self._por_prefijo.get(t[:LARGO_PREFIJO], []) for t in tokens]
+        return (_Recorrido(self._por_inicio.get(tokens[0][:LARGO_PREFIJO], [])),
+                _Recorrido(min(listas, key=len)))
+
+    def buscar_ids(self, texto: str, limite: Optional[int] = 50) -> List[int]:
+        """Ids que coinciden con `texto`: primero los que empiezan así, después el resto; cada grupo por frecuencia de venta"""
+        tokens = tokens_nombre(texto)
+        if not tokens:
+            return []
+        consulta = " ".join(tokens)
+
+        with self._lock:
+            self._asegurar_construido()
+            inicio, todos = self._recorridos(consulta, tokens)
+            claves = self._claves
+            inicio_consulta = " " + consulta
+
+            def empieza(pos):
+                return claves[pos].startswith(inicio_consulta)
+
+            primeros = inicio.juntar(empieza, limite)
+            faltan = None if limite is None else limite - len(primeros)
+            resto = []
+            if faltan != 0:
+                resto = todos.juntar(lambda pos: _coincide(claves[pos], tokens), faltan, descartar=empieza)
+            self._consulta, self._inicio, self._todos = consulta, inicio, todos
+
+            frecuencia = self._frecuencias.get
+            ordenados = []
+            for grupo in (primeros, resto):
+                ids = [self._ids[pos] for pos in grupo]
+                # las frecuencias crecen con las ventas del día; reordenar lo que se muestra
+                ids.sort(key=lambda pid: -frecuencia(pid, 0))
+                ordenados.extend(ids)
+            return ordenados
+
+    def buscar_productos(self, texto: str, limite: Optional[int] = 50) -> List[Dict[str, Any]]:
+        """Productos (formato stock.json, desde el catálogo en memoria) en orden de relevancia"""
+        productos = []
+        for pid in self.buscar_ids(texto, limite):
+            producto = catalogo.obtener_producto(pid)
+            if producto:
+                productos.append(producto)
+        return productos
+
+
+# Instancia compartida por todo el proceso
+indice_autocompletar = IndiceAutocompletar()
+bus.suscribir(CATALOGO_ACTUALIZADO, indice_autocompletar.al_actualizar_catalogo)
+bus.suscribir(VENTA_CONFIRMADA, indice_autocompletar.al_confirmar_venta)
@@ -0,0 +1,113 @@
+"""
+Benchmark de alta de unidades en agregar_stock: camino anterior (un código
+aleatorio + un SELECT de colisión + un INSERT por unidad) vs. provisión en
+bloque (códigos del asignador secuencial y un INSERT de varias filas).
+
+python -m aplicacion.backend.stock.bench_agregar_stock [unidades] [unidades_existentes]
+"""
+import io
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from datetime import datetime
+
+from sqlalchemy import insert, func
+
+from aplicacion.backend.database.database import crear_tablas, engine, SessionLocal, Producto, StockUnidad
+from aplicacion.backend.stock import crud
+
+
+def generar_codigo_barras():
+    """Código aleatorio como se generaba antes del asignador de códigos"""
+    return ''.join([str(random.randint(0, 9)) for _ in range(13)])
+
+
+def _agregar_stock_por_unidad(id_producto, cantidad):
+    """Reproducción del alta anterior: una consulta de colisión y un objeto por unidad"""
+    session = SessionLocal()
+    try:
+        producto = session.query(Producto).filter_by(id=id_producto).first()
+        producto.cantidad = (producto.cantidad or 0) + cantidad
+        fecha_actual = datetime.now().isoformat()
+        for i in range(cantidad):
+            codigo_barras = generar_codigo_barras()
+            while session.query(StockUnidad).filter_by(codigo_barras=codigo_barras).first():
+                codigo_barras = generar_codigo_barras()
+            session.add(StockUnidad(
+                producto_id=producto.id, codigo_barras=codigo_barras, estado="activo",
+                fecha_ingreso=fecha_actual, fecha_modificacion=fecha_actual,
+                observaciones="Unidad agregada por incremento de stock"
+            ))
+            print(f"  Unidad {i+1}/{cantidad}: {codigo_barras}")
+        session.commit()
+    finally:
+        session.close()
+
+
+def _crear_producto(nombre):
+    session = SessionLocal()
+    try:
+        producto = Producto(nombre=nombre, unidad_medida="unidad", cantidad=0, es_divisible=False)
+        session.add(producto)
+        session.commit()
+        return producto.id
+    finally:
+        session.close()
+
+
+def _precargar_unidades(cantidad):
+    """Unidades previas para que la verificación de colisiones trabaje sobre una tabla poblada"""
+    pid = _crear_producto("EXISTENTE")
+    with engine.begin() as conn:
+        conn.execute(insert(StockUnidad), [
+            {"producto_id": pid, "codigo_barras": f"P{n:012d}", "estado": "inactivo"}
+            for n in range(cantidad)
+        ])
+
+
+def _contar_unidades(producto_id):
+    session = SessionLocal()
+    try:
+        return session.query(func.count(StockUnidad.id)).filter(StockUnidad.producto_id == producto_id).scalar()
+    finally:
+        session.close()
+
+
+def main():
+    unidades = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    existentes = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+    crear_tablas()
+    _precargar_unidades(existentes)
+    print(f"Base temporal: {RUTA}")
+    print(f"Ingreso de {unidades} unidades con {existentes} unidades ya cargadas\n")
+
+    tiempos = {}
+    for nombre, funcion in (("Una consulta por unidad", _agregar_stock_por_unidad),
+                            ("Provisión en bloque", crud.agregar_stock)):
+        pid = _crear_producto(nombre)
+        inicio = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            funcion(pid, unidades)
+        tiempos[nombre] = time.perf_counter() - inicio
+        creadas = _contar_unidades(pid)
+        if creadas != unidades:
+            print(f"✗ {nombre}: se crearon {creadas} unidades")
+            sys.exit(1)
+
+    print(f"{'Camino':<28} {'Tiempo (s)':>12} {'Unidades/s':>12}")
+    print("-" * 54)
+    for nombre, segundos in tiempos.items():
+        print(f"{nombre:<28} {segundos:>12.3f} {unidades / segundos:>12.0f}")
+    print("-" * 54)
+    anterior, bloque = tiempos.values()
+    print(f"Aceleración: x{anterior / bloque:.1f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
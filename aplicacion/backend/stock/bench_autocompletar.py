@@ -0,0 +1,97 @@
+"""
+Benchmark de la búsqueda mientras se escribe (stock/autocompletar.py).
+
+Simula a alguien tipeando búsquedas letra por letra sobre catálogos de
+distinto tamaño y mide el tiempo por tecla del índice incremental contra
+un recorrido lineal del catálogo (lo que hacía filter_products). Todo en
+memoria: no abre ninguna base.
+
+python -m aplicacion.backend.stock.bench_autocompletar [tamaños...]
+"""
+import random
+import statistics
+import sys
+import time
+
+from aplicacion.backend.stock.autocompletar import IndiceAutocompletar
+from aplicacion.backend.stock.catalogo import tokens_nombre
+
+PALABRAS = ["café", "molido", "leche", "entera", "descremada", "yerba", "mate", "azúcar", "arroz",
+            "fideos", "tallarín", "aceite", "girasol", "oliva", "galletitas", "dulce", "limón",
+            "jabón", "polvo", "atún", "salsa", "tomate", "pan", "lactal", "queso", "rallado"]
+MARCAS = ["serenísima", "marolio", "taragüí", "ledesma", "gallo", "knorr", "arcor", "bagley"]
+TIPEOS = ["cafe molido", "leche serenisima", "azucar", "yerba taragui 500", "jabon polvo"]
+LIMITE = 200
+
+
+def _catalogo(cantidad, rnd):
+    productos = [
+        {"id": pid, "nombre": " ".join(rnd.sample(PALABRAS, 2) + [rnd.choice(MARCAS), f"{rnd.randint(1, 999)}g"]).upper()}
+        for pid in range(1, cantidad + 1)
+    ]
+    frecuencias = {pid: rnd.randint(0, 300) for pid in rnd.sample(range(1, cantidad + 1), cantidad // 10)}
+    return productos, frecuencias
+
+
+def _lineal(productos, texto):
+    """Filtro anterior: todas las palabras contenidas en el nombre, recorriendo el catálogo"""
+    tokens = tokens_nombre(texto)
+    return [p["id"] for p in productos if all(t in " ".join(tokens_nombre(p["nombre"])) for t in tokens)][:LIMITE]
+
+
+def _esperado(productos, frecuencias, texto):
+    """Resultado de referencia: cada palabra como prefijo; primero los que empiezan así, después por frecuencia"""
+    tokens = tokens_nombre(texto)
+    consulta = " ".join(tokens)
+    coincidencias = []
+    for p in productos:
+        palabras = tokens_nombre(p["nombre"])
+        if all(any(w.startswith(t) for w in palabras) for t in tokens):
+            clave = (not " ".join(palabras).startswith(consulta), -frecuencias.get(p["id"], 0), p["nombre"])
+            coincidencias.append((clave, p["id"]))
+    return [pid for _, pid in sorted(coincidencias)[:LIMITE]]
+
+
+def _por_tecla(buscar):
+    """Tiempos (ms) de cada tecla de todas las búsquedas de TIPEOS"""
+    tiempos = []
+    for palabra in TIPEOS:
+        for largo in range(1, len(palabra) + 1):
+            inicio = time.perf_counter()
+            buscar(palabra[:largo])
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def main():
+    tamanos = [int(a) for a in sys.argv[1:]] or [5000, 50000, 200000]
+    rnd = random.Random(7)
+
+    print(f"{'Productos':>10} {'Construir (ms)':>15} {'Índice med/máx (ms)':>21} {'Lineal med/máx (ms)':>21}")
+    print("-" * 70)
+    for cantidad in tamanos:
+        productos, frecuencias = _catalogo(cantidad, rnd)
+        indice = IndiceAutocompletar()
+        inicio = time.perf_counter()
+        indice.construir(frecuencias, productos)
+        construir = (time.perf_counter() - inicio) * 1000
+
+        rapido = _por_tecla(lambda t: indice.buscar_ids(t, LIMITE))
+        lineal = _por_tecla(lambda t: _lineal(productos, t)) if cantidad <= 50000 else None
+
+        if lineal is not None:
+            for palabra in TIPEOS:
+                for largo in range(1, len(palabra) + 1):
+                    if indice.buscar_ids(palabra[:largo], LIMITE) != _esperado(productos, frecuencias, palabra[:largo]):
+                        print(f"✗ {palabra[:largo]!r}: el índice no devolvió lo mismo que el recorrido completo")
+                        sys.exit(1)
+
+        texto_lineal = f"{statistics.median(lineal):.2f} / {max(lineal):.2f}" if lineal else "-"
+        print(f"{cantidad:>10} {construir:>15.0f} "
+              f"{statistics.median(rapido):>10.3f} / {max(rapido):<8.2f} {texto_lineal:>21}")
+    print("-" * 70)
+    print(f"(resultados limitados a {LIMITE}; el recorrido lineal y la verificación se omiten en catálogos muy grandes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark y verificación de la búsqueda de productos (stock/busqueda.py).
+
+Arma una base temporal con muchos productos (nombres con y sin acentos,
+proveedores y categorías), mide el tiempo de varias búsquedas contra el
+recorrido lineal en Python que hacían las pantallas, y verifica que el
+índice siga a altas, ediciones, bajas y renombres de categoría. Sale con
+código 1 si el índice queda desincronizado.
+
+No toca manoli.db.
+
+python -m aplicacion.backend.stock.bench_busqueda [productos]
+"""
+import random
+import statistics
+import sys
+import time
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from sqlalchemy import insert
+
+from aplicacion.backend.database.database import (
+    crear_tablas, engine, SessionLocal, Producto, Proveedor, StockClasificacion
+)
+from aplicacion.backend.stock import busqueda
+
+PALABRAS = ["café", "molido", "leche", "entera", "descremada", "yerba", "mate", "azúcar", "arroz",
+            "fideos", "tallarín", "aceite", "girasol", "oliva", "galletitas", "dulce", "limón",
+            "jabón", "polvo", "atún", "salsa", "tomate", "pan", "lactal", "queso", "rallado"]
+MARCAS = ["serenísima", "marolio", "taragüí", "ledesma", "gallo", "knorr", "arcor", "bagley"]
+BUSQUEDAS = ["cafe", "cafe mol", "a", "leche seren", "azucar ledesma", "jabon", "x"]
+
+
+def _cargar(productos, rnd):
+    with engine.begin() as conn:
+        conn.execute(insert(Proveedor), [{"nombre": f"DISTRIBUIDORA {m.upper()}"} for m in MARCAS])
+        conn.execute(insert(StockClasificacion), [{"nombre": c, "activa": True}
+                                                  for c in ("almacén", "lácteos", "limpieza", "bebidas")])
+        conn.execute(insert(Producto), [
+            {
+                "nombre": " ".join(rnd.sample(PALABRAS, 2) + [rnd.choice(MARCAS), f"{rnd.randint(1, 999)}g"]).upper(),
+                "cantidad": 10,
+                "proveedor_id": rnd.randint(1, len(MARCAS)),
+                "categoria_id": rnd.randint(1, 4),
+            }
+            for _ in range(productos)
+        ])
+
+
+def _lineal(nombres, texto):
+    """Lo que hacían las pantallas: subcadena en minúsculas sobre toda la lista"""
+    s = texto.lower()
+    return [pid for pid, nombre in nombres if s in nombre.lower()]
+
+
+def _medir(funcion, texto, repeticiones=20):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(texto)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, resultado
+
+
+def _verificar_sincronizacion():
+    ok = True
+    session = SessionLocal()
+    try:
+        nuevo = Producto(nombre="ÑOQUIS DE PAPA CASEROS", cantidad=1, categoria_id=1)
+        session.add(nuevo)
+        session.commit()
+        ok &= nuevo.id in busqueda.buscar_ids("noquis", None)
+
+        nuevo.nombre = "ÑOQUIS DE CALABAZA"
+        session.commit()
+        ok &= nuevo.id in busqueda.buscar_ids("calabaza", None) and not busqueda.buscar_ids("noquis papa", None)
+
+        categoria = session.get(StockClasificacion, 1)
+        categoria.nombre = "frescos pastas"
+        session.commit()
+        ok &= nuevo.id in busqueda.buscar_ids("noquis pastas", None)
+
+        session.delete(nuevo)
+        session.commit()
+        ok &= not busqueda.buscar_ids("noquis", None)
+    finally:
+        session.close()
+    return ok
+
+
+def main():
+    productos = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rnd = random.Random(5)
+    crear_tablas()
+    _cargar(productos, rnd)
+
+    with engine.connect() as conn:
+        nombres = [(fila[0], fila[1]) for fila in conn.exec_driver_sql("SELECT id, nombre FROM productos")]
+
+    print(f"Base temporal: {RUTA}")
+    print(f"{productos} productos\n")
+    print(f"{'Búsqueda':<18} {'Lineal (ms)':>12} {'Coinc.':>8} {'FTS top 50 (ms)':>16} {'FTS todo (ms)':>14} {'Coinc.':>8}")
+    print("-" * 82)
+    for texto in BUSQUEDAS:
+        t_lineal, lineal = _medir(lambda t: _lineal(nombres, t), texto, 5)
+        t_top, _ = _medir(lambda t: busqueda.buscar_ids(t, 50), texto)
+        t_todo, todos = _medir(lambda t: busqueda.buscar_ids(t, None), texto, 5)
+        print(f"{texto!r:<18} {t_lineal:>12.2f} {len(lineal):>8} {t_top:>16.2f} {t_todo:>14.2f} {len(todos):>8}")
+    print("-" * 82)
+    print("(la búsqueda lineal no pliega acentos ni encuentra palabras sueltas en cualquier orden)\n")
+
+    ok = _verificar_sincronizacion()
+    engine.dispose()
+    if not ok:
+        print("✗ El índice de búsqueda no siguió los cambios de productos/categorías")
+        sys.exit(1)
+    print("✓ Índice sincronizado con altas, ediciones, bajas y renombres de categoría")
+
+
+if __name__ == "__main__":
+    main()
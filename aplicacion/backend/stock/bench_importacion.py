@@ -0,0 +1,215 @@
+"""
+Benchmark de la importación de CSV de stock: camino anterior (un
+agregar_producto_controller por producto, un SELECT de colisión y un INSERT
+por unidad) vs. el pipeline en bloques de stock/importacion.py, con la
+normalización en un proceso y repartida en `procesos` procesos.
+
+Los archivos se arman con generar_csv_stock_masivo: productos repetidos en
+varias filas, nombres a granel (XKG), precios o márgenes faltantes, códigos
+vacíos, repetidos en el archivo o ya cargados en la base y fechas en
+distintos formatos. Verifica que ambos caminos creen los mismos productos
+y que cada producto quede con tantas unidades como su cantidad; la corrida
+en paralelo tiene que crear los mismos productos que la de un proceso.
+
+python -m aplicacion.backend.stock.bench_importacion [filas] [filas_camino_anterior] [procesos]
+"""
+import io
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from aplicacion.backend.database.base_temporal import DIRECTORIO, RUTA  # antes que database
+
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, text
+
+from aplicacion.backend.database.database import crear_tablas, engine, SessionLocal, Producto, StockUnidad
+from aplicacion.backend.stock.controller import agregar_producto_controller
+from aplicacion.backend.stock.importacion import PROCESOS_IMPORTACION, importar_csv
+from aplicacion.backend.stock.importer import generar_csv_stock_masivo, procesar_fila_csv
+
+PALABRAS = ["yerba", "azucar", "arroz", "fideos", "aceite", "galletitas", "leche", "cafe", "harina",
+            "polenta", "lentejas", "jabon", "detergente", "queso", "salame", "mani", "pasas"]
+CODIGOS_EN_BASE = ["7790000000%03d" % i for i in range(50)]
+COLUMNAS_PRODUCTO = [Producto.nombre, Producto.unidad_medida, Producto.cantidad, Producto.costo_unitario,
+                     Producto.precio_venta, Producto.precio_redondeado, Producto.usa_redondeo,
+                     Producto.margen_ganancia, Producto.es_divisible, Producto.proveedor_id, Producto.categoria_id]
+
+
+def _filas(cantidad, rnd):
+    """Filas para generar_csv_stock_masivo: cada producto se repite en 1 a 6 filas (sus unidades)"""
+    filas = []
+    while len(filas) < cantidad:
+        nombre = " ".join(rnd.sample(PALABRAS, 2)).upper() + f" {rnd.randint(1, 9999)}"
+        if rnd.random() < 0.1:
+            nombre += " XKG"
+        costo = round(rnd.uniform(50, 5000), 2)
+        producto = {
+            "nombre": nombre,
+            "unidad_medida": "",
+            "costo_unitario": costo,
+            "precio_venta": "",
+            "margen_ganancia": "",
+            "usa_redondeo": rnd.choice(["true", "false"]),
+            "proveedor_id": rnd.choice(["", 1, 2, 3]),
+            "categoria_id": rnd.choice(["", 1, 2]),
+        }
+        if rnd.random() < 0.5:
+            producto["margen_ganancia"] = rnd.choice([0.25, 0.3, 35, 48])
+        else:
+            producto["precio_venta"] = round(costo * rnd.uniform(1.1, 1.8), 2)
+        for _ in range(rnd.randint(1, 6)):
+            r = rnd.random()
+            if r < 0.3:
+                codigo = ""
+            elif r < 0.33 and filas:
+                codigo = rnd.choice(filas)["codigo_barras"]      # repetido en el archivo
+            elif r < 0.35:
+                codigo = rnd.choice(CODIGOS_EN_BASE)              # ya cargado en la base
+            else:
+                codigo = "".join(rnd.choice("0123456789") for _ in range(13))
+            fecha = datetime(2026, rnd.randint(1, 12), rnd.randint(1, 28))
+            vencimiento = rnd.choice(["", fecha.strftime("%Y-%m-%d"), fecha.strftime("%d/%m/%Y")])
+            filas.append(dict(producto, codigo_barras=codigo, vencimiento=vencimiento))
+    return filas[:cantidad]
+
+
+def _importar_por_fila(ruta):
+    """Reproducción del camino anterior: un producto por controller, un SELECT y un INSERT por unidad"""
+    import csv
+    with open(ruta, newline='', encoding='utf-8') as f:
+        filas = list(csv.DictReader(f))
+    productos, unidades = {}, []
+    for idx, fila in enumerate(filas, start=1):
+        procesada = procesar_fila_csv(fila, idx)
+        clave = procesada["clave"]
+        if clave in productos:
+            productos[clave]["cantidad"] += 1
+        else:
+            productos[clave] = dict(procesada["producto"], cantidad=1)
+        unidades.append(procesada)
+
+    creados = {}
+    for clave, data in productos.items():
+        data = dict(data)
+        data["precio_venta"] = round(data["precio_venta"], 2)
+        data["margen_ganancia"] = round(data["margen_ganancia"], 4)
+        creados[clave] = agregar_producto_controller(data)
+
+    session = SessionLocal()
+    try:
+        fecha_actual = datetime.now().date()
+        for i, unidad in enumerate(unidades, start=1):
+            codigo = unidad["codigo_barras"] or "".join(random.choice("0123456789") for _ in range(13))
+            if session.execute(text("SELECT 1 FROM stock_unidades WHERE codigo_barras = :codigo"),
+                               {"codigo": codigo}).first():
+                codigo = "".join(random.choice("0123456789") for _ in range(13))
+            session.execute(
+                text("INSERT INTO stock_unidades (producto_id, codigo_barras, estado, fecha_ingreso, "
+                     "fecha_modificacion, fecha_vencimiento) VALUES (:p, :c, 'activo', :f, :f, :v)"),
+                {"p": creados[unidad["clave"]].id, "c": codigo, "f": fecha_actual, "v": unidad["vencimiento"]}
+            )
+            if i % 100 == 0:
+                session.commit()
+        session.commit()
+    finally:
+        session.close()
+
+
+def _productos_desde(conn, primer_id):
+    return [tuple(fila) for fila in conn.execute(
+        select(*COLUMNAS_PRODUCTO).where(Producto.id >= primer_id).order_by(Producto.id)
+    )]
+
+
+def _siguiente_id():
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(Producto.id))).scalar() + 1
+
+
+def _medir(funcion, *args):
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    filas_anterior = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    procesos = int(sys.argv[3]) if len(sys.argv) > 3 else max(2, PROCESOS_IMPORTACION)
+    rnd = random.Random(11)
+    crear_tablas()
+    with engine.begin() as conn:
+        producto_id = conn.execute(insert(Producto).returning(Producto.id), [{"nombre": "EXISTENTE"}]).scalar()
+        conn.execute(insert(StockUnidad), [{"producto_id": producto_id, "codigo_barras": c, "estado": "activo"}
+                                           for c in CODIGOS_EN_BASE])
+
+    ruta_chica = os.path.join(DIRECTORIO, "stock_chico.csv")
+    ruta_grande = os.path.join(DIRECTORIO, "stock_grande.csv")
+    generar_csv_stock_masivo(_filas(filas_anterior, rnd), ruta_chica)
+    generar_csv_stock_masivo(_filas(filas, rnd), ruta_grande)
+
+    print(f"Base temporal: {RUTA}\n")
+    print(f"{'Camino':<26} {'Filas':>8} {'Tiempo (s)':>11} {'Filas/s':>10}")
+    print("-" * 58)
+
+    inicio_anterior = _siguiente_id()
+    t_anterior, _ = _medir(_importar_por_fila, ruta_chica)
+    print(f"{'Anterior (por fila)':<26} {filas_anterior:>8} {t_anterior:>11.2f} {filas_anterior / t_anterior:>10.0f}")
+
+    inicio_bloques = _siguiente_id()
+    t_chico, resumen_chico = _medir(importar_csv, ruta_chica, 5000, 1)
+    print(f"{'En bloques':<26} {filas_anterior:>8} {t_chico:>11.2f} {filas_anterior / t_chico:>10.0f}")
+
+    inicio_grande = _siguiente_id()
+    t_grande, resumen = _medir(importar_csv, ruta_grande, 5000, 1)
+    print(f"{'En bloques':<26} {filas:>8} {t_grande:>11.2f} {filas / t_grande:>10.0f}")
+
+    inicio_paralelo = _siguiente_id()
+    t_paralelo, resumen_paralelo = _medir(importar_csv, ruta_grande, 5000, procesos)
+    etiqueta = f"En bloques, {procesos} procesos"
+    print(f"{etiqueta:<26} {filas:>8} {t_paralelo:>11.2f} {filas / t_paralelo:>10.0f}")
+    print("-" * 58)
+    print(f"Procesadores disponibles: {os.cpu_count()}")
+    print(f"Aceleración a igual archivo: x{t_anterior / t_chico:.0f}\n")
+
+    ok = True
+    with engine.connect() as conn:
+        anteriores = _productos_desde(conn, inicio_anterior)[:inicio_bloques - inicio_anterior]
+        en_bloques = _productos_desde(conn, inicio_bloques)[:inicio_grande - inicio_bloques]
+        if anteriores != en_bloques:
+            ok = False
+            print("✗ Los productos creados difieren del camino anterior")
+        if _productos_desde(conn, inicio_grande)[:inicio_paralelo - inicio_grande] != \
+                _productos_desde(conn, inicio_paralelo):
+            ok = False
+            print(f"✗ Los productos creados con {procesos} procesos difieren de los de un proceso")
+        descuadrados = conn.execute(text(
+            "SELECT COUNT(*) FROM productos p WHERE p.id >= :desde AND p.cantidad != "
+            "(SELECT COUNT(*) FROM stock_unidades u WHERE u.producto_id = p.id)"
+        ), {"desde": inicio_bloques}).scalar()
+        unidades = conn.execute(text(
+            "SELECT COUNT(*) FROM stock_unidades u JOIN productos p ON p.id = u.producto_id WHERE p.id >= :desde"
+        ), {"desde": inicio_bloques}).scalar()
+    if descuadrados:
+        ok = False
+        print(f"✗ {descuadrados} productos con cantidad distinta a sus unidades")
+    if unidades != filas_anterior + 2 * filas or resumen["fallidos"] or resumen_chico["fallidos"] \
+            or resumen_paralelo["fallidos"]:
+        ok = False
+        print(f"✗ Se esperaban {filas_anterior + 2 * filas} unidades y hay {unidades}")
+
+    engine.dispose()
+    if not ok:
+        sys.exit(1)
+    print(f"✓ {resumen_chico['productos_creados']} productos iguales al camino anterior; "
+          f"{unidades} unidades con códigos únicos y cantidades cuadradas; "
+          f"{procesos} procesos = 1 proceso")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Benchmark de la importación de Excel de stock: camino anterior (tres
+df.iterrows(), un agregar_producto_controller por producto, un SELECT de
+colisión y un INSERT por unidad) vs. el pipeline por columnas de
+stock/importacion.py (preparar_excel + EscritorImportacion).
+
+La planilla chica trae precio y margen en todas las filas, que es lo único
+que el camino anterior agrupaba bien, y se usa para verificar que ambos
+crean los mismos productos. La grande agrega precios o márgenes faltantes,
+filas inválidas, códigos vacíos, repetidos o ya cargados y fechas en
+distintos formatos; ahí se verifica que cada producto quede con tantas
+unidades como su cantidad.
+
+La lectura con pd.read_excel (openpyxl) se mide aparte: con 100k filas es
+la mayor parte del tiempo total.
+
+python -m aplicacion.backend.stock.bench_importacion_excel [filas] [filas_camino_anterior]
+"""
+import io
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from aplicacion.backend.database.base_temporal import DIRECTORIO, RUTA  # antes que database
+
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import func, insert, select, text
+
+from aplicacion.backend.database.database import crear_tablas, engine, SessionLocal, Producto, StockUnidad
+from aplicacion.backend.stock.codigos import asignador_codigos
+from aplicacion.backend.stock.controller import agregar_producto_controller
+from aplicacion.backend.stock.importacion import importar_excel, preparar_excel
+
+PALABRAS = ["yerba", "azucar", "arroz", "fideos", "aceite", "galletitas", "leche", "cafe", "harina",
+            "polenta", "lentejas", "jabon", "detergente", "queso", "salame", "mani", "pasas"]
+CODIGOS_EN_BASE = ["7790000000%03d" % i for i in range(50)]
+COLUMNAS_PRODUCTO = [Producto.nombre, Producto.unidad_medida, Producto.cantidad, Producto.costo_unitario,
+                     Producto.precio_venta, Producto.precio_redondeado, Producto.usa_redondeo,
+                     Producto.margen_ganancia, Producto.es_divisible, Producto.proveedor_id, Producto.categoria_id]
+
+
+def _planilla(cantidad, rnd, completa):
+    """
+    Filas de una planilla de stock: cada producto se repite en 1 a 6 filas.
+    Con completa=False faltan precios o márgenes y hay filas inválidas.
+    Devuelve (DataFrame, filas inválidas).
+    """
+    filas = []
+    invalidas = 0
+    while len(filas) < cantidad:
+        costo = round(rnd.uniform(50, 5000), 2)
+        margen = rnd.choice([0.25, 0.3, 0.35, 0.48])
+        producto = {
+            "nombre": " ".join(rnd.sample(PALABRAS, 2)).upper() + f" {rnd.randint(1, 9999)}",
+            "unidad_medida": rnd.choice(["unidad", "unidad", "unidad", "kg", "g"]),
+            "costo_unitario": costo,
+            "precio_venta": round(costo / (1 - margen), 2),
+            "margen_ganancia": margen,
+            "usa_redondeo": rnd.choice([True, False]),
+            "proveedor_id": rnd.choice([None, 1, 2, 3]),
+            "categoria_id": rnd.choice([None, 1, 2]),
+        }
+        if not completa:
+            r = rnd.random()
+            if r < 0.3:
+                producto["margen_ganancia"] = None
+            elif r < 0.6:
+                producto["precio_venta"] = None
+            elif r < 0.62:
+                producto["nombre"] = None
+            elif r < 0.64:
+                producto["costo_unitario"] = "sin dato"
+            elif r < 0.65:
+                producto["margen_ganancia"] = 1.2
+        repeticiones = rnd.randint(1, 6)
+        if not completa and (producto["nombre"] is None or producto["costo_unitario"] == "sin dato"
+                             or producto["margen_ganancia"] == 1.2):
+            invalidas += min(repeticiones, cantidad - len(filas))
+        for _ in range(repeticiones):
+            r = rnd.random()
+            if r < 0.3:
+                codigo = None
+            elif r < 0.33 and filas and filas[-1]["codigo_barras"]:
+                codigo = filas[-1]["codigo_barras"]              # repetido en el archivo
+            elif r < 0.35:
+                codigo = rnd.choice(CODIGOS_EN_BASE)              # ya cargado en la base
+            else:
+                codigo = "".join(rnd.choice("0123456789") for _ in range(13))
+            fecha = datetime(2026, rnd.randint(1, 12), rnd.randint(1, 28))
+            vencimiento = rnd.choice([None, fecha, fecha.strftime("%Y-%m-%d")])
+            filas.append(dict(producto, codigo_barras=codigo, fecha_vencimiento=vencimiento))
+    return pd.DataFrame(filas[:cantidad]), invalidas
+
+
+def convertir_a_float(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"No se pudo convertir a float: {valor}")
+
+
+def _clave_anterior(fila, precio_venta, margen_ganancia):
+    usa_redondeo = str(fila["usa_redondeo"]).strip().lower() == "true"
+    proveedor_id = int(fila["proveedor_id"]) if not pd.isna(fila["proveedor_id"]) else None
+    categoria_id = int(fila["categoria_id"]) if not pd.isna(fila["categoria_id"]) else None
+    precio_venta_r = round(precio_venta, 2) if precio_venta is not None else ""
+    margen_ganancia_r = round(margen_ganancia, 4) if margen_ganancia is not None else ""
+    clave = (f"{fila['nombre']}|{fila['unidad_medida']}|{convertir_a_float(fila['costo_unitario'])}|{usa_redondeo}|"
+             f"{proveedor_id}|{categoria_id}|{precio_venta_r}|{margen_ganancia_r}")
+    return clave, usa_redondeo, proveedor_id, categoria_id, precio_venta_r, margen_ganancia_r
+
+
+def _importar_por_fila(ruta):
+    """Reproducción del camino anterior: tres pasadas de iterrows, un controller por producto, SELECT + INSERT por unidad"""
+    df = pd.read_excel(ruta)
+
+    conteo = defaultdict(int)
+    for _, fila in df.iterrows():
+        precio = convertir_a_float(fila["precio_venta"]) if not pd.isna(fila["precio_venta"]) else None
+        margen = convertir_a_float(fila["margen_ganancia"]) if not pd.isna(fila["margen_ganancia"]) else None
+        conteo[_clave_anterior(fila, precio, margen)[0]] += 1
+
+    creados = {}
+    for _, fila in df.iterrows():
+        precio = convertir_a_float(fila["precio_venta"]) if not pd.isna(fila["precio_venta"]) else None
+        margen = convertir_a_float(fila["margen_ganancia"]) if not pd.isna(fila["margen_ganancia"]) else None
+        clave, usa_redondeo, proveedor_id, categoria_id, precio_r, margen_r = _clave_anterior(fila, precio, margen)
+        if clave not in creados:
+            creados[clave] = agregar_producto_controller({
+                "nombre": fila["nombre"],
+                "unidad_medida": fila["unidad_medida"],
+                "costo_unitario": convertir_a_float(fila["costo_unitario"]),
+                "precio_venta": precio_r if precio_r != "" else None,
+                "margen_ganancia": margen_r if margen_r != "" else None,
+                "usa_redondeo": usa_redondeo,
+                "proveedor_id": proveedor_id,
+                "categoria_id": categoria_id,
+                "cantidad": conteo[clave],
+            })
+
+    session = SessionLocal()
+    try:
+        fecha_actual = datetime.now().date()
+        for _, fila in df.iterrows():
+            precio = convertir_a_float(fila["precio_venta"]) if not pd.isna(fila["precio_venta"]) else None
+            margen = convertir_a_float(fila["margen_ganancia"]) if not pd.isna(fila["margen_ganancia"]) else None
+            producto = creados[_clave_anterior(fila, precio, margen)[0]]
+            codigo = str(fila["codigo_barras"]).strip()
+            if not codigo or session.execute(text("SELECT 1 FROM stock_unidades WHERE codigo_barras = :codigo"),
+                                             {"codigo": codigo}).first():
+                codigo = asignador_codigos.siguiente(session)
+            vencimiento = fila["fecha_vencimiento"]
+            vencimiento = vencimiento.date() if isinstance(vencimiento, pd.Timestamp) else None
+            session.execute(
+                text("INSERT INTO stock_unidades (producto_id, codigo_barras, fecha_ingreso, fecha_modificacion, "
+                     "fecha_vencimiento) VALUES (:p, :c, :f, :f, :v)"),
+                {"p": producto.id, "c": codigo, "f": fecha_actual, "v": vencimiento}
+            )
+        session.commit()
+    finally:
+        session.close()
+
+
+def _productos_desde(conn, primer_id):
+    return [tuple(fila) for fila in conn.execute(
+        select(*COLUMNAS_PRODUCTO).where(Producto.id >= primer_id).order_by(Producto.id)
+    )]
+
+
+def _siguiente_id():
+    with engine.connect() as conn:
+        return (conn.execute(select(func.max(Producto.id))).scalar() or 0) + 1
+
+
+def _medir(funcion, *args):
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    filas_anterior = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rnd = random.Random(7)
+    crear_tablas()
+    with engine.begin() as conn:
+        producto_id = conn.execute(insert(Producto).returning(Producto.id), [{"nombre": "EXISTENTE"}]).scalar()
+        conn.execute(insert(StockUnidad), [{"producto_id": producto_id, "codigo_barras": c, "estado": "activo"}
+                                           for c in CODIGOS_EN_BASE])
+
+    ruta_chica = os.path.join(DIRECTORIO, "stock_chico.xlsx")
+    ruta_grande = os.path.join(DIRECTORIO, "stock_grande.xlsx")
+    chica, _ = _planilla(filas_anterior, rnd, completa=True)
+    grande, invalidas = _planilla(filas, rnd, completa=False)
+    chica.to_excel(ruta_chica, index=False)
+    print(f"Escribiendo planilla de {filas} filas...")
+    grande.to_excel(ruta_grande, index=False)
+
+    print(f"Base temporal: {RUTA}\n")
+    print(f"{'Camino':<30} {'Filas':>8} {'Tiempo (s)':>11} {'Filas/s':>10}")
+    print("-" * 62)
+
+    inicio_anterior = _siguiente_id()
+    t_anterior, _ = _medir(_importar_por_fila, ruta_chica)
+    print(f"{'Anterior (iterrows)':<30} {filas_anterior:>8} {t_anterior:>11.2f} {filas_anterior / t_anterior:>10.0f}")
+
+    inicio_columnas = _siguiente_id()
+    t_chico, resumen_chico = _medir(importar_excel, ruta_chica)
+    print(f"{'Por columnas':<30} {filas_anterior:>8} {t_chico:>11.2f} {filas_anterior / t_chico:>10.0f}")
+
+    inicio_grande = _siguiente_id()
+    t_grande, resumen = _medir(importar_excel, ruta_grande)
+    print(f"{'Por columnas':<30} {filas:>8} {t_grande:>11.2f} {filas / t_grande:>10.0f}")
+
+    # Desglose de la planilla grande: lectura, preparación y el resto (escritura)
+    t_lectura, df = _medir(pd.read_excel, ruta_grande)
+    t_preparar, _ = _medir(preparar_excel, df)
+    print(f"{'  lectura (read_excel)':<30} {filas:>8} {t_lectura:>11.2f}")
+    print(f"{'  preparar_excel':<30} {filas:>8} {t_preparar:>11.2f}")
+    print(f"{'  escritura (aprox.)':<30} {filas:>8} {max(t_grande - t_lectura - t_preparar, 0):>11.2f}")
+    print("-" * 62)
+    print(f"Aceleración a igual planilla: x{t_anterior / t_chico:.0f}; "
+          f"camino anterior estimado para {filas} filas: {t_anterior * filas / filas_anterior / 60:.1f} min\n")
+
+    ok = True
+    with engine.connect() as conn:
+        anteriores = _productos_desde(conn, inicio_anterior)[:inicio_columnas - inicio_anterior]
+        por_columnas = _productos_desde(conn, inicio_columnas)[:inicio_grande - inicio_columnas]
+        if anteriores != por_columnas:
+            ok = False
+            print("✗ Los productos creados difieren del camino anterior")
+        descuadrados = conn.execute(text(
+            "SELECT COUNT(*) FROM productos p WHERE p.id >= :desde AND p.cantidad != "
+            "(SELECT COUNT(*) FROM stock_unidades u WHERE u.producto_id = p.id AND u.estado = 'activo')"
+        ), {"desde": inicio_columnas}).scalar()
+        unidades = conn.execute(text(
+            "SELECT COUNT(*) FROM stock_unidades u JOIN productos p ON p.id = u.producto_id WHERE p.id >= :desde"
+        ), {"desde": inicio_columnas}).scalar()
+    if descuadrados:
+        ok = False
+        print(f"✗ {descuadrados} productos con cantidad distinta a sus unidades activas")
+    esperadas = filas_anterior + filas - invalidas
+    if unidades != esperadas or resumen_chico["fallidos"] or resumen["fallidos"] != invalidas:
+        ok = False
+        print(f"✗ Se esperaban {esperadas} unidades y {invalidas} filas inválidas; "
+              f"hay {unidades} unidades y {resumen['fallidos']} fallidas")
+
+    engine.dispose()
+    if not ok:
+        sys.exit(1)
+    print(f"✓ {resumen_chico['productos_creados']} productos iguales al camino anterior; "
+          f"{unidades} unidades activas con cantidades cuadradas; {invalidas} filas inválidas rechazadas")
+
+
+if __name__ == "__main__":
+    main()
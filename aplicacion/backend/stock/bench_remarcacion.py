@@ -0,0 +1,146 @@
+"""
+Benchmark de remarcación de precios: camino anterior (un
+editar_producto_controller por producto) vs. remarcacion.py (arreglos de
+NumPy y un UPDATE executemany).
+
+Se arman dos categorías con los mismos productos (márgenes guardados o solo
+precio, con y sin redondeo). La primera se remarca producto por producto,
+la segunda en bloque, con la misma regla: +10% de costo conservando el
+margen. Verifica:
+
+- que cada valor nuevo sea igual al de calcular_precio_con_margen /
+  redondear_precio aplicados producto por producto;
+- que en los productos con redondeo ambos caminos guarden lo mismo;
+- que la base quede con los valores de la vista previa.
+
+python -m aplicacion.backend.stock.bench_remarcacion [productos] [productos_camino_anterior]
+"""
+import io
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from sqlalchemy import insert, select
+
+from aplicacion.backend.database.database import crear_tablas, engine, Producto
+from aplicacion.backend.stock.controller import editar_producto_controller
+from aplicacion.backend.stock.remarcacion import aplicar_remarcacion, planificar_remarcacion
+from aplicacion.backend.stock.utils import calcular_margen_con_precio, calcular_precio_con_margen, redondear_precio
+
+AUMENTO = 0.10
+COLUMNAS = [Producto.costo_unitario, Producto.margen_ganancia, Producto.precio_venta, Producto.precio_redondeado]
+
+
+def _productos(cantidad, rnd):
+    productos = []
+    for i in range(cantidad):
+        costo = round(rnd.uniform(50, 5000), 2)
+        margen = rnd.choice([0.2, 0.25, 0.3, 0.35, 0.4])
+        precio = costo / (1 - margen)
+        usa_redondeo = rnd.random() < 0.7
+        productos.append({
+            "nombre": f"PRODUCTO {i}",
+            "unidad_medida": "unidad",
+            "cantidad": 10,
+            "costo_unitario": costo,
+            "margen_ganancia": margen if rnd.random() < 0.9 else None,   # algunos solo con precio
+            "precio_venta": precio,
+            "precio_redondeado": redondear_precio(precio) if usa_redondeo else precio,
+            "usa_redondeo": usa_redondeo,
+        })
+    return productos
+
+
+def _esperado(producto):
+    """Regla aplicada producto por producto con las funciones de utils"""
+    margen = producto["margen_ganancia"]
+    if margen is None:
+        margen = calcular_margen_con_precio(producto["costo_unitario"], producto["precio_venta"])
+    costo = producto["costo_unitario"] * (1 + AUMENTO)
+    precio = calcular_precio_con_margen(costo, margen)
+    return (costo, margen, precio, redondear_precio(precio) if producto["usa_redondeo"] else precio)
+
+
+def _remarcar_por_producto(ids, productos):
+    for pid, producto in zip(ids, productos):
+        margen = producto["margen_ganancia"]
+        if margen is None:
+            margen = calcular_margen_con_precio(producto["costo_unitario"], producto["precio_venta"])
+        editar_producto_controller(pid, {"costo_unitario": producto["costo_unitario"] * (1 + AUMENTO),
+                                         "margen_ganancia": margen})
+
+
+def _valores(ids):
+    with engine.connect() as conn:
+        filas = {pid: tuple(resto) for pid, *resto in conn.execute(
+            select(Producto.id, *COLUMNAS).where(Producto.id.in_(ids)))}
+    return [filas[pid] for pid in ids]
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    cantidad_anterior = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rnd = random.Random(5)
+    crear_tablas()
+    productos = _productos(cantidad, rnd)
+    with engine.begin() as conn:
+        ids_anterior = conn.execute(insert(Producto).returning(Producto.id, sort_by_parameter_order=True),
+                                    [dict(p, categoria_id=1) for p in productos[:cantidad_anterior]]).scalars().all()
+        ids_bloque = conn.execute(insert(Producto).returning(Producto.id, sort_by_parameter_order=True),
+                                  [dict(p, categoria_id=2) for p in productos]).scalars().all()
+
+    print(f"Base temporal: {RUTA}\n")
+    print(f"{'Camino':<30} {'Productos':>10} {'Tiempo (s)':>11} {'Productos/s':>12}")
+    print("-" * 66)
+
+    inicio = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        _remarcar_por_producto(ids_anterior, productos[:cantidad_anterior])
+    t_anterior = time.perf_counter() - inicio
+    print(f"{'Anterior (por producto)':<30} {cantidad_anterior:>10} {t_anterior:>11.2f} "
+          f"{cantidad_anterior / t_anterior:>12.0f}")
+
+    inicio = time.perf_counter()
+    plan = planificar_remarcacion(categoria_id=2, aumento_costo=AUMENTO)
+    t_plan = time.perf_counter() - inicio
+    with redirect_stdout(io.StringIO()):
+        resultado = aplicar_remarcacion(plan, exportar=False)
+    t_bloque = time.perf_counter() - inicio
+    print(f"{'  vista previa':<30} {cantidad:>10} {t_plan:>11.2f}")
+    print(f"{'Vectorizado + executemany':<30} {cantidad:>10} {t_bloque:>11.2f} {cantidad / t_bloque:>12.0f}")
+    print("-" * 66)
+    print(f"Aceleración por producto: x{(t_anterior / cantidad_anterior) / (t_bloque / cantidad):.0f}\n")
+
+    ok = True
+    esperados = [_esperado(p) for p in productos]
+    en_base = _valores(ids_bloque)
+    if en_base != esperados:
+        distintos = sum(a != b for a, b in zip(en_base, esperados))
+        ok = False
+        print(f"✗ {distintos} productos difieren de calcular_precio_con_margen / redondear_precio")
+    if resultado["actualizados"] != cantidad or plan["omitidos"]:
+        ok = False
+        print(f"✗ Se actualizaron {resultado['actualizados']} de {cantidad}")
+    vista = [(c["costo_despues"], c["margen_despues"], c["precio_despues"], c["redondeado_despues"])
+             for c in plan["cambios"]]
+    if vista != en_base:
+        ok = False
+        print("✗ La base no quedó con los valores de la vista previa")
+    anterior = _valores(ids_anterior)
+    con_redondeo = [i for i, p in enumerate(productos[:cantidad_anterior]) if p["usa_redondeo"]]
+    if [anterior[i] for i in con_redondeo] != [en_base[i] for i in con_redondeo]:
+        ok = False
+        print("✗ Con redondeo, el camino anterior y el vectorizado guardan valores distintos")
+
+    engine.dispose()
+    if not ok:
+        sys.exit(1)
+    print(f"✓ {cantidad} productos iguales a las funciones de utils; "
+          f"{len(con_redondeo)} con redondeo iguales al camino anterior")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark del guardado de unidades de AgregarProductoDialog: camino anterior
+(un agregar_unidad_controller por unidad, cada uno con su sesión, commit y
+refresh) vs. crear_unidades_bulk (una transacción, INSERT de varias filas
+por lote).
+
+Verifica que se creen todas las unidades, que queden en el índice de
+códigos y que un código ya registrado deshaga el lote entero. Con
+crear_producto_con_unidades (el guardado del diálogo) un código ya
+registrado o una cancelación no dejan ni el producto.
+
+python -m aplicacion.backend.stock.bench_unidades_bulk [unidades] [unidades_existentes]
+"""
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from sqlalchemy import insert, func
+
+from aplicacion.backend.database.database import crear_tablas, engine, SessionLocal, Producto, StockUnidad
+from aplicacion.backend.stock import controller
+from aplicacion.backend.stock.indice_codigos import indice_codigos
+from aplicacion.backend.stock.utils import fecha_actual_iso
+
+
+def _guardar_por_unidad(producto_id, unidades):
+    """Reproducción del guardado anterior del diálogo: un controller por unidad"""
+    ahora = fecha_actual_iso()
+    for unidad in unidades:
+        controller.agregar_unidad_controller({
+            "producto_id": producto_id,
+            "codigo_barras": unidad["codigo_barras"],
+            "estado": "activo",
+            "fecha_ingreso": ahora,
+            "fecha_modificacion": ahora,
+            "observaciones": "",
+            "fecha_vencimiento": unidad["fecha_vencimiento"],
+        })
+
+
+def _guardar_en_bloque(producto_id, unidades):
+    controller.agregar_unidades_bulk_controller(producto_id, unidades, observaciones="")
+
+
+def _crear_producto(nombre):
+    session = SessionLocal()
+    try:
+        producto = Producto(nombre=nombre, unidad_medida="unidad", cantidad=0, es_divisible=False)
+        session.add(producto)
+        session.commit()
+        return producto.id
+    finally:
+        session.close()
+
+
+def _productos_llamados(nombre):
+    session = SessionLocal()
+    try:
+        return session.query(func.count(Producto.id)).filter(Producto.nombre == nombre).scalar()
+    finally:
+        session.close()
+
+
+def _cancelar(hechas, total):
+    raise RuntimeError("Guardado cancelado")
+
+
+def _contar_unidades(producto_id):
+    session = SessionLocal()
+    try:
+        return session.query(func.count(StockUnidad.id)).filter(StockUnidad.producto_id == producto_id).scalar()
+    finally:
+        session.close()
+
+
+def _unidades(prefijo, cantidad):
+    return [
+        {"codigo_barras": f"{prefijo}{n:010d}", "fecha_vencimiento": "2027-03-01" if n % 3 else None}
+        for n in range(cantidad)
+    ]
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    existentes = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+    crear_tablas()
+    pid = _crear_producto("EXISTENTE")
+    with engine.begin() as conn:
+        conn.execute(insert(StockUnidad), [
+            {"producto_id": pid, "codigo_barras": f"P{n:012d}", "estado": "activo"} for n in range(existentes)
+        ])
+    indice_codigos.cargar()
+    print(f"Base temporal: {RUTA}")
+    print(f"Guardado de {cantidad} unidades con {existentes} unidades ya cargadas\n")
+
+    tiempos = {}
+    ok = True
+    for prefijo, (nombre, funcion) in zip(("A", "B"), (("Una unidad por commit", _guardar_por_unidad),
+                                                        ("crear_unidades_bulk", _guardar_en_bloque))):
+        producto_id = _crear_producto(nombre)
+        unidades = _unidades(prefijo, cantidad)
+        inicio = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            funcion(producto_id, unidades)
+        tiempos[nombre] = time.perf_counter() - inicio
+        creadas = _contar_unidades(producto_id)
+        if creadas != cantidad or not indice_codigos.buscar(unidades[-1]["codigo_barras"]):
+            ok = False
+            print(f"✗ {nombre}: se crearon {creadas} unidades")
+
+    # Un código repetido con la base deshace todo el lote
+    producto_id = _crear_producto("REPETIDO")
+    try:
+        with redirect_stdout(io.StringIO()):
+            _guardar_en_bloque(producto_id, _unidades("C", cantidad) + [{"codigo_barras": "P000000000001"}])
+        ok = False
+        print("✗ Se aceptó un código ya registrado")
+    except ValueError:
+        if _contar_unidades(producto_id):
+            ok = False
+            print("✗ Un lote con un código repetido dejó unidades a medias")
+
+    # Producto y unidades juntos: solo queda el que se guardó completo
+    datos = {"nombre": "NUEVO", "unidad_medida": "unidades", "cantidad": cantidad}
+    with redirect_stdout(io.StringIO()):
+        producto, creadas = controller.agregar_producto_con_unidades_controller(dict(datos), _unidades("D", cantidad))
+        for unidades, al_avanzar in (([{"codigo_barras": "P000000000002"}] + _unidades("E", cantidad), None),
+                                     (_unidades("F", cantidad), _cancelar)):
+            try:
+                controller.agregar_producto_con_unidades_controller(dict(datos), unidades, al_avanzar=al_avanzar)
+            except (ValueError, RuntimeError):
+                pass
+    if len(creadas) != cantidad or _contar_unidades(producto.id) != cantidad:
+        ok = False
+        print(f"✗ crear_producto_con_unidades creó {len(creadas)} unidades")
+    if _productos_llamados("NUEVO") != 1:
+        ok = False
+        print(f"✗ Un código repetido o una cancelación dejaron el producto sin unidades "
+              f"({_productos_llamados('NUEVO')} productos NUEVO)")
+
+    print(f"{'Camino':<28} {'Tiempo (s)':>12} {'Unidades/s':>12}")
+    print("-" * 54)
+    for nombre, segundos in tiempos.items():
+        print(f"{nombre:<28} {segundos:>12.3f} {cantidad / segundos:>12.0f}")
+    print("-" * 54)
+    anterior, bloque = tiempos.values()
+    print(f"Aceleración: x{anterior / bloque:.1f}")
+    engine.dispose()
+    if not ok:
+        sys.exit(1)
+    print("✓ Unidades completas, registradas en el índice y lote con código repetido deshecho; "
+          "producto y unidades se guardan o se deshacen juntos")
+
+
+if __name__ == "__main__":
+    main()
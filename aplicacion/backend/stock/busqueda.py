@@ -0,0 +1,148 @@
+"""
+Búsqueda de productos por texto con un índice FTS5 de SQLite.
+
+La tabla virtual productos_fts (rowid = productos.id) guarda nombre,
+proveedor y categoría de cada producto. La mantienen sincronizada triggers
+sobre productos, proveedores y stock_clasificacion (los crea la migración 3),
+así que cualquier alta, edición o baja —desde la interfaz, el importador o
+SQL directo— queda indexada sin pasar por Python.
+
+El tokenizer unicode61 con remove_diacritics 2 pliega mayúsculas y acentos
+igual que importer.normalizar_texto / catalogo.tokens_nombre (NFKD sin
+marcas combinantes), y la consulta se arma con esos mismos tokens:
+"cafe molido" busca los productos que tengan palabras que empiecen con
+"cafe" Y con "molido" en cualquiera de los tres campos, ordenados por bm25
+(el nombre pesa más que la categoría y el proveedor).
+
+Si la base no tiene FTS5 se cae a un LIKE sobre el nombre.
+"""
+from __future__ import annotations
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from aplicacion.backend.database.database import engine
+from aplicacion.backend.stock.catalogo import catalogo, tokens_nombre
+
+# Pesos bm25 por columna: nombre, proveedor, categoria
+PESOS = (10.0, 1.0, 2.0)
+
+_SQL_TABLA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5("
+    "nombre, proveedor, categoria, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+_SQL_PROVEEDOR = "(SELECT nombre FROM proveedores WHERE id = new.proveedor_id)"
+_SQL_CATEGORIA = "(SELECT nombre FROM stock_clasificacion WHERE id = new.categoria_id)"
+
+_SQL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS productos_fts_alta AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts (rowid, nombre, proveedor, categoria)
+        VALUES (new.id, new.nombre, {_SQL_PROVEEDOR}, {_SQL_CATEGORIA});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS productos_fts_edicion
+    AFTER UPDATE OF nombre, proveedor_id, categoria_id ON productos BEGIN
+        DELETE FROM productos_fts WHERE rowid = old.id;
+        INSERT INTO productos_fts (rowid, nombre, proveedor, categoria)
+        VALUES (new.id, new.nombre, {_SQL_PROVEEDOR}, {_SQL_CATEGORIA});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_baja AFTER DELETE ON productos BEGIN
+        DELETE FROM productos_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_proveedor AFTER UPDATE OF nombre ON proveedores BEGIN
+        UPDATE productos_fts SET proveedor = new.nombre
+        WHERE rowid IN (SELECT id FROM productos WHERE proveedor_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_categoria AFTER UPDATE OF nombre ON stock_clasificacion BEGIN
+        UPDATE productos_fts SET categoria = new.nombre
+        WHERE rowid IN (SELECT id FROM productos WHERE categoria_id = new.id);
+    END
+    """,
+]
+
+_SQL_POBLAR = """
+    INSERT INTO productos_fts (rowid, nombre, proveedor, categoria)
+    SELECT p.id, p.nombre, pr.nombre, c.nombre
+    FROM productos p
+    LEFT JOIN proveedores pr ON pr.id = p.proveedor_id
+    LEFT JOIN stock_clasificacion c ON c.id = p.categoria_id
+"""
+
+
+def crear_indice_busqueda(conn) -> bool:
+    """Crea productos_fts, sus triggers y la llena desde productos. False si SQLite no tiene FTS5"""
+    try:
+        conn.exec_driver_sql(_SQL_TABLA)
+    except OperationalError as e:
+        print(f"[WARN] FTS5 no disponible, la búsqueda de productos usa LIKE: {e}")
+        return False
+    for sql in _SQL_TRIGGERS:
+        conn.exec_driver_sql(sql)
+    reconstruir_indice(conn)
+    return True
+
+
+def reconstruir_indice(conn):
+    """Vuelve a llenar productos_fts desde productos (por ejemplo tras restaurar una base)"""
+    conn.exec_driver_sql("DELETE FROM productos_fts")
+    conn.exec_driver_sql(_SQL_POBLAR)
+
+
+def consulta_fts(texto: str) -> Optional[str]:
+    """Expresión MATCH: cada token plegado como prefijo, todos obligatorios"""
+    tokens = tokens_nombre(texto)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def buscar_ids(texto: str, limite: Optional[int] = 50) -> List[int]:
+    """Ids de productos que coinciden con `texto`, del más al menos relevante"""
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+
+    sql = (
+        "SELECT rowid FROM productos_fts WHERE productos_fts MATCH :consulta "
+        f"ORDER BY bm25(productos_fts, {PESOS[0]}, {PESOS[1]}, {PESOS[2]})"
+    )
+    if limite:
+        sql += f" LIMIT {int(limite)}"
+    try:
+        with engine.connect() as conn:
+            return [fila[0] for fila in conn.execute(text(sql), {"consulta": consulta})]
+    except OperationalError:
+        return _buscar_ids_like(texto, limite)
+
+
+def _buscar_ids_like(texto: str, limite: Optional[int]) -> List[int]:
+    """Respaldo sin FTS5: cada palabra contenida en el nombre (sin plegar acentos)"""
+    palabras = str(texto or "").lower().split()
+    condiciones = " AND ".join(f"lower(nombre) LIKE :p{i}" for i in range(len(palabras)))
+    sql = f"SELECT id FROM productos WHERE {condiciones} ORDER BY nombre"
+    if limite:
+        sql += f" LIMIT {int(limite)}"
+    with engine.connect() as conn:
+        return [fila[0] for fila in conn.execute(
+            text(sql), {f"p{i}": f"%{palabra}%" for i, palabra in enumerate(palabras)}
+        )]
+
+
+def buscar_productos(texto: str, limite: Optional[int] = 50) -> List[Dict[str, Any]]:
+    """Productos (formato stock.json, desde el catálogo en memoria) ordenados por relevancia"""
+    productos = []
+    for pid in buscar_ids(texto, limite):
+        producto = catalogo.obtener_producto(pid)
+        if producto:
+            productos.append(producto)
+    return productos
@@ -0,0 +1,172 @@
+"""
+Catálogo en memoria compartido por todas las pestañas.
+
+VentasTab, ProductosScreen y la pantalla de categorías leían y parseaban
+stock.json / categorias.json cada una por su cuenta (VentasTab incluso con
+pausas para "verificar estabilidad" del archivo). Acá se mantienen
+productos, categorías y proveedores en memoria por id, con índices por
+token de nombre y por categoría. Los productos se actualizan aplicando los
+cambios del snapshot incremental (stock/snapshot.py), sin releer disco.
+
+Cada vez que el catálogo cambia se publica CATALOGO_ACTUALIZADO en el bus
+de eventos; las pestañas se suscriben en lugar de releer archivos.
+"""
+from __future__ import annotations
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set
+
+from aplicacion.backend.eventos.bus import bus, CATALOGO_ACTUALIZADO
+from aplicacion.backend.stock.snapshot import snapshot_stock
+from aplicacion.backend.stock.crud import obtener_categorias_json, obtener_proveedores_json
+
+
+def tokens_nombre(texto) -> List[str]:
+    """Palabras en minúscula y sin acentos"""
+    if not texto:
+        return []
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    texto = "".join(c if c.isalnum() else " " for c in texto if not unicodedata.combining(c))
+    return texto.split()
+
+
+class CatalogoCache:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._productos: Dict[int, Dict[str, Any]] = {}
+        self._categorias: Dict[int, Dict[str, Any]] = {}
+        self._proveedores: Dict[int, Dict[str, Any]] = {}
+        self._por_token: Dict[str, Set[int]] = defaultdict(set)
+        self._por_categoria: Dict[str, Set[int]] = defaultdict(set)
+        self._version = -1
+        self._cargado = False
+
+    # ---------------- índices ----------------
+    def _indexar(self, producto: Dict[str, Any]):
+        pid = producto["id"]
+        for token in set(tokens_nombre(producto.get("nombre"))):
+            self._por_token[token].add(pid)
+        self._por_categoria[str(producto.get("categoria") or "").lower()].add(pid)
+
+    def _desindexar(self, pid: int):
+        anterior = self._productos.get(pid)
+        if not anterior:
+            return
+        for token in set(tokens_nombre(anterior.get("nombre"))):
+            ids = self._por_token.get(token)
+            if ids:
+                ids.discard(pid)
+                if not ids:
+                    del self._por_token[token]
+        clave = str(anterior.get("categoria") or "").lower()
+        ids = self._por_categoria.get(clave)
+        if ids:
+            ids.discard(pid)
+            if not ids:
+                del self._por_categoria[clave]
+
+    # ---------------- sincronización ----------------
+    def _cargar(self):
+        self._productos = {}
+        self._por_token = defaultdict(set)
+        self._por_categoria = defaultdict(set)
+        for producto in snapshot_stock.productos():
+            self._productos[producto["id"]] = producto
+            self._indexar(producto)
+        self._version = snapshot_stock.version
+        self._categorias = {c["id"]: c for c in obtener_categorias_json()}
+        self._proveedores = {p["id"]: p for p in obtener_proveedores_json()}
+        self._cargado = True
+
+    def _asegurar_cargado(self):
+        if not self._cargado:
+            self._cargar()
+
+    def _aplicar_productos(self) -> Dict[str, List[int]]:
+        cambios = snapshot_stock.cambios_desde(self._version)
+        if cambios["completo"]:
+            anteriores = set(self._productos)
+            self._productos = {}
+            self._por_token = defaultdict(set)
+            self._por_categoria = defaultdict(set)
+            for producto in snapshot_stock.productos():
+                self._productos[producto["id"]] = producto
+                self._indexar(producto)
+            self._version = cambios["version"]
+            return {"productos": sorted(self._productos), "eliminados": sorted(anteriores - set(self._productos))}
+
+        for pid in cambios["eliminados"]:
+            self._desindexar(pid)
+            self._productos.pop(pid, None)
+        for producto in cambios["upsert"]:
+            self._desindexar(producto["id"])
+            self._productos[producto["id"]] = producto
+            self._indexar(producto)
+        self._version = cambios["version"]
+        return {"productos": [p["id"] for p in cambios["upsert"]], "eliminados": cambios["eliminados"]}
+
+    def refrescar(self, productos: bool = True, categorias: bool = False, proveedores: bool = False):
+        """
+        Trae los cambios y avisa a los suscriptores con CATALOGO_ACTUALIZADO:
+        {"productos": [ids], "eliminados": [ids], "categorias": bool, "proveedores": bool}
+        """
+        with self._lock:
+            if not self._cargado:
+                self._cargar()
+                aviso = {"productos": sorted(self._productos), "eliminados": [],
+                         "categorias": True, "proveedores": True}
+            else:
+                aviso = {"productos": [], "eliminados": [], "categorias": categorias, "proveedores": proveedores}
+                if productos:
+                    aviso.update(self._aplicar_productos())
+                if categorias:
+                    self._categorias = {c["id"]: c for c in obtener_categorias_json()}
+                if proveedores:
+                    self._proveedores = {p["id"]: p for p in obtener_proveedores_json()}
+
+        if aviso["productos"] or aviso["eliminados"] or aviso["categorias"] or aviso["proveedores"]:
+            bus.publicar(CATALOGO_ACTUALIZADO, aviso)
+
+    # ---------------- consultas ----------------
+    def listar_productos(self) -> List[Dict[str, Any]]:
+        """Productos ordenados por id, en el mismo formato que stock.json (no modificar los dict)"""
+        with self._lock:
+            self._asegurar_cargado()
+            return [self._productos[pid] for pid in sorted(self._productos)]
+
+    def obtener_producto(self, producto_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._asegurar_cargado()
+            return self._productos.get(producto_id)
+
+    def productos_por_categoria(self, categoria: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._asegurar_cargado()
+            ids = self._por_categoria.get(str(categoria or "").lower(), set())
+            return [self._productos[pid] for pid in sorted(ids)]
+
+    def buscar_por_tokens(self, texto: str) -> List[Dict[str, Any]]:
+        """Productos cuyo nombre contiene todas las palabras de `texto` (palabras completas)"""
+        tokens = tokens_nombre(texto)
+        if not tokens:
+            return []
+        with self._lock:
+            self._asegurar_cargado()
+            conjuntos = sorted((self._por_token.get(t, set()) for t in tokens), key=len)
+            ids = set(conjuntos[0]).intersection(*conjuntos[1:])
+            return [self._productos[pid] for pid in sorted(ids)]
+
+    def listar_categorias(self, solo_activas: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._asegurar_cargado()
+            return [c for c in self._categorias.values() if c.get("activa") or not solo_activas]
+
+    def listar_proveedores(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._asegurar_cargado()
+            return list(self._proveedores.values())
+
+
+# Instancia compartida por todo el proceso
+catalogo = CatalogoCache()
@@ -0,0 +1,147 @@
+"""
+Asignación de códigos de barras EAN-13 internos.
+
+Los códigos se arman como prefijo + contador + dígito verificador:
+
+    20 0000001234 5
+    |  |          └ dígito verificador EAN-13
+    |  └ contador (12 - len(prefijo) dígitos, con ceros a la izquierda)
+    └ prefijo del local (20-29 es el rango GS1 de circulación interna)
+
+El contador es monótono y se guarda en configuracion_sistema
+(nombre='codigos_contador'); el prefijo en nombre='codigos_prefijo'. Reservar
+códigos es un solo UPDATE ... RETURNING que adelanta el contador, sin buscar
+en stock_unidades, así que cuesta lo mismo con 100 o con un millón de unidades.
+
+- reservar(n) sin sesión: toma los códigos de un bloque reservado en memoria
+  (un UPDATE cada `tamano_bloque` códigos, en una transacción propia). Los
+  códigos de un bloque que no se llegan a usar se pierden al cerrar el
+  programa; quedan huecos en la numeración, nunca repetidos.
+- reservar(n, session): adelanta el contador dentro de la transacción de quien
+  llama. Es para quien ya está escribiendo (SQLite admite un solo escritor, otra
+  transacción esperaría el lock) y hace que un rollback devuelva también los
+  códigos.
+
+Los códigos aleatorios generados antes de este esquema no siguen la
+numeración; la chance de que uno coincida con un código nuevo es despreciable
+y el índice único de stock_unidades lo rechazaría igual.
+"""
+from __future__ import annotations
+import threading
+from typing import List, Optional
+
+from sqlalchemy import Integer, String, cast, insert, literal, select, update, exists
+from sqlalchemy.orm import Session
+
+from aplicacion.backend.database.database import engine, ConfiguracionSistema
+
+CLAVE_PREFIJO = "codigos_prefijo"
+CLAVE_CONTADOR = "codigos_contador"
+PREFIJO_POR_DEFECTO = "20"
+
+
+def digito_verificador_ean13(doce_digitos: str) -> str:
+    """Dígito verificador de los primeros 12 dígitos (pesos 1 y 3 alternados desde la izquierda)"""
+    if len(doce_digitos) != 12 or not doce_digitos.isdigit():
+        raise ValueError(f"Se esperaban 12 dígitos: {doce_digitos!r}")
+    suma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(doce_digitos))
+    return str((10 - suma % 10) % 10)
+
+
+def es_ean13_valido(codigo: str) -> bool:
+    codigo = str(codigo or "")
+    return len(codigo) == 13 and codigo.isdigit() and digito_verificador_ean13(codigo[:12]) == codigo[12]
+
+
+def validar_prefijo(prefijo: str) -> str:
+    prefijo = str(prefijo or "").strip()
+    if not prefijo.isdigit() or not 1 <= len(prefijo) <= 6:
+        raise ValueError("El prefijo debe tener entre 1 y 6 dígitos")
+    return prefijo
+
+
+def armar_codigo(prefijo: str, numero: int) -> str:
+    digitos = 12 - len(prefijo)
+    if numero >= 10 ** digitos:
+        raise ValueError(f"Se agotaron los códigos del prefijo {prefijo}")
+    base = f"{prefijo}{numero:0{digitos}d}"
+    return base + digito_verificador_ean13(base)
+
+
+def _asegurar_fila(conn, nombre: str, valor: str):
+    conn.execute(
+        insert(ConfiguracionSistema).from_select(
+            ["nombre", "valor"],
+            select(literal(nombre), literal(valor)).where(
+                ~exists().where(ConfiguracionSistema.nombre == nombre)
+            )
+        )
+    )
+
+
+def _adelantar_contador(conn, cantidad: int) -> tuple:
+    """Adelanta el contador `cantidad` lugares: (prefijo, primer número reservado)"""
+    _asegurar_fila(conn, CLAVE_PREFIJO, PREFIJO_POR_DEFECTO)
+    _asegurar_fila(conn, CLAVE_CONTADOR, "0")
+    nuevo_valor = conn.execute(
+        update(ConfiguracionSistema)
+        .where(ConfiguracionSistema.nombre == CLAVE_CONTADOR)
+        .values(valor=cast(cast(ConfiguracionSistema.valor, Integer) + cantidad, String))
+        .returning(ConfiguracionSistema.valor)
+    ).scalars().first()
+    prefijo = conn.execute(
+        select(ConfiguracionSistema.valor).where(ConfiguracionSistema.nombre == CLAVE_PREFIJO)
+    ).scalars().first()
+    return validar_prefijo(prefijo), int(nuevo_valor) - cantidad + 1
+
+
+class AsignadorCodigos:
+    def __init__(self, tamano_bloque: int = 100):
+        self.tamano_bloque = tamano_bloque
+        self._lock = threading.Lock()
+        self._prefijo: Optional[str] = None
+        self._siguiente = 0
+        self._limite = 0   # exclusivo
+
+    def reservar(self, cantidad: int, session: Optional[Session] = None) -> List[str]:
+        """Reserva `cantidad` códigos nuevos, en orden"""
+        if cantidad <= 0:
+            return []
+        if session is not None:
+            prefijo, inicio = _adelantar_contador(session, cantidad)
+            return [armar_codigo(prefijo, n) for n in range(inicio, inicio + cantidad)]
+
+        with self._lock:
+            codigos = []
+            while len(codigos) < cantidad:
+                if self._siguiente >= self._limite:
+                    bloque = max(self.tamano_bloque, cantidad - len(codigos))
+                    with engine.begin() as conn:
+                        self._prefijo, self._siguiente = _adelantar_contador(conn, bloque)
+                    self._limite = self._siguiente + bloque
+                tomar = min(cantidad - len(codigos), self._limite - self._siguiente)
+                codigos.extend(armar_codigo(self._prefijo, n)
+                               for n in range(self._siguiente, self._siguiente + tomar))
+                self._siguiente += tomar
+            return codigos
+
+    def siguiente(self, session: Optional[Session] = None) -> str:
+        return self.reservar(1, session)[0]
+
+    def configurar_prefijo(self, prefijo: str):
+        """Cambia el prefijo de los códigos nuevos (el contador sigue desde donde estaba)"""
+        prefijo = validar_prefijo(prefijo)
+        with self._lock:
+            with engine.begin() as conn:
+                _asegurar_fila(conn, CLAVE_PREFIJO, prefijo)
+                conn.execute(
+                    update(ConfiguracionSistema)
+                    .where(ConfiguracionSistema.nombre == CLAVE_PREFIJO)
+                    .values(valor=prefijo)
+                )
+            # descartar el bloque en memoria, que tenía el prefijo anterior
+            self._siguiente = self._limite = 0
+
+
+# Instancia compartida por todo el proceso
+asignador_codigos = AsignadorCodigos()
@@ -0,0 +1,223 @@
+"""
+Conciliación entre productos.cantidad y las unidades activas de stock_unidades.
+
+En los productos por unidad (no divisibles) la cantidad debería coincidir
+con la cantidad de unidades activas, pero cada camino las mantiene a mano
+(agregar_stock, ventas por código o por ID de producto, cancelar_ultima_venta,
+purga de vencidos) y con el tiempo se separan; típicamente una venta por ID
+de producto descuenta la cantidad sin inactivar ninguna unidad.
+
+conciliar_stock() encuentra todas las diferencias con una sola consulta
+agrupada. Con corregir=True toma productos.cantidad como referencia (es lo
+que descuentan todas las ventas) y, en una transacción:
+
+- inactiva las unidades que sobran, empezando por las que vencen antes y
+  después por las más viejas, con un único UPDATE sobre una numeración por
+  producto (ROW_NUMBER);
+- crea las unidades que faltan, con códigos del asignador y un único INSERT.
+
+Reemplaza a la limpieza de unidades fantasma que se hacía después de cada
+venta: una pasada sobre la tabla al iniciar y cada INTERVALO_MINUTOS. Como
+aquella limpieza, la pasada automática solo inactiva sobrantes; las unidades
+faltantes (por ejemplo de un alta cuyo guardado de unidades se canceló)
+quedan en el log y se crean únicamente con --corregir o
+conciliar_stock_controller(corregir=True).
+
+python -m aplicacion.backend.stock.conciliacion [--corregir]
+"""
+from __future__ import annotations
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Any, List
+
+from sqlalchemy import Integer, and_, cast, func, insert, or_, select, update
+from sqlalchemy.orm import sessionmaker
+
+from aplicacion.backend.database.database import engine, Producto, StockUnidad
+from aplicacion.backend.stock.codigos import asignador_codigos
+from aplicacion.backend.stock.indice_codigos import indice_codigos
+
+Session = sessionmaker(bind=engine)
+
+# Cada cuánto corre la conciliación automática
+INTERVALO_MINUTOS = 30
+
+_activa = and_(StockUnidad.producto_id == Producto.id, StockUnidad.estado == "activo")
+_por_unidad = and_(
+    or_(Producto.es_divisible == None, Producto.es_divisible == False),
+    or_(Producto.unidad_medida == None, Producto.unidad_medida != "kilogramos")
+)
+# Unidades que debería tener cada producto: la parte entera de su cantidad, nunca negativa
+_objetivo = func.max(0, cast(func.coalesce(Producto.cantidad, 0), Integer))
+
+
+def _diferencias(session) -> List[Dict[str, Any]]:
+    """Productos por unidad cuya cantidad no coincide con sus unidades activas (un GROUP BY)"""
+    activas = func.count(StockUnidad.id)
+    filas = session.execute(
+        select(Producto.id, Producto.nombre, Producto.cantidad, _objetivo, activas)
+        .outerjoin(StockUnidad, _activa)
+        .where(_por_unidad)
+        .group_by(Producto.id)
+        .having(_objetivo != activas)
+        .order_by(Producto.id)
+    ).all()
+    return [
+        {
+            "producto_id": producto_id,
+            "nombre": nombre,
+            "cantidad": cantidad or 0,
+            "unidades_activas": unidades,
+            "diferencia": unidades - objetivo,   # > 0 sobran unidades, < 0 faltan
+        }
+        for producto_id, nombre, cantidad, objetivo, unidades in filas
+    ]
+
+
+def _inactivar_sobrantes(session, ahora: str) -> int:
+    """Inactiva las unidades activas por encima de la cantidad de cada producto"""
+    numeradas = (
+        select(
+            StockUnidad.id.label("id"),
+            func.row_number().over(
+                partition_by=StockUnidad.producto_id,
+                order_by=(StockUnidad.fecha_vencimiento.is_(None), StockUnidad.fecha_vencimiento, StockUnidad.id)
+            ).label("orden"),
+            func.count(StockUnidad.id).over(partition_by=StockUnidad.producto_id).label("activas"),
+            _objetivo.label("objetivo"),
+        )
+        .join(Producto, _activa)
+        .where(_por_unidad)
+        .subquery()
+    )
+    sobrantes = select(numeradas.c.id).where(numeradas.c.orden <= numeradas.c.activas - numeradas.c.objetivo)
+    resultado = session.execute(
+        update(StockUnidad)
+        .where(StockUnidad.id.in_(sobrantes))
+        .values(
+            estado="inactivo",
+            fecha_modificacion=ahora,
+            observaciones="Unidad desactivada por conciliación de stock - " + func.coalesce(StockUnidad.observaciones, "")
+        ),
+        execution_options={"synchronize_session": False}
+    )
+    return resultado.rowcount or 0
+
+
+def _crear_faltantes(session, ahora: str) -> int:
+    """Crea las unidades que faltan para llegar a la cantidad de cada producto"""
+    faltantes = [(d["producto_id"], -d["diferencia"]) for d in _diferencias(session) if d["diferencia"] < 0]
+    total = sum(cantidad for _, cantidad in faltantes)
+    if not total:
+        return 0
+    codigos = iter(asignador_codigos.reservar(total, session))
+    session.execute(insert(StockUnidad), [
+        {
+            "producto_id": producto_id,
+            "codigo_barras": next(codigos),
+            "estado": "activo",
+            "fecha_ingreso": ahora,
+            "fecha_modificacion": ahora,
+            "observaciones": "Unidad creada por conciliación de stock",
+        }
+        for producto_id, cantidad in faltantes
+        for _ in range(cantidad)
+    ])
+    return total
+
+
+def conciliar_stock(corregir: bool = False, crear_faltantes: bool = True) -> Dict[str, Any]:
+    """
+    Busca productos cuya cantidad no coincide con sus unidades activas y,
+    con corregir=True, ajusta las unidades a la cantidad. Con
+    crear_faltantes=False solo inactiva las que sobran.
+
+    Returns:
+        dict: {"exito", "corregido", "diferencias": [{"producto_id", "nombre",
+               "cantidad", "unidades_activas", "diferencia"}],
+               "unidades_inactivadas", "unidades_creadas"}
+    """
+    session = Session()
+    try:
+        diferencias = _diferencias(session)
+        resultado = {
+            "exito": True,
+            "corregido": False,
+            "diferencias": diferencias,
+            "unidades_inactivadas": 0,
+            "unidades_creadas": 0
+        }
+        if not corregir or not diferencias:
+            return resultado
+
+        ahora = datetime.now().isoformat()
+        # El UPDATE toma el lock de escritura; los faltantes se recalculan ya dentro de la transacción
+        resultado["unidades_inactivadas"] = _inactivar_sobrantes(session, ahora)
+        if crear_faltantes:
+            resultado["unidades_creadas"] = _crear_faltantes(session, ahora)
+        session.commit()
+        resultado["corregido"] = True
+
+        indice_codigos.invalidar()
+        print(f"[INFO] Conciliación de stock: {len(diferencias)} productos, "
+              f"{resultado['unidades_inactivadas']} unidades inactivadas, "
+              f"{resultado['unidades_creadas']} creadas")
+        return resultado
+
+    except Exception as e:
+        session.rollback()
+        print(f"[ERROR] Error en la conciliación de stock: {e}")
+        return {"exito": False, "mensaje": str(e)}
+    finally:
+        session.close()
+
+
+def iniciar_conciliacion_periodica(intervalo_minutos: float = INTERVALO_MINUTOS) -> threading.Event:
+    """
+    Concilia ahora y cada `intervalo_minutos` en un hilo de fondo, inactivando
+    sobrantes; los faltantes solo se informan. set() al evento lo detiene.
+    """
+    detener = threading.Event()
+
+    def worker():
+        while not detener.is_set():
+            try:
+                resultado = conciliar_stock(corregir=True, crear_faltantes=False)
+                faltantes = [d for d in resultado.get("diferencias", []) if d["diferencia"] < 0]
+                if faltantes:
+                    print(f"[WARN] Conciliación de stock: {len(faltantes)} productos con menos unidades activas "
+                          f"que cantidad ({-sum(d['diferencia'] for d in faltantes)} unidades). "
+                          f"Para crearlas: python -m aplicacion.backend.stock.conciliacion --corregir")
+            except Exception as e:
+                print(f"[WARN] Conciliación de stock falló: {e}")
+            detener.wait(intervalo_minutos * 60)
+
+    threading.Thread(target=worker, name="conciliacion-stock", daemon=True).start()
+    return detener
+
+
+if __name__ == "__main__":
+    corregir = "--corregir" in sys.argv[1:]
+    resultado = conciliar_stock(corregir=corregir)
+    if not resultado["exito"]:
+        print(f"✗ {resultado['mensaje']}")
+        sys.exit(1)
+
+    diferencias = resultado["diferencias"]
+    if not diferencias:
+        print("✓ Cantidades y unidades activas coinciden en todos los productos")
+        sys.exit(0)
+
+    print(f"{'ID':>6}  {'Producto':<40} {'Cantidad':>9} {'Activas':>8} {'Dif.':>6}")
+    print("-" * 74)
+    for d in diferencias:
+        print(f"{d['producto_id']:>6}  {str(d['nombre'])[:40]:<40} {d['cantidad']:>9g} "
+              f"{d['unidades_activas']:>8} {d['diferencia']:>+6}")
+    print("-" * 74)
+    print(f"{len(diferencias)} productos con diferencias")
+    if corregir:
+        print(f"Unidades inactivadas: {resultado['unidades_inactivadas']}")
+        print(f"Unidades creadas: {resultado['unidades_creadas']}")
+    else:
+        print("Para corregir: python -m aplicacion.backend.stock.conciliacion --corregir")
@@ -1,7 +1,9 @@
 from aplicacion.backend.stock.utils import calcular_precio_con_margen, redondear_precio, clasificar_producto_por_unidad, calcular_margen_con_precio
 from aplicacion.backend.stock import crud
+from aplicacion.backend.stock.indice_codigos import buscar_unidad_por_codigo
 
-def agregar_producto_controller(data):
+def preparar_datos_producto(data):
+    """Completa es_divisible, precio_venta y precio_redondeado como al dar de alta un producto"""
     data["es_divisible"] = clasificar_producto_por_unidad(data.get("unidad_medida", ""))
 
     if data.get("costo_unitario") is not None and data.get("margen_ganancia") is not None:
@@ -13,7 +15,10 @@ def agregar_producto_controller(data):
         else:
             data["precio_redondeado"] = precio
 
-    return crud.crear_producto(data)
+    return data
+
+def agregar_producto_controller(data):
+    return crud.crear_producto(preparar_datos_producto(data))
 
 def editar_producto_controller(id_producto, data):
     if "unidad_medida" in data:
@@ -43,6 +48,15 @@ def editar_producto_controller(id_producto, data):
 
     return crud.obtener_producto(id_producto)
 
+def planificar_remarcacion_controller(categoria_id=None, proveedor_id=None, ids=None, aumento_costo=0.0,
+                                      margen=None, margen_minimo=None, modo_redondeo="superior"):
+    from aplicacion.backend.stock.remarcacion import planificar_remarcacion
+    return planificar_remarcacion(categoria_id, proveedor_id, ids, aumento_costo, margen, margen_minimo, modo_redondeo)
+
+def aplicar_remarcacion_controller(plan):
+    from aplicacion.backend.stock.remarcacion import aplicar_remarcacion
+    return aplicar_remarcacion(plan)
+
 def eliminar_producto_controller(id_producto):
     return crud.eliminar_producto(id_producto)
 
@@ -90,12 +104,28 @@ def agregar_unidad_controller(data):
         "observaciones": data.get("observaciones")
     })
 
+def agregar_unidades_bulk_controller(producto_id, unidades, observaciones=None, al_avanzar=None):
+    return crud.crear_unidades_bulk(producto_id, unidades, observaciones=observaciones, al_avanzar=al_avanzar)
+
+def agregar_producto_con_unidades_controller(data, unidades, observaciones=None, al_avanzar=None):
+    return crud.crear_producto_con_unidades(preparar_datos_producto(data), unidades,
+                                            observaciones=observaciones, al_avanzar=al_avanzar)
+
+def buscar_unidad_por_codigo_controller(codigo_barras):
+    return buscar_unidad_por_codigo(codigo_barras)
+
 def agregar_stock_controller(id_producto, cantidad):
     return crud.agregar_stock(id_producto, cantidad)
 
 def obtener_unidades_de_producto_controller(producto_id):
     return crud.obtener_unidades_por_producto(producto_id)
 
+def listar_unidades_pagina_controller(producto_id, estado=None, orden="id", despues=None, limite=50):
+    return crud.listar_unidades_pagina(producto_id, estado, orden, despues, limite)
+
+def contar_unidades_producto_controller(producto_id):
+    return crud.contar_unidades_producto(producto_id)
+
 def limpiar_unidades_fantasma_controller(producto_id):
     return crud.limpiar_unidades_fantasma(producto_id)
 
@@ -105,6 +135,13 @@ def modificar_stock_controller(id_producto, cantidad):
 def limpiar_unidades_vencidas_controller():
     return crud.eliminar_unidades_vencidas()
 
+def purgar_unidades_vencidas_controller(fecha_corte=None, simular=False):
+    return crud.purgar_unidades_vencidas(fecha_corte, simular)
+
+def conciliar_stock_controller(corregir=False):
+    from aplicacion.backend.stock.conciliacion import conciliar_stock
+    return conciliar_stock(corregir)
+
 def actualizar_fecha_vencimiento_unidad_controller(id_unidad, nueva_fecha):
     try:
         return crud.actualizar_fecha_vencimiento_unidad(id_unidad, nueva_fecha)
@@ -121,4 +158,11 @@ def actualizar_fechas_vencimiento_lote_controller(cambios_lote):
             "exitosos": 0,
             "fallidos": len(cambios_lote) if cambios_lote else 0,
             "errores": [f"Error critico en controller: {e}"]
-        }
\ No newline at end of file
+        }
+def configurar_prefijo_codigos_controller(prefijo):
+    from aplicacion.backend.stock.codigos import asignador_codigos
+    try:
+        asignador_codigos.configurar_prefijo(prefijo)
+        return {"exito": True, "mensaje": f"Prefijo de códigos actualizado a {prefijo}"}
+    except ValueError as e:
+        return {"exito": False, "mensaje": str(e)}
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import sessionmaker
 from aplicacion.backend.database.database import engine, Producto, Proveedor, StockClasificacion, StockUnidad
+from aplicacion.backend.stock.indice_codigos import indice_codigos
 from sqlalchemy import func
 from datetime import datetime, timedelta
 import os
@@ -45,6 +46,7 @@ def eliminar_producto(id_producto):
     if producto:
         session.delete(producto)
         session.commit()
+        indice_codigos.quitar_producto(id_producto)
     session.close()
     return producto
 
@@ -139,6 +141,7 @@ def crear_unidad(data):
     nueva = StockUnidad(
         producto_id=data.get("producto_id"),
         codigo_barras=data.get("codigo_barras"),
+        estado=data.get("estado", "activo"),
         fecha_ingreso=data.get("fecha_ingreso"),
         fecha_modificacion=data.get("fecha_modificacion"),
         fecha_vencimiento=data.get("fecha_vencimiento"),
@@ -147,6 +150,8 @@ def crear_unidad(data):
     session.add(nueva)
     session.commit()
     session.refresh(nueva)
+    if nueva.estado == "activo":
+        indice_codigos.registrar(nueva.codigo_barras, nueva.id, nueva.producto_id)
     session.close()
     return nueva
 
@@ -168,13 +173,100 @@ def obtener_unidades_por_producto(producto_id):
     session.close()
     return unidades
 
+def unidad_a_dict(unidad):
+    return {
+        "id": unidad.id,
+        "codigo_barras": unidad.codigo_barras,
+        "estado": unidad.estado,
+        "fecha_vencimiento": unidad.fecha_vencimiento,
+        "fecha_ingreso": unidad.fecha_ingreso,
+        "observaciones": unidad.observaciones or ""
+    }
+
+def contar_unidades_producto(producto_id):
+    """Total de unidades de un producto y cuántas están activas, en un solo COUNT"""
+    from sqlalchemy import case
+
+    session = Session()
+    try:
+        total, activas = session.query(
+            func.count(StockUnidad.id),
+            func.coalesce(func.sum(case((StockUnidad.estado == "activo", 1), else_=0)), 0)
+        ).filter(StockUnidad.producto_id == producto_id).one()
+        return {"total": total, "activas": activas, "inactivas": total - activas}
+    finally:
+        session.close()
+
+def listar_unidades_pagina(producto_id, estado=None, orden="id", despues=None, limite=50):
+    """
+    Una página de unidades de un producto con paginación por clave (keyset):
+    en lugar de OFFSET se pide "lo que sigue a la última fila vista", así que
+    cada página cuesta lo mismo sin importar cuántas unidades tenga el producto.
+
+    Args:
+        estado: 'activo', 'inactivo' o None para todas
+        orden: 'id' (orden de alta) o 'vencimiento' (las que vencen antes
+               primero, las sin vencimiento al final; desempata el id)
+        despues: cursor de la página anterior ("siguiente" del resultado), None
+                 para la primera
+        limite: unidades por página; None trae todas desde el cursor
+
+    Returns:
+        dict: {"unidades": [{"id", "codigo_barras", "estado", "fecha_vencimiento",
+               "fecha_ingreso", "observaciones"}], "siguiente": cursor o None}
+    """
+    from sqlalchemy import and_, or_
+
+    if orden not in ("id", "vencimiento"):
+        raise ValueError(f"Orden de unidades desconocido: {orden}")
+
+    session = Session()
+    try:
+        q = session.query(StockUnidad).filter(StockUnidad.producto_id == producto_id)
+        if estado:
+            q = q.filter(StockUnidad.estado == estado)
+
+        if orden == "id":
+            if despues is not None:
+                q = q.filter(StockUnidad.id > despues)
+            q = q.order_by(StockUnidad.id)
+        else:
+            if despues is not None:
+                fecha, ultimo_id = despues
+                if fecha is None:
+                    q = q.filter(StockUnidad.fecha_vencimiento == None, StockUnidad.id > ultimo_id)
+                else:
+                    q = q.filter(or_(
+                        StockUnidad.fecha_vencimiento > fecha,
+                        and_(StockUnidad.fecha_vencimiento == fecha, StockUnidad.id > ultimo_id),
+                        StockUnidad.fecha_vencimiento == None
+                    ))
+            q = q.order_by(StockUnidad.fecha_vencimiento == None, StockUnidad.fecha_vencimiento, StockUnidad.id)
+
+        if limite:
+            q = q.limit(limite + 1)   # una de más para saber si hay otra página
+        unidades = [unidad_a_dict(u) for u in q.all()]
+
+        siguiente = None
+        if limite and len(unidades) > limite:
+            unidades = unidades[:limite]
+            ultima = unidades[-1]
+            siguiente = ultima["id"] if orden == "id" else (ultima["fecha_vencimiento"], ultima["id"])
+        return {"unidades": unidades, "siguiente": siguiente}
+    finally:
+        session.close()
+
 def actualizar_unidad(id_unidad, data):
     session = Session()
     unidad = session.query(StockUnidad).filter_by(id=id_unidad).first()
     if unidad:
+        codigo_anterior = unidad.codigo_barras
         for key, value in data.items():
             setattr(unidad, key, value)
         session.commit()
+        indice_codigos.quitar(codigo_anterior)
+        if unidad.estado in (None, "activo"):
+            indice_codigos.registrar(unidad.codigo_barras, unidad.id, unidad.producto_id)
     session.close()
     return unidad
 
@@ -184,6 +276,7 @@ def eliminar_unidad(id_unidad):
     if unidad:
         session.delete(unidad)
         session.commit()
+        indice_codigos.quitar(unidad.codigo_barras)
     session.close()
     return unidad
 
@@ -315,6 +408,151 @@ def obtener_unidades_por_vencer(dias_limite=10):
     finally:
         session.close()
 
+def provisionar_unidades(session, producto_id, cantidad, observaciones=None, fecha_vencimiento=None):
+    """
+    Crea `cantidad` unidades activas de un producto con códigos nuevos, en un
+    solo INSERT de varias filas. No hace commit (queda en la transacción de
+    quien llama) ni actualiza el índice de códigos.
+    
+    Returns:
+        list: [(codigo_barras, unidad_id)] de las unidades creadas
+    """
+    from sqlalchemy import insert
+    from aplicacion.backend.stock.codigos import asignador_codigos
+    
+    if cantidad <= 0:
+        return []
+    
+    fecha_actual = datetime.now().isoformat()
+    filas = [
+        {
+            "producto_id": producto_id,
+            "codigo_barras": codigo,
+            "estado": "activo",
+            "fecha_ingreso": fecha_actual,
+            "fecha_modificacion": fecha_actual,
+            "fecha_vencimiento": fecha_vencimiento,
+            "observaciones": observaciones,
+        }
+        for codigo in asignador_codigos.reservar(cantidad, session)
+    ]
+    creadas = session.execute(
+        insert(StockUnidad).returning(StockUnidad.codigo_barras, StockUnidad.id), filas
+    ).all()
+    return [(codigo, unidad_id) for codigo, unidad_id in creadas]
+
+def _validar_codigos_nuevos(session, unidades, tamano_lote):
+    """Códigos de `unidades` sin espacios; ValueError si falta, se repite o ya existe alguno"""
+    codigos = [(u.get("codigo_barras") or "").strip() for u in unidades]
+    if not all(codigos):
+        raise ValueError("Hay unidades sin código de barras")
+    if len(set(codigos)) != len(codigos):
+        raise ValueError("Hay códigos de barras repetidos entre las unidades")
+
+    existentes = []
+    for i in range(0, len(codigos), tamano_lote):
+        existentes.extend(c for (c,) in session.query(StockUnidad.codigo_barras).filter(
+            StockUnidad.codigo_barras.in_(codigos[i:i + tamano_lote])
+        ))
+    if existentes:
+        raise ValueError(f"Códigos de barras ya registrados: {', '.join(existentes[:5])}"
+                         + (f" y {len(existentes) - 5} más" if len(existentes) > 5 else ""))
+    return codigos
+
+def _insertar_unidades(session, producto_id, codigos, unidades, observaciones, tamano_lote, al_avanzar):
+    """INSERT de varias filas cada `tamano_lote` unidades, sin commit; devuelve [(codigo, unidad_id)]"""
+    from sqlalchemy import insert
+
+    fecha_actual = datetime.now().isoformat()
+    creadas = []
+    for i in range(0, len(codigos), tamano_lote):
+        filas = [
+            {
+                "producto_id": producto_id,
+                "codigo_barras": codigo,
+                "estado": "activo",
+                "fecha_ingreso": fecha_actual,
+                "fecha_modificacion": fecha_actual,
+                "fecha_vencimiento": unidad.get("fecha_vencimiento"),
+                "observaciones": observaciones,
+            }
+            for codigo, unidad in zip(codigos[i:i + tamano_lote], unidades[i:i + tamano_lote])
+        ]
+        # Por la conexión (Core): el bulk insert del ORM parte en una sentencia
+        # por fila cuando hay vencimientos vacíos mezclados con fechas
+        creadas.extend(tuple(fila) for fila in session.connection().execute(
+            insert(StockUnidad).returning(StockUnidad.codigo_barras, StockUnidad.id,
+                                          sort_by_parameter_order=True), filas
+        ))
+        if al_avanzar:
+            al_avanzar(len(creadas), len(codigos))
+    return creadas
+
+def crear_unidades_bulk(producto_id, unidades, observaciones=None, tamano_lote=500, al_avanzar=None):
+    """
+    Crea las unidades activas de un producto con los códigos y vencimientos
+    dados, todas en una transacción: un INSERT de varias filas cada
+    `tamano_lote` unidades y un solo commit al final.
+
+    Args:
+        unidades: [{"codigo_barras", "fecha_vencimiento"}]
+        al_avanzar: callable(hechas, total) llamado después de cada lote; si
+            lanza una excepción la transacción se deshace entera
+
+    Returns:
+        list: [(codigo_barras, unidad_id)] de las unidades creadas
+    Raises:
+        ValueError: si algún código falta, se repite o ya existe en stock_unidades
+    """
+    session = Session()
+    try:
+        codigos = _validar_codigos_nuevos(session, unidades, tamano_lote)
+        creadas = _insertar_unidades(session, producto_id, codigos, unidades, observaciones, tamano_lote, al_avanzar)
+        session.commit()
+
+        for codigo, unidad_id in creadas:
+            indice_codigos.registrar(codigo, unidad_id, producto_id)
+        return creadas
+
+    except Exception as e:
+        session.rollback()
+        print(f"Error al crear unidades: {e}")
+        raise
+    finally:
+        session.close()
+
+def crear_producto_con_unidades(data, unidades, observaciones=None, tamano_lote=500, al_avanzar=None):
+    """
+    Como crear_producto seguido de crear_unidades_bulk, pero en una sola
+    transacción: si se cancela (al_avanzar lanza) o un código ya existe no
+    queda ni el producto ni ninguna unidad.
+
+    Returns:
+        tuple: (producto, [(codigo_barras, unidad_id)])
+    Raises:
+        ValueError: si algún código falta, se repite o ya existe en stock_unidades
+    """
+    session = Session()
+    try:
+        codigos = _validar_codigos_nuevos(session, unidades, tamano_lote)
+        producto = Producto(**data)
+        session.add(producto)
+        session.flush()
+        creadas = _insertar_unidades(session, producto.id, codigos, unidades, observaciones, tamano_lote, al_avanzar)
+        session.commit()
+        session.refresh(producto)
+
+        for codigo, unidad_id in creadas:
+            indice_codigos.registrar(codigo, unidad_id, producto.id)
+        return producto, creadas
+
+    except Exception as e:
+        session.rollback()
+        print(f"Error al crear el producto con sus unidades: {e}")
+        raise
+    finally:
+        session.close()
+
 def agregar_stock(id_producto, cantidad):
     session = Session()
     try:
@@ -337,28 +575,11 @@ def agregar_stock(id_producto, cantidad):
                 cantidad_agregar = int(cantidad)
                 print(f"Agregando {cantidad_agregar} unidades fisicas para '{producto.nombre}'")
                 
-                from datetime import datetime
-                fecha_actual = datetime.now().isoformat()
-                
-                from aplicacion.backend.stock.utils import generar_codigo_barras
-                
-                for i in range(cantidad_agregar):
-                    codigo_barras = generar_codigo_barras()
-                    
-                    while session.query(StockUnidad).filter_by(codigo_barras=codigo_barras).first():
-                        codigo_barras = generar_codigo_barras()
-                    
-                    nueva_unidad = StockUnidad(
-                        producto_id=producto.id,
-                        codigo_barras=codigo_barras,
-                        estado="activo",
-                        fecha_ingreso=fecha_actual,
-                        fecha_modificacion=fecha_actual,
-                        fecha_vencimiento=None,
-                        observaciones="Unidad agregada por incremento de stock"
-                    )
-                    session.add(nueva_unidad)
-                    print(f"  Unidad {i+1}/{cantidad_agregar}: {codigo_barras}")
+                unidades_nuevas = provisionar_unidades(
+                    session, producto.id, cantidad_agregar,
+                    observaciones="Unidad agregada por incremento de stock"
+                )
+                print(f"  {len(unidades_nuevas)} unidades creadas")
                 
             elif cantidad < 0:
                 cantidad_restar = int(abs(cantidad))
@@ -381,9 +602,23 @@ def agregar_stock(id_producto, cantidad):
                     unidad.observaciones = f"Unidad desactivada por reduccion de stock - {unidad.observaciones or ''}"
                     print(f"  Desactivada unidad {i+1}/{len(unidades_activas)}: {unidad.codigo_barras}")
         
+        session.flush()
+        codigos_alta = []
+        codigos_baja = []
+        if not producto.es_divisible:
+            if cantidad > 0:
+                codigos_alta = unidades_nuevas
+            elif cantidad < 0:
+                codigos_baja = [u.codigo_barras for u in unidades_activas]
+        
         session.commit()
         session.refresh(producto)
         
+        for codigo, unidad_id in codigos_alta:
+            indice_codigos.registrar(codigo, unidad_id, producto.id)
+        for codigo in codigos_baja:
+            indice_codigos.quitar(codigo)
+        
         if nuevo_stock == 0:
             limpiar_unidades_fantasma(id_producto)
         
@@ -409,6 +644,7 @@ def limpiar_unidades_fantasma(producto_id):
                 unidad.estado = "inactivo"
                 unidad.fecha_modificacion = datetime.now()
             session.commit()
+            indice_codigos.quitar_producto(producto_id)
     except Exception:
         session.rollback()
     finally:
@@ -435,95 +671,82 @@ def formatear_moneda(valor):
     
     return f"${formatted}"
 
+def producto_a_dict(producto, categoria_nombre=None):
+    """Arma la entrada de stock.json de un producto (categoria_nombre ya resuelta)"""
+    categoria = categoria_nombre if producto.categoria_id and categoria_nombre else "sin_categoria"
+
+    costo = producto.costo_unitario if producto.costo_unitario is not None else 0
+    precio = producto.precio_redondeado if producto.precio_redondeado is not None else 0
+    cantidad = producto.cantidad if producto.cantidad is not None else 0
+    margen = producto.margen_ganancia
+
+    estado = "activo" if cantidad > 0 else "no disponible"
+
+    es_divisible = False
+    if hasattr(producto, 'unidad_medida') and producto.unidad_medida:
+        es_divisible = producto.unidad_medida == "kilogramos"
+    elif hasattr(producto, 'es_divisible'):
+        es_divisible = producto.es_divisible
+
+    ganancia_bruta_unitaria = precio
+    ganancia_neta_unitaria = precio - costo
+    ganancia_bruta_total = precio * cantidad
+    ganancia_neta_total = (precio - costo) * cantidad
+
+    return {
+        "id": producto.id,
+        "nombre": producto.nombre,
+        "categoria": categoria,
+        "stock": cantidad,
+        "costo": formatear_moneda(costo),
+        "precio": formatear_moneda(precio),
+        "estado": estado,
+        "margen": margen,
+        "ganancia_bruta_unitaria": formatear_moneda(ganancia_bruta_unitaria),
+        "ganancia_neta_unitaria": formatear_moneda(ganancia_neta_unitaria),
+        "ganancia_bruta_total": formatear_moneda(ganancia_bruta_total),
+        "ganancia_neta_total": formatear_moneda(ganancia_neta_total),
+        "es_divisible": es_divisible
+    }
+
 def obtener_productos_json():
     session = Session()
     try:
-        productos = session.query(Producto).all()
-        
-        resultado = []
-        
-        for producto in productos:
-            if producto.categoria_id and producto.clasificacion:
-                categoria = producto.clasificacion.nombre
-            else:
-                categoria = "sin_categoria"
-            
-            estado = "activo" if producto.cantidad > 0 else "no disponible"
-            
-            costo = producto.costo_unitario if producto.costo_unitario is not None else 0
-            precio = producto.precio_redondeado if producto.precio_redondeado is not None else 0
-            cantidad = producto.cantidad if producto.cantidad is not None else 0
-            margen = producto.margen_ganancia
-            
-            es_divisible = False
-            if hasattr(producto, 'unidad_medida') and producto.unidad_medida:
-                es_divisible = producto.unidad_medida == "kilogramos"
-            elif hasattr(producto, 'es_divisible'):
-                es_divisible = producto.es_divisible
-            
-            ganancia_bruta_unitaria = precio
-            ganancia_neta_unitaria = precio - costo
-            ganancia_bruta_total = precio * cantidad
-            ganancia_neta_total = (precio - costo) * cantidad
-            
-            producto_dict = {
-                "id": producto.id,
-                "nombre": producto.nombre,
-                "categoria": categoria,
-                "stock": cantidad,
-                "costo": formatear_moneda(costo),
-                "precio": formatear_moneda(precio),
-                "estado": estado,
-                "margen": margen,
-                "ganancia_bruta_unitaria": formatear_moneda(ganancia_bruta_unitaria),
-                "ganancia_neta_unitaria": formatear_moneda(ganancia_neta_unitaria),
-                "ganancia_bruta_total": formatear_moneda(ganancia_bruta_total),
-                "ganancia_neta_total": formatear_moneda(ganancia_neta_total),
-                "es_divisible": es_divisible
-            }
-            
-            resultado.append(producto_dict)
-        
-        return resultado
-        
+        # Una sola consulta con la categoría resuelta (antes era un lazy-load por producto)
+        filas = (
+            session.query(Producto, StockClasificacion.nombre)
+            .outerjoin(StockClasificacion, Producto.categoria_id == StockClasificacion.id)
+            .order_by(Producto.id)
+            .all()
+        )
+        return [producto_a_dict(producto, categoria) for producto, categoria in filas]
+
     except Exception as e:
         print(f"Error al obtener productos JSON: {e}")
         return []
     finally:
         session.close()
 
-def exportar_productos_json():
-    try:
-        productos = obtener_productos_json()
-
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-        json_dir = os.path.join(base_dir, "frontend", "json")
-        archivo_path = os.path.join(json_dir, "stock.json")
-
-        os.makedirs(json_dir, exist_ok=True)
-
-        if os.path.exists(archivo_path):
-            try:
-                os.remove(archivo_path)
-                print("Archivo existente stock.json eliminado.")
-            except Exception as e:
-                print(f"No se pudo eliminar el stock.json existente: {e}")
-                return False
-
-        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=json_dir, delete=False) as tmp:
-            json.dump(productos, tmp, ensure_ascii=False, indent=4)
-            tmp_path = tmp.name
-
-        os.replace(tmp_path, archivo_path)
-
-        print(f"Productos exportados exitosamente a {archivo_path}")
-        return True
+def exportar_productos_json(ids=None, completo=False):
+    """
+    Actualiza frontend/json/stock.json a partir del snapshot incremental
+    (ver stock/snapshot.py): solo se vuelven a serializar los productos
+    modificados desde la exportación anterior.
 
+    Args:
+        ids: productos a refrescar sí o sí (cambios hechos sin tocar ultima_modificacion)
+        completo: reconstruir el snapshot entero
+    """
+    from aplicacion.backend.stock.snapshot import snapshot_stock
+    from aplicacion.backend.stock.catalogo import catalogo
+    try:
+        ok = snapshot_stock.exportar(ids=ids, completo=completo)
+        catalogo.refrescar(productos=True)
+        return ok
     except Exception as e:
         print(f"Error al exportar productos a JSON: {e}")
         return False
-    
+
 def obtener_categorias_json():
     session = Session()
     try:
@@ -575,6 +798,9 @@ def exportar_categorias_json():
         os.replace(tmp_path, archivo_path)
 
         print(f"Categorias exportadas exitosamente a {archivo_path}")
+
+        from aplicacion.backend.stock.catalogo import catalogo
+        catalogo.refrescar(productos=False, categorias=True)
         return True
 
     except Exception as e:
@@ -634,48 +860,98 @@ def exportar_proveedores_json():
         os.replace(tmp_path, archivo_path)
 
         print(f"Proveedores exportados exitosamente a {archivo_path}")
+
+        from aplicacion.backend.stock.catalogo import catalogo
+        catalogo.refrescar(productos=False, proveedores=True)
         return True
 
     except Exception as e:
         print(f"Error al exportar proveedores a JSON: {e}")
         return False
 
-def eliminar_unidades_vencidas():
+def purgar_unidades_vencidas(fecha_corte=None, simular=False):
+    """
+    Borra las unidades con vencimiento hasta `fecha_corte` inclusive (YYYY-MM-DD,
+    hoy por defecto) y descuenta del stock de cada producto sus unidades
+    activas vencidas. Todo con sentencias de conjunto en una transacción: un
+    SELECT agrupado para el resumen, un UPDATE correlacionado sobre productos
+    y un DELETE sobre stock_unidades.
+    
+    Con simular=True solo arma el resumen, sin tocar la base.
+    
+    Returns:
+        dict: {"exito", "simulacion", "fecha_corte", "eliminadas",
+               "productos": [{"producto_id", "nombre", "unidades", "unidades_activas",
+                              "stock_anterior", "stock_nuevo"}]}
+    """
+    from sqlalchemy import and_, case, delete, select, update
+    
+    corte = fecha_corte or datetime.now().date().isoformat()
+    datetime.strptime(corte, "%Y-%m-%d")
+    vencida = and_(
+        StockUnidad.fecha_vencimiento != None,
+        StockUnidad.fecha_vencimiento <= corte
+    )
+    
     session = Session()
     try:
-        unidades_a_eliminar = session.query(
+        filas = session.query(
             StockUnidad.producto_id,
-            func.count(StockUnidad.id).label('cantidad')
-        ).filter(
-            StockUnidad.fecha_vencimiento != None,
-            StockUnidad.fecha_vencimiento <= func.current_date()
-        ).group_by(StockUnidad.producto_id).all()
-        
-        print(f"[DEBUG] Unidades vencidas por producto a eliminar: {[(p_id, cant) for p_id, cant in unidades_a_eliminar]}")
-        
-        borrados = (
-            session.query(StockUnidad)
-            .filter(
-                StockUnidad.fecha_vencimiento != None,
-                StockUnidad.fecha_vencimiento <= func.current_date()
-            )
-            .delete(synchronize_session=False)
-        )
+            Producto.nombre,
+            Producto.cantidad,
+            func.count(StockUnidad.id),
+            func.sum(case((StockUnidad.estado == "activo", 1), else_=0))
+        ).outerjoin(
+            Producto, Producto.id == StockUnidad.producto_id
+        ).filter(vencida).group_by(StockUnidad.producto_id).order_by(StockUnidad.producto_id).all()
         
-        productos_actualizados = 0
-        for producto_id, cantidad_eliminada in unidades_a_eliminar:
-            producto = session.query(Producto).filter_by(id=producto_id).first()
-            if producto:
-                stock_anterior = producto.cantidad or 0
-                nueva_cantidad = max(0, stock_anterior - cantidad_eliminada)
-                producto.cantidad = nueva_cantidad
-                productos_actualizados += 1
-                print(f"[DEBUG] Producto ID {producto_id} '{producto.nombre}': stock {stock_anterior} -> {nueva_cantidad} (eliminadas: {cantidad_eliminada})")
+        productos = []
+        eliminadas = 0
+        for producto_id, nombre, cantidad, unidades, activas in filas:
+            stock_anterior = cantidad or 0
+            productos.append({
+                "producto_id": producto_id,
+                "nombre": nombre,
+                "unidades": unidades,
+                "unidades_activas": activas or 0,
+                "stock_anterior": stock_anterior,
+                "stock_nuevo": max(0, stock_anterior - (activas or 0))
+            })
+            eliminadas += unidades
         
+        resultado = {
+            "exito": True,
+            "simulacion": simular,
+            "fecha_corte": corte,
+            "eliminadas": eliminadas,
+            "productos": productos
+        }
+        if simular or not eliminadas:
+            return resultado
+        
+        activas_vencidas = (
+            select(func.count(StockUnidad.id))
+            .where(StockUnidad.producto_id == Producto.id, vencida, StockUnidad.estado == "activo")
+            .scalar_subquery()
+        )
+        session.execute(
+            update(Producto)
+            .where(Producto.id.in_(
+                select(StockUnidad.producto_id).where(vencida, StockUnidad.estado == "activo")
+            ))
+            .values(
+                cantidad=func.max(0, func.coalesce(Producto.cantidad, 0) - activas_vencidas),
+                ultima_modificacion=datetime.now().isoformat()
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        session.execute(delete(StockUnidad).where(vencida), execution_options={"synchronize_session": False})
         session.commit()
         
-        print(f"[INFO] Eliminadas {borrados} unidades vencidas de {productos_actualizados} productos diferentes")
-        return borrados
+        indice_codigos.invalidar()
+        exportar_productos_json(ids=[p["producto_id"] for p in productos if p["unidades_activas"]])
+        print(f"[INFO] Eliminadas {eliminadas} unidades vencidas de {len(productos)} productos diferentes")
+        return resultado
         
     except Exception as e:
         session.rollback()
@@ -683,6 +959,10 @@ def eliminar_unidades_vencidas():
         raise e
     finally:
         session.close()
+
+def eliminar_unidades_vencidas():
+    """Borra las unidades vencidas a hoy y devuelve cuántas se eliminaron"""
+    return purgar_unidades_vencidas()["eliminadas"]
         
 def actualizar_fecha_vencimiento_unidad(id_unidad, nueva_fecha):
     session = Session()
@@ -714,52 +994,75 @@ def actualizar_fecha_vencimiento_unidad(id_unidad, nueva_fecha):
         session.close()
 
 def actualizar_fechas_vencimiento_lote(cambios_lote):
-    session = Session()
+    """
+    Actualiza en bloque las fechas de vencimiento de varias unidades.
+    Valida todo el lote antes de tocar la base, trae las unidades con un solo
+    SELECT ... IN (...) y escribe todos los cambios en un UPDATE por id
+    ejecutado como lote (executemany), en una transacción.
+    
+    Args:
+        cambios_lote: [{"unidad_id", "nueva_fecha" (YYYY-MM-DD o vacío), "codigo"}]
+    
+    Returns:
+        dict: {"exitosos": int, "fallidos": int, "errores": [str]}
+    """
+    from sqlalchemy import select, update
+    
     resultado = {
         "exitosos": 0,
         "fallidos": 0,
         "errores": []
     }
     
-    try:
-        from datetime import datetime
-        fecha_modificacion = datetime.now().isoformat()
+    # 1. Validar el lote completo (un cambio posterior de la misma unidad pisa al anterior)
+    validos = {}
+    for cambio in cambios_lote:
+        unidad_id = cambio.get("unidad_id")
+        nueva_fecha = (cambio.get("nueva_fecha") or "").strip()
+        codigo = cambio.get("codigo", "N/A")
         
-        for cambio in cambios_lote:
+        if nueva_fecha:
             try:
-                unidad_id = cambio.get("unidad_id")
-                nueva_fecha = cambio.get("nueva_fecha", "").strip()
-                codigo = cambio.get("codigo", "N/A")
-                
-                unidad = session.query(StockUnidad).filter_by(id=unidad_id).first()
-                if not unidad:
-                    resultado["fallidos"] += 1
-                    resultado["errores"].append(f"Unidad ID {unidad_id} no encontrada")
-                    continue
-                
-                if nueva_fecha:
-                    try:
-                        datetime.strptime(nueva_fecha, '%Y-%m-%d')
-                        unidad.fecha_vencimiento = nueva_fecha
-                    except ValueError:
-                        resultado["fallidos"] += 1
-                        resultado["errores"].append(f"Formato invalido para codigo {codigo}: {nueva_fecha}")
-                        continue
-                else:
-                    unidad.fecha_vencimiento = None
-                
-                unidad.fecha_modificacion = fecha_modificacion
-                
-                resultado["exitosos"] += 1
-                print(f"Actualizada unidad {unidad_id} (codigo {codigo}): {nueva_fecha or 'Sin fecha'}")
-                
-            except Exception as e:
+                datetime.strptime(nueva_fecha, '%Y-%m-%d')
+            except ValueError:
                 resultado["fallidos"] += 1
-                error_msg = f"Error en unidad {cambio.get('unidad_id', 'N/A')}: {str(e)}"
-                resultado["errores"].append(error_msg)
-                print(f"Error: {error_msg}")
+                resultado["errores"].append(f"Formato invalido para codigo {codigo}: {nueva_fecha}")
+                continue
+        try:
+            validos[int(unidad_id)] = nueva_fecha or None
+        except (TypeError, ValueError):
+            resultado["fallidos"] += 1
+            resultado["errores"].append(f"Unidad ID {unidad_id} no encontrada")
+    
+    if not validos:
+        return resultado
+    
+    session = Session()
+    try:
+        # 2. Unidades existentes en una sola consulta
+        existentes = set()
+        ids = list(validos)
+        for inicio in range(0, len(ids), 900):
+            existentes.update(session.execute(
+                select(StockUnidad.id).where(StockUnidad.id.in_(ids[inicio:inicio + 900]))
+            ).scalars())
         
+        for unidad_id in ids:
+            if unidad_id not in existentes:
+                resultado["fallidos"] += 1
+                resultado["errores"].append(f"Unidad ID {unidad_id} no encontrada")
+        
+        # 3. Un UPDATE por clave primaria para todo el lote
+        fecha_modificacion = datetime.now().isoformat()
+        filas = [
+            {"id": unidad_id, "fecha_vencimiento": fecha, "fecha_modificacion": fecha_modificacion}
+            for unidad_id, fecha in validos.items() if unidad_id in existentes
+        ]
+        if filas:
+            session.execute(update(StockUnidad), filas)
         session.commit()
+        
+        resultado["exitosos"] = len(filas)
         print(f"Lote procesado: {resultado['exitosos']} exitosos, {resultado['fallidos']} fallidos")
         
         return resultado
@@ -772,4 +1075,4 @@ def actualizar_fechas_vencimiento_lote(cambios_lote):
         resultado["errores"].append(f"Error critico: {e}")
         return resultado
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
@@ -0,0 +1,397 @@
+"""
+Importación en modo fusión: un archivo de proveedor contra el catálogo existente.
+
+importar_csv e importar_excel solo agregan: cada corrida crea productos
+nuevos aunque ya existan, así que las listas de precios periódicas
+multiplican el catálogo. Acá cada producto del archivo (leído y agrupado
+igual que en la importación normal) se busca en un índice en memoria del
+catálogo, armado con una consulta:
+
+- por código de barras: si alguna de sus filas trae un código que ya está en
+  stock_unidades, es el producto de esa unidad;
+- si no, por identidad normalizada: nombre con normalizar_texto, unidad de
+  medida canónica (el diálogo de alta guarda "unidades"/"kilogramos" y el
+  CSV "unidad"/"kg") y el proveedor (los campos de obtener_clave_normalizada
+  que no son precios, justamente lo que cambia entre listas).
+
+Cada producto queda clasificado como:
+
+- alta: no está en el catálogo; se crea con sus unidades, como en la
+  importación normal;
+- actualización: cambió costo, precio, margen o redondeo; se actualizan solo
+  esas columnas. Solo cuentan las columnas que el archivo trae con valor:
+  las vacías tienen los valores por defecto de la importación (margen 0,
+  precio = costo) y pisarían los de la tienda. Si cambia el costo sin margen
+  ni precio se conserva el margen y se recalcula el precio, como en
+  editar_producto_controller. Las unidades del archivo no se agregan: es una
+  lista de precios, no un ingreso de mercadería;
+- sin cambios: no se toca.
+
+planificar_fusion no escribe nada y devuelve el plan con el reporte de
+diferencias (campo por campo, antes y después). aplicar_fusion lo escribe en
+una sola transacción: un UPDATE executemany para las actualizaciones y los
+INSERT masivos de EscritorImportacion para las altas.
+
+Si el archivo trae el mismo producto con precios distintos vale la última
+aparición y las cantidades se suman.
+
+python -m aplicacion.backend.stock.fusion archivo.csv|archivo.xlsx [--aplicar] [--reporte diferencias.csv]
+"""
+from __future__ import annotations
+import csv
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import bindparam, select, update
+
+from aplicacion.backend.database.database import engine, Producto, StockUnidad
+from aplicacion.backend.stock.importacion import (
+    COLUMNAS_PRECIO,
+    EscritorImportacion,
+    bloques_agrupados,
+    fila_producto,
+    preparar_excel,
+    registros_de,
+)
+from aplicacion.backend.stock.importer import normalizar_texto
+from aplicacion.backend.stock.indice_codigos import indice_codigos
+from aplicacion.backend.stock.utils import calcular_margen_con_precio, calcular_precio_con_margen, redondear_precio
+
+# Columnas que una lista de precios puede cambiar en un producto existente
+CAMPOS_PRECIO = ["costo_unitario", "precio_venta", "margen_ganancia", "precio_redondeado", "usa_redondeo"]
+# Otros nombres de la misma unidad de medida (normalizados), como los del diálogo de alta
+UNIDADES_EQUIVALENTES = {
+    "unidades": "unidad",
+    "kilogramos": "kg",
+    "kilogramo": "kg",
+    "kilos": "kg",
+    "kilo": "kg",
+}
+
+
+def unidad_canonica(unidad_medida) -> str:
+    unidad = normalizar_texto(unidad_medida)
+    return UNIDADES_EQUIVALENTES.get(unidad, unidad)
+
+
+def identidad_producto(nombre, unidad_medida, proveedor_id) -> tuple:
+    """Clave de un producto del catálogo sin los campos de precio"""
+    return (
+        normalizar_texto(nombre),
+        unidad_canonica(unidad_medida),
+        int(proveedor_id) if proveedor_id not in (None, "") else None,
+    )
+
+
+def _leer_entrantes(ruta: str) -> Dict[str, Any]:
+    """
+    Productos del archivo con sus columnas finales (como los insertaría la
+    importación normal), los valores de COLUMNAS_PRECIO que trae el archivo y
+    sus unidades.
+
+    Returns:
+        dict: {"productos": {clave: columnas de productos y "provistos": {columna: valor}},
+               "unidades": [{"clave",
+               "codigo_barras", "vencimiento", "fila_idx"}], "fallidos": [str], "filas"}
+    """
+    if ruta.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(ruta, dtype={"codigo_barras": str})
+        preparado = preparar_excel(df)
+        productos = preparado["productos"]
+        provistos = registros_de(preparado["provistos"].reindex(productos.index)[COLUMNAS_PRECIO])
+        return {
+            "productos": {
+                clave: dict(datos, provistos={c: v for c, v in archivo.items() if v is not None})
+                for clave, datos, archivo in zip(productos.index.tolist(), registros_de(productos), provistos)
+            },
+            "unidades": registros_de(preparado["unidades"]),
+            "fallidos": preparado["fallidos"],
+            "filas": len(df),
+        }
+
+    agrupados: Dict[tuple, Dict[str, Any]] = {}
+    unidades: List[Dict[str, Any]] = []
+    fallidos: List[str] = []
+    filas = 0
+    for leidas, bloque in bloques_agrupados(ruta):
+        filas += leidas
+        for clave, datos in bloque["productos"].items():
+            if clave in agrupados:
+                agrupados[clave]["cantidad"] += datos["cantidad"]
+                agrupados[clave]["provistos"].update(datos["provistos"])
+            else:
+                agrupados[clave] = datos
+        unidades.extend(bloque["unidades"])
+        fallidos.extend(bloque["fallidos"])
+    return {
+        "productos": {
+            clave: dict(fila_producto(datos), provistos=datos["provistos"]) for clave, datos in agrupados.items()
+        },
+        "unidades": unidades,
+        "fallidos": fallidos,
+        "filas": filas,
+    }
+
+
+def _por_identidad(productos: Dict[Any, Dict[str, Any]], unidades: List[Dict[str, Any]]):
+    """Reagrupa los productos del archivo por identidad; las unidades pasan a apuntar a la identidad"""
+    agrupados: Dict[tuple, Dict[str, Any]] = {}
+    identidad_de = {}
+    for clave, datos in productos.items():
+        identidad = identidad_producto(datos["nombre"], datos["unidad_medida"], datos["proveedor_id"])
+        identidad_de[clave] = identidad
+        if identidad in agrupados:
+            datos = dict(datos, cantidad=agrupados[identidad]["cantidad"] + datos["cantidad"])
+        agrupados[identidad] = datos
+    for unidad in unidades:
+        unidad["clave"] = identidad_de[unidad["clave"]]
+    return agrupados, unidades
+
+
+def _indice_catalogo(conn) -> Tuple[Dict[tuple, List[Dict[str, Any]]], Dict[int, Dict[str, Any]], Dict[str, int]]:
+    """Productos por identidad y por id, y producto de cada código de barras (dos consultas)"""
+    por_identidad: Dict[tuple, List[Dict[str, Any]]] = {}
+    por_id: Dict[int, Dict[str, Any]] = {}
+    for fila in conn.execute(select(Producto.id, Producto.nombre, Producto.unidad_medida,
+                                    Producto.proveedor_id, *[getattr(Producto, c) for c in CAMPOS_PRECIO])):
+        producto = dict(fila._mapping)
+        por_id[producto["id"]] = producto
+        identidad = identidad_producto(producto["nombre"], producto["unidad_medida"], producto["proveedor_id"])
+        por_identidad.setdefault(identidad, []).append(producto)
+    por_codigo = {
+        codigo: producto_id
+        for codigo, producto_id in conn.execute(select(StockUnidad.codigo_barras, StockUnidad.producto_id))
+        if codigo
+    }
+    return por_identidad, por_id, por_codigo
+
+
+def _distinto(antes, despues) -> bool:
+    if antes is None or despues is None:
+        return antes is not despues
+    if isinstance(despues, bool) or isinstance(antes, bool):
+        return bool(antes) != bool(despues)
+    return round(float(antes), 4) != round(float(despues), 4)
+
+
+def _valores_nuevos(existente: Dict[str, Any], datos: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    CAMPOS_PRECIO que quedaría teniendo `existente` con los valores que trae
+    el archivo (datos["provistos"]); el precio se recalcula únicamente si
+    cambió algo de lo que depende.
+    """
+    provistos = datos["provistos"]
+    costo = provistos.get("costo_unitario", existente["costo_unitario"])
+    usa_redondeo = provistos.get("usa_redondeo", existente["usa_redondeo"])
+    margen, precio = existente["margen_ganancia"], existente["precio_venta"]
+    costo_cambia = _distinto(existente["costo_unitario"], costo)
+
+    if costo is not None and "margen_ganancia" in provistos:
+        if costo_cambia or _distinto(margen, provistos["margen_ganancia"]):
+            margen = provistos["margen_ganancia"]
+            precio = calcular_precio_con_margen(costo, margen)
+    elif costo is not None and "precio_venta" in provistos:
+        if costo_cambia or _distinto(precio, provistos["precio_venta"]):
+            precio = provistos["precio_venta"]
+            margen = calcular_margen_con_precio(costo, precio)
+    elif costo_cambia and margen is not None and margen < 1.0:
+        # Solo cambió el costo: se conserva el margen de la tienda
+        precio = calcular_precio_con_margen(costo, margen)
+
+    redondeado = existente["precio_redondeado"]
+    if precio is not None and (_distinto(existente["precio_venta"], precio)
+                               or _distinto(existente["usa_redondeo"], usa_redondeo)):
+        redondeado = redondear_precio(precio) if usa_redondeo else precio
+    return {
+        "costo_unitario": costo,
+        "precio_venta": precio,
+        "margen_ganancia": margen,
+        "precio_redondeado": redondeado,
+        "usa_redondeo": usa_redondeo,
+    }
+
+
+def planificar_fusion(ruta: str) -> Dict[str, Any]:
+    """
+    Clasifica los productos del archivo contra el catálogo. No escribe nada.
+
+    Returns:
+        dict: {"exito", "ruta", "filas", "altas": {identidad: columnas},
+               "unidades_altas": [unidades de las altas], "actualizaciones":
+               [{"producto_id", "nombre", "valores": {campo: nuevo}}], "sin_cambios",
+               "fallidos": [str], "diferencias": [{"accion", "producto_id", "nombre",
+               "campo", "antes", "despues"}]}
+    """
+    try:
+        entrantes = _leer_entrantes(ruta)
+        productos, unidades = _por_identidad(entrantes["productos"], entrantes["unidades"])
+        with engine.connect() as conn:
+            por_identidad, por_id, por_codigo = _indice_catalogo(conn)
+    except Exception as e:
+        print(f"[ERROR] No se pudo leer {ruta}: {e}")
+        return {"exito": False, "mensaje": str(e)}
+
+    codigos_de: Dict[tuple, List[str]] = {}
+    for unidad in unidades:
+        if unidad["codigo_barras"]:
+            codigos_de.setdefault(unidad["clave"], []).append(unidad["codigo_barras"])
+
+    altas: Dict[tuple, Dict[str, Any]] = {}
+    actualizaciones = []
+    diferencias = []
+    sin_cambios = 0
+    for identidad, datos in productos.items():
+        por_codigo_id = next((por_codigo[c] for c in codigos_de.get(identidad, []) if c in por_codigo), None)
+        existentes = [por_id[por_codigo_id]] if por_codigo_id in por_id else por_identidad.get(identidad, [])
+
+        if not existentes:
+            altas[identidad] = {c: v for c, v in datos.items() if c != "provistos"}
+            diferencias.append({"accion": "alta", "producto_id": None, "nombre": datos["nombre"],
+                                "campo": "cantidad", "antes": None, "despues": datos["cantidad"]})
+            continue
+
+        # Un producto repetido en el catálogo se actualiza en todas sus copias
+        for existente in existentes:
+            nuevos = _valores_nuevos(existente, datos)
+            cambios = {c: nuevos[c] for c in CAMPOS_PRECIO if _distinto(existente[c], nuevos[c])}
+            if not cambios:
+                sin_cambios += 1
+                continue
+            actualizaciones.append({"producto_id": existente["id"], "nombre": existente["nombre"], "valores": cambios})
+            diferencias.extend(
+                {"accion": "actualizacion", "producto_id": existente["id"], "nombre": existente["nombre"],
+                 "campo": campo, "antes": existente[campo], "despues": valor}
+                for campo, valor in cambios.items()
+            )
+
+    return {
+        "exito": True,
+        "ruta": ruta,
+        "filas": entrantes["filas"],
+        "altas": altas,
+        "unidades_altas": [u for u in unidades if u["clave"] in altas],
+        "actualizaciones": actualizaciones,
+        "sin_cambios": sin_cambios,
+        "fallidos": entrantes["fallidos"],
+        "diferencias": diferencias,
+    }
+
+
+def aplicar_fusion(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Escribe un plan de planificar_fusion en una transacción.
+
+    Returns:
+        dict: {"exito", "productos_actualizados", "productos_creados", "unidades_insertadas"}
+    """
+    escritor = EscritorImportacion()
+    escritor.cargar_codigos_existentes()
+    try:
+        with engine.begin() as conn:
+            if plan["actualizaciones"]:
+                # Una sentencia por combinación de campos cambiados, cada una executemany
+                por_campos: Dict[tuple, List[Dict[str, Any]]] = {}
+                for a in plan["actualizaciones"]:
+                    campos = tuple(sorted(a["valores"]))
+                    por_campos.setdefault(campos, []).append(
+                        dict({f"n_{c}": v for c, v in a["valores"].items()}, pid=a["producto_id"])
+                    )
+                for campos, parametros in por_campos.items():
+                    conn.execute(
+                        update(Producto)
+                        .where(Producto.id == bindparam("pid"))
+                        .values({c: bindparam(f"n_{c}") for c in campos}),
+                        parametros
+                    )
+            ids_nuevos, tomados = escritor.escribir_en(conn, plan["altas"], plan["unidades_altas"], preparar=dict)
+        escritor.confirmar(ids_nuevos, tomados, len(plan["unidades_altas"]))
+    except Exception as e:
+        print(f"[ERROR] Fusión deshecha: {e}")
+        return {"exito": False, "mensaje": str(e)}
+    finally:
+        indice_codigos.invalidar()
+
+    return {
+        "exito": True,
+        "productos_actualizados": len(plan["actualizaciones"]),
+        "productos_creados": escritor.productos_creados,
+        "unidades_insertadas": escritor.unidades_insertadas,
+    }
+
+
+def guardar_reporte(plan: Dict[str, Any], ruta: str):
+    """Escribe el reporte de diferencias del plan en un CSV"""
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.DictWriter(f, fieldnames=["accion", "producto_id", "nombre", "campo", "antes", "despues"])
+        escritor.writeheader()
+        escritor.writerows(plan["diferencias"])
+
+
+def _formato(valor) -> str:
+    return str(round(valor, 4)) if isinstance(valor, float) else str(valor)
+
+
+def imprimir_reporte(plan: Dict[str, Any], limite: int = 20):
+    print("\n" + "="*50)
+    print(f"FUSIÓN DE {plan['ruta']}")
+    print("="*50)
+    print(f"→ Filas leídas: {plan['filas']}")
+    print(f"+ Productos nuevos: {len(plan['altas'])} ({len(plan['unidades_altas'])} unidades)")
+    print(f"~ Productos con precios actualizados: {len(plan['actualizaciones'])}")
+    print(f"= Productos sin cambios: {plan['sin_cambios']}")
+    print(f"✗ Filas con error: {len(plan['fallidos'])}")
+    cambios = [d for d in plan["diferencias"] if d["accion"] == "actualizacion"]
+    if cambios:
+        print(f"\n  {'ID':>6}  {'Producto':<30} {'Campo':<18} {'Antes':>10} {'Después':>10}")
+        for d in cambios[:limite]:
+            print(f"  {d['producto_id']:>6}  {str(d['nombre'])[:30]:<30} {d['campo']:<18} "
+                  f"{_formato(d['antes']):>10} {_formato(d['despues']):>10}")
+        if len(cambios) > limite:
+            print(f"  ... y {len(cambios) - limite} cambios más")
+    print("="*50)
+
+
+def fusionar(ruta: str, aplicar: bool = False, reporte: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Planifica la fusión de `ruta`, imprime (y opcionalmente guarda) el reporte
+    de diferencias y, con aplicar=True, la escribe.
+
+    Returns:
+        dict: el plan con "aplicado" y, si se aplicó, el resultado de aplicar_fusion
+    """
+    inicio = time.perf_counter()
+    plan = planificar_fusion(ruta)
+    if not plan["exito"]:
+        return plan
+    imprimir_reporte(plan)
+    if reporte:
+        guardar_reporte(plan, reporte)
+        print(f"Reporte de diferencias guardado en {reporte}")
+
+    plan["aplicado"] = False
+    if aplicar:
+        resultado = aplicar_fusion(plan)
+        plan.update(resultado)
+        plan["aplicado"] = resultado["exito"]
+        if resultado["exito"]:
+            print(f"[INFO] Fusión aplicada: {resultado['productos_actualizados']} productos actualizados, "
+                  f"{resultado['productos_creados']} creados, {resultado['unidades_insertadas']} unidades")
+    plan["segundos"] = time.perf_counter() - inicio
+    return plan
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    if not argumentos or argumentos[0].startswith("--"):
+        print("Uso: python -m aplicacion.backend.stock.fusion archivo.csv|archivo.xlsx "
+              "[--aplicar] [--reporte diferencias.csv]")
+        sys.exit(2)
+    ruta_reporte = argumentos[argumentos.index("--reporte") + 1] if "--reporte" in argumentos else None
+    resultado = fusionar(argumentos[0], aplicar="--aplicar" in argumentos, reporte=ruta_reporte)
+    if not resultado["exito"]:
+        print(f"✗ {resultado['mensaje']}")
+        sys.exit(1)
+    if "--aplicar" not in argumentos:
+        print(f"Para aplicar: python -m aplicacion.backend.stock.fusion {argumentos[0]} --aplicar")
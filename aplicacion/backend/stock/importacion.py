@@ -0,0 +1,568 @@
+"""
+Importación masiva de stock en bloques.
+
+cargar_productos_desde_csv leía el CSV entero a una lista, creaba cada
+producto con agregar_producto_controller (una sesión y un commit por
+producto) y antes de insertar cada unidad hacía un SELECT por su código de
+barras. Acá:
+
+- el archivo se lee de a TAMANO_BLOQUE filas (leer_csv_en_bloques), sin
+  tenerlo entero en memoria;
+- cada bloque se normaliza con importer.procesar_fila_csv y se agrupa por
+  clave normalizada (agrupar_filas); un producto que ya apareció en un
+  bloque anterior solo suma cantidad;
+- EscritorImportacion escribe cada bloque en una transacción: los productos
+  nuevos con un INSERT ... RETURNING de varias filas, las cantidades de los
+  ya creados con un UPDATE executemany y las unidades con un INSERT
+  executemany;
+- la unicidad de los códigos se controla contra un set en memoria con los
+  códigos de stock_unidades (una sola consulta al empezar); los vacíos o
+  repetidos se reemplazan con códigos del asignador, reservados de una vez
+  por bloque.
+
+Si un bloque falla se deshace entero y sus filas cuentan como fallidas; los
+bloques anteriores quedan confirmados.
+
+La normalización de los bloques (bloques_agrupados) puede repartirse en un
+ProcessPoolExecutor (desactivado por defecto, ver PROCESOS_IMPORTACION):
+cada proceso corre agrupar_filas sobre un bloque y los resultados se
+consumen en el orden del archivo, así que el único escritor (el proceso
+principal) hace exactamente lo mismo que con un solo proceso.
+
+El Excel (importar_excel) va por columnas en vez de por filas: la planilla
+se lee entera con pandas, preparar_excel convierte tipos, completa margen o
+precio y calcula precio_venta/precio_redondeado sobre columnas enteras, y un
+groupby sobre la clave normalizada da los productos y sus cantidades. Los
+marcos resultantes se escriben con el mismo EscritorImportacion, cortados
+para que cada transacción lleve unas TAMANO_BLOQUE unidades.
+"""
+from __future__ import annotations
+import csv
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, List, Iterator, Set, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, insert, select, update
+
+from aplicacion.backend.database.database import engine, Producto, StockUnidad
+from aplicacion.backend.stock.codigos import asignador_codigos
+from aplicacion.backend.stock.controller import preparar_datos_producto
+from aplicacion.backend.stock.importer import VALORES_VACIOS, normalizar_texto, procesar_fila_csv
+from aplicacion.backend.stock.indice_codigos import indice_codigos
+
+# Filas por bloque (y por transacción)
+TAMANO_BLOQUE = 5000
+# Procesos que normalizan bloques mientras el principal escribe; 1 = sin pool.
+# Sin pool por defecto: medido con bench_importacion, 100k filas tardaron
+# 6.92 s en un proceso y 9.23 s con 2. Subirlo solo con una medición en
+# varios núcleos que lo respalde.
+PROCESOS_IMPORTACION = 1
+
+# Columnas que tiene que traer la planilla de Excel
+COLUMNAS_EXCEL = ["nombre", "unidad_medida", "costo_unitario", "precio_venta", "margen_ganancia",
+                  "usa_redondeo", "proveedor_id", "categoria_id"]
+# Como clasificar_producto_por_unidad
+UNIDADES_DIVISIBLES = ["g", "kg", "ml", "l"]
+# Columnas de precio que una fila puede traer vacías (se completan con valores por defecto)
+COLUMNAS_PRECIO = ["costo_unitario", "precio_venta", "margen_ganancia", "usa_redondeo"]
+
+
+def leer_csv_en_bloques(ruta: str, tamano_bloque: int = TAMANO_BLOQUE) -> Iterator[List[Dict[str, str]]]:
+    """Filas del CSV (sin la columna "cantidad") de a `tamano_bloque`"""
+    with open(ruta, newline='', encoding='utf-8') as csvfile:
+        lector = csv.DictReader(csvfile)
+        while True:
+            bloque = list(islice(lector, tamano_bloque))
+            if not bloque:
+                return
+            for fila in bloque:
+                fila.pop("cantidad", None)
+            yield bloque
+
+
+def agrupar_filas(filas: List[Dict[str, Any]], primera_fila: int = 1) -> Dict[str, Any]:
+    """
+    Normaliza un bloque de filas y agrupa los productos por clave. No toca la base.
+
+    Returns:
+        dict: {"productos": {clave: datos con "cantidad" y "provistos" ({columna:
+               valor} de las COLUMNAS_PRECIO que vinieron con valor en el archivo)},
+               "unidades": [{"clave", "codigo_barras", "vencimiento", "fila_idx"}],
+               "fallidos": [str], "productos_kg", "productos_unidad"}
+    """
+    productos: Dict[tuple, Dict[str, Any]] = {}
+    unidades = []
+    fallidos = []
+    productos_kg = productos_unidad = 0
+    for idx, fila in enumerate(filas, start=primera_fila):
+        try:
+            procesada = procesar_fila_csv(fila, idx)
+        except Exception as e:
+            fallidos.append(f"Fila {idx}: {str(e)[:50]}")
+            continue
+
+        clave = procesada["clave"]
+        provistos = {
+            c: procesada["producto"][c] for c in COLUMNAS_PRECIO
+            if str(fila.get(c) or "").strip() not in VALORES_VACIOS
+        }
+        if procesada["producto"]["unidad_medida"] == "kg":
+            productos_kg += 1
+        else:
+            productos_unidad += 1
+        if clave in productos:
+            productos[clave]["cantidad"] += 1
+            productos[clave]["provistos"].update(provistos)
+        else:
+            productos[clave] = dict(procesada["producto"], cantidad=1, provistos=provistos)
+        unidades.append({
+            "clave": clave,
+            "codigo_barras": procesada["codigo_barras"],
+            "vencimiento": procesada["vencimiento"],
+            "fila_idx": idx,
+        })
+    return {
+        "productos": productos,
+        "unidades": unidades,
+        "fallidos": fallidos,
+        "productos_kg": productos_kg,
+        "productos_unidad": productos_unidad,
+    }
+
+
+def bloques_agrupados(ruta: str, tamano_bloque: int = TAMANO_BLOQUE,
+                      procesos: int = PROCESOS_IMPORTACION) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    (filas leídas, agrupar_filas del bloque) para cada bloque del CSV, en el
+    orden del archivo. Con procesos > 1 los bloques se agrupan en un
+    ProcessPoolExecutor con a lo sumo 2 bloques por proceso en vuelo, para
+    no tener el archivo entero en memoria.
+    """
+    bloques = leer_csv_en_bloques(ruta, tamano_bloque)
+    primera_fila = 1
+    if procesos <= 1:
+        for filas in bloques:
+            yield len(filas), agrupar_filas(filas, primera_fila)
+            primera_fila += len(filas)
+        return
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        en_vuelo = deque()
+        for filas in bloques:
+            en_vuelo.append((len(filas), pool.submit(agrupar_filas, filas, primera_fila)))
+            primera_fila += len(filas)
+            if len(en_vuelo) >= 2 * procesos:
+                leidas, futuro = en_vuelo.popleft()
+                yield leidas, futuro.result()
+        while en_vuelo:
+            leidas, futuro = en_vuelo.popleft()
+            yield leidas, futuro.result()
+
+
+def fila_producto(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnas de productos para un producto agrupado, calculadas como en agregar_producto_controller"""
+    datos = dict(data)
+    # Redondeo final para insertar
+    if datos["precio_venta"] is not None:
+        datos["precio_venta"] = round(datos["precio_venta"], 2)
+    if datos["margen_ganancia"] is not None:
+        datos["margen_ganancia"] = round(datos["margen_ganancia"], 4)
+    preparar_datos_producto(datos)
+    return {
+        "nombre": datos["nombre"],
+        "unidad_medida": datos["unidad_medida"],
+        "cantidad": datos["cantidad"],
+        "costo_unitario": datos["costo_unitario"],
+        "precio_venta": datos["precio_venta"],
+        "precio_redondeado": datos.get("precio_redondeado"),
+        "usa_redondeo": datos["usa_redondeo"],
+        "margen_ganancia": datos["margen_ganancia"],
+        "es_divisible": datos["es_divisible"],
+        "proveedor_id": datos["proveedor_id"],
+        "categoria_id": datos["categoria_id"],
+    }
+
+
+class EscritorImportacion:
+    """Escribe bloques agrupados; recuerda el id de cada clave y los códigos ya usados"""
+
+    def __init__(self):
+        self.productos_por_clave: Dict[Any, int] = {}
+        self.codigos_usados: Set[str] = set()
+        self.productos_creados = 0
+        self.unidades_insertadas = 0
+        self.fecha = datetime.now().date().isoformat()
+
+    def cargar_codigos_existentes(self):
+        with engine.connect() as conn:
+            self.codigos_usados = {c for (c,) in conn.execute(select(StockUnidad.codigo_barras)) if c}
+
+    def _asignar_codigos(self, conn, unidades: List[Dict[str, Any]]) -> Set[str]:
+        """Deja un código único en cada unidad; devuelve los códigos tomados en este bloque"""
+        tomados: Set[str] = set()
+        pendientes = []
+        for unidad in unidades:
+            codigo = unidad["codigo_barras"]
+            if not codigo or codigo in self.codigos_usados or codigo in tomados:
+                pendientes.append(unidad)
+            else:
+                tomados.add(codigo)
+
+        # Códigos del asignador; alguno podría coincidir con un código viejo cargado a mano
+        while pendientes:
+            siguen = []
+            for unidad, codigo in zip(pendientes, asignador_codigos.reservar(len(pendientes), conn)):
+                if codigo in self.codigos_usados or codigo in tomados:
+                    siguen.append(unidad)
+                else:
+                    unidad["codigo_barras"] = codigo
+                    tomados.add(codigo)
+            pendientes = siguen
+        return tomados
+
+    def escribir_bloque(self, productos: Dict[Any, Dict[str, Any]], unidades: List[Dict[str, Any]],
+                        preparar: Callable[[Dict[str, Any]], Dict[str, Any]] = fila_producto):
+        """
+        Inserta/actualiza los productos del bloque y sus unidades en una transacción.
+        `preparar` arma las columnas de productos de cada producto nuevo (los
+        datos agrupados traen además "cantidad": las filas del bloque).
+        """
+        with engine.begin() as conn:
+            ids_nuevos, tomados = self.escribir_en(conn, productos, unidades, preparar)
+        self.confirmar(ids_nuevos, tomados, len(unidades))
+
+    def escribir_en(self, conn, productos: Dict[Any, Dict[str, Any]], unidades: List[Dict[str, Any]],
+                    preparar: Callable[[Dict[str, Any]], Dict[str, Any]] = fila_producto):
+        """
+        Lo mismo que escribir_bloque dentro de una transacción del llamador.
+        Devuelve (ids nuevos por clave, códigos tomados) para pasarle a
+        confirmar() una vez hecho el commit.
+        """
+        ids_nuevos: Dict[Any, int] = {}
+        nuevas = [clave for clave in productos if clave not in self.productos_por_clave]
+        if nuevas:
+            ids = conn.execute(
+                insert(Producto).returning(Producto.id, sort_by_parameter_order=True),
+                [preparar(productos[clave]) for clave in nuevas]
+            ).scalars().all()
+            ids_nuevos = dict(zip(nuevas, ids))
+
+        sumas = [
+            {"pid": self.productos_por_clave[clave], "n": data["cantidad"]}
+            for clave, data in productos.items() if clave in self.productos_por_clave
+        ]
+        if sumas:
+            conn.execute(
+                update(Producto)
+                .where(Producto.id == bindparam("pid"))
+                .values(cantidad=Producto.cantidad + bindparam("n")),
+                sumas
+            )
+
+        filas = [
+            {
+                "producto_id": ids_nuevos.get(u["clave"]) or self.productos_por_clave[u["clave"]],
+                "codigo_barras": u["codigo_barras"],
+                "estado": "activo",
+                "fecha_ingreso": self.fecha,
+                "fecha_modificacion": self.fecha,
+                "fecha_vencimiento": u["vencimiento"],
+            }
+            for u in unidades
+        ]
+        tomados = self._asignar_codigos(conn, filas)
+        if filas:
+            conn.execute(insert(StockUnidad), filas)
+        return ids_nuevos, tomados
+
+    def confirmar(self, ids_nuevos: Dict[Any, int], tomados: Set[str], unidades: int):
+        """Solo después del commit: un bloque deshecho no deja ids ni códigos"""
+        self.productos_por_clave.update(ids_nuevos)
+        self.codigos_usados |= tomados
+        self.productos_creados += len(ids_nuevos)
+        self.unidades_insertadas += unidades
+
+
+def _resumen_inicial() -> Dict[str, Any]:
+    return {
+        "exito": True,
+        "filas": 0,
+        "productos_creados": 0,
+        "unidades_insertadas": 0,
+        "fallidos": 0,
+        "fallidos_detalle": [],
+        "productos_kg": 0,
+        "productos_unidad": 0,
+        "segundos": 0.0,
+    }
+
+
+def _imprimir_resumen(resumen: Dict[str, Any]):
+    print("\n" + "="*50)
+    print("RESUMEN DE IMPORTACIÓN")
+    print("="*50)
+    print(f"✓ Productos únicos creados: {resumen['productos_creados']}")
+    print(f"✓ Unidades físicas insertadas: {resumen['unidades_insertadas']}")
+    print(f"✗ Fallos totales: {resumen['fallidos']}")
+    print(f"→ Total de filas procesadas: {resumen['filas']}")
+    print(f"→ Productos tipo 'kg': {resumen['productos_kg']}, tipo 'unidad': {resumen['productos_unidad']}")
+    print(f"→ Tiempo: {resumen['segundos']:.1f} s")
+    if resumen["fallidos_detalle"]:
+        print("\n  Primeros errores:")
+        for error in resumen["fallidos_detalle"][:10]:
+            print(f"    • {error}")
+    print("="*50)
+
+
+def importar_csv(ruta: str, tamano_bloque: int = TAMANO_BLOQUE,
+                 procesos: int = PROCESOS_IMPORTACION) -> Dict[str, Any]:
+    """
+    Importa un CSV de stock (formato de generar_csv_stock_masivo) en bloques,
+    normalizados en `procesos` procesos (ver bloques_agrupados).
+
+    Returns:
+        dict: {"exito", "filas", "productos_creados", "unidades_insertadas",
+               "fallidos", "fallidos_detalle", "productos_kg", "productos_unidad", "segundos"}
+    """
+    inicio = time.perf_counter()
+    resumen = _resumen_inicial()
+
+    print("\n" + "="*50)
+    print("INICIANDO IMPORTACIÓN DE CSV")
+    print("="*50)
+
+    escritor = EscritorImportacion()
+    escritor.cargar_codigos_existentes()
+    print(f"→ Códigos de barras existentes en BD: {len(escritor.codigos_usados)}")
+
+    try:
+        for leidas, bloque in bloques_agrupados(ruta, tamano_bloque, procesos):
+            resumen["filas"] += leidas
+            resumen["productos_kg"] += bloque["productos_kg"]
+            resumen["productos_unidad"] += bloque["productos_unidad"]
+            resumen["fallidos"] += len(bloque["fallidos"])
+            resumen["fallidos_detalle"].extend(bloque["fallidos"])
+            try:
+                escritor.escribir_bloque(bloque["productos"], bloque["unidades"])
+            except Exception as e:
+                resumen["fallidos"] += len(bloque["unidades"])
+                resumen["fallidos_detalle"].append(
+                    f"Filas {resumen['filas'] - leidas + 1}-{resumen['filas']}: {str(e)[:100]}"
+                )
+                print(f"[ERROR] Bloque de filas hasta {resumen['filas']} deshecho: {e}")
+                continue
+            print(f"  [{resumen['filas']}] filas procesadas, {escritor.productos_creados} productos, "
+                  f"{escritor.unidades_insertadas} unidades...")
+    except Exception as e:
+        resumen["exito"] = False
+        resumen["mensaje"] = str(e)
+        print(f"[ERROR CRÍTICO] No se pudo leer {ruta}: {e}")
+    finally:
+        indice_codigos.invalidar()
+
+    resumen["productos_creados"] = escritor.productos_creados
+    resumen["unidades_insertadas"] = escritor.unidades_insertadas
+    resumen["segundos"] = time.perf_counter() - inicio
+    _imprimir_resumen(resumen)
+    return resumen
+
+
+# ---- Excel ----
+
+def _texto(columna: pd.Series) -> pd.Series:
+    """Columna como texto sin espacios; vacíos y NaN quedan en <NA>"""
+    texto = columna.astype("string").str.strip()
+    return texto.mask(texto.isin(VALORES_VACIOS))
+
+
+def _entero(columna: pd.Series) -> pd.Series:
+    """Columna de ids: números truncados como int(), lo demás <NA>"""
+    return np.trunc(pd.to_numeric(columna, errors="coerce")).astype("Int64")
+
+
+def _normalizada(columna: pd.Series) -> pd.Series:
+    """normalizar_texto una vez por texto distinto, no por fila"""
+    unicos = columna.unique()
+    return columna.map(dict(zip(unicos, map(normalizar_texto, unicos))))
+
+
+def registros_de(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Filas como diccionarios con tipos de Python y None en lugar de NaN/<NA>"""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def preparar_excel(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Convierte una planilla de stock en productos agrupados y unidades, por
+    columnas. No toca la base.
+
+    Returns:
+        dict: {"productos": DataFrame indexado por clave (0..n-1) con las columnas
+               de productos y "cantidad", "unidades": DataFrame ordenado por clave
+               ("clave", "codigo_barras", "vencimiento", "fila_idx"), "provistos":
+               DataFrame por clave con las COLUMNAS_PRECIO tal como vinieron en la
+               planilla (<NA> si vinieron vacías), "fallidos": [str], "productos_kg",
+               "productos_unidad"}
+    Raises:
+        ValueError: si faltan columnas obligatorias
+    """
+    faltantes = [c for c in COLUMNAS_EXCEL if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el Excel: {', '.join(faltantes)}")
+    df = df.reset_index(drop=True)
+    fila_idx = pd.Series(df.index + 1, index=df.index)
+
+    nombre = _texto(df["nombre"])
+    unidad = _texto(df["unidad_medida"])
+    costo = pd.to_numeric(df["costo_unitario"], errors="coerce")
+    precio = pd.to_numeric(df["precio_venta"], errors="coerce")
+    margen = pd.to_numeric(df["margen_ganancia"], errors="coerce")
+    redondeo = _texto(df["usa_redondeo"]).str.lower()
+    provistos = pd.DataFrame({
+        "costo_unitario": costo,
+        "precio_venta": precio,
+        "margen_ganancia": margen,
+        "usa_redondeo": redondeo.eq("true").astype("boolean").mask(redondeo.isna()),
+    })
+
+    # Si falta el margen se calcula con el precio (precio 0 => margen 0) y al revés
+    sin_margen = margen.isna() & precio.notna()
+    margen = margen.mask(sin_margen, ((precio - costo) / precio.replace(0, np.nan)).round(4).fillna(0.0))
+    sin_precio = precio.isna() & margen.notna()
+    precio = precio.mask(sin_precio, (costo / (1 - margen).replace(0, np.nan)).round(2).fillna(0.0))
+
+    motivo = pd.Series(pd.NA, index=df.index, dtype="string")
+    motivo = motivo.mask(margen >= 1, "El margen debe ser menor a 1")
+    motivo = motivo.mask(unidad.isna(), "Sin unidad de medida")
+    motivo = motivo.mask(costo.isna(), "Costo unitario inválido")
+    motivo = motivo.mask(nombre.isna(), "Sin nombre")
+    validas = motivo.isna()
+
+    filas = pd.DataFrame({
+        "nombre": nombre,
+        "unidad_medida": unidad,
+        "costo_unitario": costo,
+        "precio_venta": precio.round(2),
+        "margen_ganancia": margen.round(4),
+        "usa_redondeo": redondeo.eq("true").fillna(False).astype(bool),
+        "proveedor_id": _entero(df["proveedor_id"]),
+        "categoria_id": _entero(df["categoria_id"]),
+    })[validas]
+
+    # Una clave por combinación de campos normalizados; sort=False numera en orden de aparición
+    clave = filas.assign(
+        nombre=_normalizada(filas["nombre"]),
+        unidad_medida=_normalizada(filas["unidad_medida"]),
+        costo_unitario=filas["costo_unitario"].round(4),
+    ).groupby(list(filas.columns), sort=False, dropna=False).ngroup()
+
+    primeras = ~clave.duplicated()
+    productos = filas[primeras].set_axis(clave[primeras].to_numpy())
+    productos["cantidad"] = clave.value_counts()
+
+    # Lo mismo que preparar_datos_producto, sobre la columna entera
+    con_margen = productos["margen_ganancia"].notna()
+    venta = productos["costo_unitario"] / (1 - productos["margen_ganancia"])
+    productos["precio_venta"] = venta.where(con_margen, productos["precio_venta"])
+    productos["precio_redondeado"] = np.ceil(venta).where(productos["usa_redondeo"], venta).where(con_margen)
+    productos["es_divisible"] = productos["unidad_medida"].str.lower().isin(UNIDADES_DIVISIBLES)
+
+    if "codigo_barras" in df.columns:
+        codigos = _texto(df["codigo_barras"]).str.replace(r"\.0$", "", regex=True)
+    else:
+        codigos = pd.Series(pd.NA, index=df.index, dtype="string")
+    columna_fecha = next((c for c in ("fecha_vencimiento", "vencimiento") if c in df.columns), None)
+    if columna_fecha:
+        vencimiento = pd.to_datetime(df[columna_fecha], errors="coerce", format="ISO8601").dt.strftime("%Y-%m-%d")
+    else:
+        vencimiento = pd.Series(None, index=df.index, dtype=object)
+
+    unidades = pd.DataFrame({
+        "clave": clave,
+        "codigo_barras": codigos[validas],
+        "vencimiento": vencimiento[validas],
+        "fila_idx": fila_idx[validas],
+    }).sort_values("clave", kind="stable")
+
+    es_kg = filas["unidad_medida"].str.lower().eq("kg")
+    return {
+        "productos": productos,
+        "unidades": unidades,
+        "provistos": provistos[validas].groupby(clave).first(),
+        "fallidos": [f"Fila {i}: {m}" for i, m in zip(fila_idx[~validas], motivo[~validas])],
+        "productos_kg": int(es_kg.sum()),
+        "productos_unidad": int((~es_kg).sum()),
+    }
+
+
+def importar_excel(ruta: str, tamano_bloque: int = TAMANO_BLOQUE) -> Dict[str, Any]:
+    """
+    Importa una planilla de stock (.xlsx) con preparar_excel; cada transacción
+    lleva productos enteros hasta juntar unas `tamano_bloque` unidades.
+
+    Returns:
+        dict: el mismo resumen que importar_csv
+    """
+    inicio = time.perf_counter()
+    resumen = _resumen_inicial()
+
+    print("\n" + "="*50)
+    print("INICIANDO IMPORTACIÓN DE EXCEL")
+    print("="*50)
+
+    escritor = EscritorImportacion()
+    escritor.cargar_codigos_existentes()
+    print(f"→ Códigos de barras existentes en BD: {len(escritor.codigos_usados)}")
+
+    try:
+        # Los códigos como texto: leídos como número pierden ceros a la izquierda
+        df = pd.read_excel(ruta, dtype={"codigo_barras": str})
+        preparado = preparar_excel(df)
+        resumen["filas"] = len(df)
+        resumen["productos_kg"] = preparado["productos_kg"]
+        resumen["productos_unidad"] = preparado["productos_unidad"]
+        resumen["fallidos"] = len(preparado["fallidos"])
+        resumen["fallidos_detalle"].extend(preparado["fallidos"])
+
+        productos = preparado["productos"]
+        unidades = preparado["unidades"]
+        claves = unidades["clave"].to_numpy()
+        # Bloque de cada producto según las unidades acumuladas; un producto no se parte
+        bloque_de = (productos["cantidad"].cumsum().to_numpy() - 1) // tamano_bloque
+        cortes = np.flatnonzero(np.diff(bloque_de)) + 1
+        for desde, hasta in zip(np.r_[0, cortes], np.r_[cortes, len(productos)]):
+            if desde == hasta:
+                continue
+            bloque = productos.iloc[desde:hasta]
+            u_desde, u_hasta = np.searchsorted(claves, [desde, hasta])
+            bloque_unidades = registros_de(unidades.iloc[u_desde:u_hasta])
+            try:
+                escritor.escribir_bloque(
+                    dict(zip(bloque.index.tolist(), registros_de(bloque))), bloque_unidades, preparar=dict
+                )
+            except Exception as e:
+                resumen["fallidos"] += len(bloque_unidades)
+                filas_bloque = [u["fila_idx"] for u in bloque_unidades]
+                resumen["fallidos_detalle"].append(
+                    f"Filas {min(filas_bloque)}-{max(filas_bloque)}: {str(e)[:100]}"
+                )
+                print(f"[ERROR] Bloque de {len(bloque_unidades)} unidades deshecho: {e}")
+                continue
+            print(f"  {escritor.productos_creados} productos, {escritor.unidades_insertadas} unidades...")
+    except Exception as e:
+        resumen["exito"] = False
+        resumen["mensaje"] = str(e)
+        print(f"[ERROR CRÍTICO] No se pudo importar {ruta}: {e}")
+    finally:
+        indice_codigos.invalidar()
+
+    resumen["productos_creados"] = escritor.productos_creados
+    resumen["unidades_insertadas"] = escritor.unidades_insertadas
+    resumen["segundos"] = time.perf_counter() - inicio
+    _imprimir_resumen(resumen)
+    return resumen
@@ -0,0 +1,128 @@
+"""
+Índice en memoria de códigos de barras para el escáner del punto de venta.
+
+Mantiene un diccionario codigo_barras -> unidad activa, así cada escaneo
+se resuelve con una sola consulta al dict en lugar de recorrer todos los
+productos y todas sus unidades. Si el código no está en memoria (por
+ejemplo, unidades insertadas por el importador con SQL directo) se consulta
+la base usando el índice único de stock_unidades.codigo_barras.
+
+Las unidades con estado NULL (cargadas antes de que crear_unidad guardara
+el estado) se consideran activas.
+"""
+from __future__ import annotations
+import threading
+from typing import Optional, Dict
+
+from sqlalchemy import text
+
+from aplicacion.backend.database.database import SessionLocal
+
+
+class IndiceCodigos:
+    """Cache codigo_barras -> {"unidad_id", "producto_id", "codigo_barras"} de unidades activas"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._por_codigo: Dict[str, Dict[str, object]] = {}
+        self._cargado = False
+
+    def cargar(self) -> int:
+        """Carga todas las unidades activas en memoria con una sola consulta"""
+        session = SessionLocal()
+        try:
+            filas = session.execute(
+                text(
+                    "SELECT id, producto_id, codigo_barras FROM stock_unidades "
+                    "WHERE COALESCE(estado, 'activo') = 'activo' "
+                    "AND codigo_barras IS NOT NULL AND codigo_barras != ''"
+                )
+            ).fetchall()
+        finally:
+            session.close()
+
+        with self._lock:
+            self._por_codigo = {
+                codigo: {"unidad_id": uid, "producto_id": pid, "codigo_barras": codigo}
+                for uid, pid, codigo in filas
+            }
+            self._cargado = True
+            return len(self._por_codigo)
+
+    def _buscar_en_db(self, codigo: str) -> Optional[Dict[str, object]]:
+        session = SessionLocal()
+        try:
+            fila = session.execute(
+                text(
+                    "SELECT id, producto_id, codigo_barras FROM stock_unidades "
+                    "WHERE codigo_barras = :codigo AND COALESCE(estado, 'activo') = 'activo' LIMIT 1"
+                ),
+                {"codigo": codigo}
+            ).first()
+        finally:
+            session.close()
+
+        if not fila:
+            return None
+        return {"unidad_id": fila[0], "producto_id": fila[1], "codigo_barras": fila[2]}
+
+    def buscar(self, codigo: str) -> Optional[Dict[str, object]]:
+        """Devuelve la unidad activa con ese código exacto, o None"""
+        codigo = (codigo or "").strip()
+        if not codigo:
+            return None
+
+        with self._lock:
+            if not self._cargado:
+                self.cargar()
+            encontrado = self._por_codigo.get(codigo)
+        if encontrado:
+            return dict(encontrado)
+
+        # No se cachean los fallos: el código puede aparecer más tarde
+        encontrado = self._buscar_en_db(codigo)
+        if encontrado:
+            with self._lock:
+                self._por_codigo[codigo] = encontrado
+            return dict(encontrado)
+        return None
+
+    def registrar(self, codigo: str, unidad_id: int, producto_id: int):
+        """Agrega (o reactiva) una unidad en el índice"""
+        if not codigo:
+            return
+        with self._lock:
+            if self._cargado:
+                self._por_codigo[codigo] = {
+                    "unidad_id": unidad_id,
+                    "producto_id": producto_id,
+                    "codigo_barras": codigo,
+                }
+
+    def quitar(self, codigo: str):
+        """Saca una unidad del índice (desactivada o eliminada)"""
+        if not codigo:
+            return
+        with self._lock:
+            self._por_codigo.pop(codigo, None)
+
+    def quitar_producto(self, producto_id: int):
+        """Saca todas las unidades de un producto"""
+        with self._lock:
+            self._por_codigo = {
+                c: u for c, u in self._por_codigo.items() if u["producto_id"] != producto_id
+            }
+
+    def invalidar(self):
+        """Fuerza una recarga completa en la próxima búsqueda"""
+        with self._lock:
+            self._por_codigo = {}
+            self._cargado = False
+
+
+# Instancia compartida por todo el proceso
+indice_codigos = IndiceCodigos()
+
+
+def buscar_unidad_por_codigo(codigo: str) -> Optional[Dict[str, object]]:
+    return indice_codigos.buscar(codigo)
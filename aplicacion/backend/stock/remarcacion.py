@@ -0,0 +1,267 @@
+"""
+Remarcación masiva de precios por categoría, proveedor o ids.
+
+Para subir un 10% los costos de un proveedor había que editar producto por
+producto (editar_producto_controller: varias consultas y un commit cada
+uno). Acá los productos afectados se cargan con una consulta en arreglos
+de NumPy y las reglas se aplican sobre el arreglo entero:
+
+- aumento_costo: el costo se multiplica por (1 + aumento_costo);
+- margen: margen fijo para todos; si no se da se conserva el de cada
+  producto (o se calcula con calcular_margen_con_precio si no tiene);
+- margen_minimo: los márgenes por debajo suben a ese piso;
+- precio_venta = costo / (1 - margen), como calcular_precio_con_margen;
+- precio_redondeado con la misma semántica que redondear_precio(precio,
+  modo_redondeo) ("superior" = ceil por defecto) en los productos con
+  usa_redondeo; en el resto queda igual al precio, como al darlos de alta.
+
+planificar_remarcacion no escribe nada y devuelve la vista previa con el
+antes y el después de cada producto que cambia; aplicar_remarcacion
+escribe todos con un único UPDATE executemany.
+
+python -m aplicacion.backend.stock.remarcacion [--categoria ID] [--proveedor ID]
+       [--costo PORCENTAJE] [--margen M] [--margen-minimo M] [--redondeo MODO] [--aplicar]
+"""
+from __future__ import annotations
+import sys
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+
+from aplicacion.backend.database.database import engine, Producto
+from aplicacion.backend.stock.utils import calcular_margen_con_precio
+
+# Como redondear_precio; cualquier otro modo deja el precio sin redondear
+REDONDEOS = {
+    "superior": np.ceil,
+    "inferior": np.floor,
+    "entero": np.round,     # mitades al par, igual que round()
+}
+
+
+def redondear_precios(precios: np.ndarray, modo: str = "superior") -> np.ndarray:
+    """redondear_precio sobre un arreglo"""
+    funcion = REDONDEOS.get(modo)
+    return funcion(precios) if funcion else precios.copy()
+
+
+def cargar_productos(categoria_id=None, proveedor_id=None, ids: Optional[List[int]] = None) -> Dict[str, np.ndarray]:
+    """
+    Productos a remarcar (todos si no hay filtros) como arreglos paralelos;
+    los valores nulos quedan en NaN.
+    """
+    consulta = select(Producto.id, Producto.nombre, Producto.costo_unitario, Producto.margen_ganancia,
+                      Producto.precio_venta, Producto.precio_redondeado, Producto.usa_redondeo)
+    if categoria_id is not None:
+        consulta = consulta.where(Producto.categoria_id == categoria_id)
+    if proveedor_id is not None:
+        consulta = consulta.where(Producto.proveedor_id == proveedor_id)
+    if ids is not None:
+        consulta = consulta.where(Producto.id.in_(ids))
+
+    with engine.connect() as conn:
+        filas = conn.execute(consulta.order_by(Producto.id)).all()
+
+    columnas = list(zip(*filas)) if filas else [()] * 7
+
+    def _numeros(valores):
+        return np.array([np.nan if v is None else v for v in valores], dtype=float)
+
+    return {
+        "id": np.array(columnas[0], dtype=np.int64),
+        "nombre": np.array(columnas[1], dtype=object),
+        "costo_unitario": _numeros(columnas[2]),
+        "margen_ganancia": _numeros(columnas[3]),
+        "precio_venta": _numeros(columnas[4]),
+        "precio_redondeado": _numeros(columnas[5]),
+        "usa_redondeo": np.array([bool(v) for v in columnas[6]], dtype=bool),
+    }
+
+
+def calcular_remarcacion(productos: Dict[str, np.ndarray], aumento_costo: float = 0.0,
+                         margen: Optional[float] = None, margen_minimo: Optional[float] = None,
+                         modo_redondeo: str = "superior") -> Dict[str, np.ndarray]:
+    """
+    Aplica las reglas a los arreglos de cargar_productos. No toca la base.
+
+    Returns:
+        dict: {"costo_unitario", "margen_ganancia", "precio_venta", "precio_redondeado",
+               "valido"}: valores nuevos; "valido" es False donde no hay costo o
+               el margen resultante es >= 1 (calcular_precio_con_margen lo rechaza)
+    """
+    costo = productos["costo_unitario"] * (1 + aumento_costo)
+
+    if margen is not None:
+        nuevo_margen = np.full(len(costo), float(margen))
+    else:
+        nuevo_margen = productos["margen_ganancia"].copy()
+        # Sin margen guardado: el que dan el costo y el precio actuales, como al editar
+        sin_margen = np.flatnonzero(np.isnan(nuevo_margen) & ~np.isnan(productos["precio_venta"])
+                                    & ~np.isnan(productos["costo_unitario"]))
+        nuevo_margen[sin_margen] = [
+            calcular_margen_con_precio(productos["costo_unitario"][i], productos["precio_venta"][i])
+            for i in sin_margen
+        ]
+    if margen_minimo is not None:
+        nuevo_margen = np.fmax(nuevo_margen, margen_minimo)
+
+    valido = ~np.isnan(costo) & ~np.isnan(nuevo_margen) & (nuevo_margen < 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precio = np.where(valido, costo / (1 - nuevo_margen), np.nan)
+    redondeado = np.where(productos["usa_redondeo"], redondear_precios(precio, modo_redondeo), precio)
+
+    return {
+        "costo_unitario": costo,
+        "margen_ganancia": nuevo_margen,
+        "precio_venta": precio,
+        "precio_redondeado": redondeado,
+        "valido": valido,
+    }
+
+
+def _distintos(antes: np.ndarray, despues: np.ndarray) -> np.ndarray:
+    return ~np.isclose(antes, despues, rtol=0, atol=1e-9) & ~(np.isnan(antes) & np.isnan(despues))
+
+
+def planificar_remarcacion(categoria_id=None, proveedor_id=None, ids: Optional[List[int]] = None,
+                           aumento_costo: float = 0.0, margen: Optional[float] = None,
+                           margen_minimo: Optional[float] = None,
+                           modo_redondeo: str = "superior") -> Dict[str, Any]:
+    """
+    Vista previa de una remarcación. No escribe nada.
+
+    Returns:
+        dict: {"exito", "evaluados", "cambios": [{"id", "nombre", "costo_antes",
+               "costo_despues", "margen_antes", "margen_despues", "precio_antes",
+               "precio_despues", "redondeado_antes", "redondeado_despues"}],
+               "omitidos": [{"id", "nombre", "motivo"}]}
+    """
+    if margen is not None and margen >= 1.0:
+        return {"exito": False, "mensaje": "El margen debe ser menor a 1 (representa porcentaje de ganancia sobre el precio final)."}
+    try:
+        productos = cargar_productos(categoria_id, proveedor_id, ids)
+    except Exception as e:
+        print(f"[ERROR] No se pudieron cargar los productos a remarcar: {e}")
+        return {"exito": False, "mensaje": str(e)}
+
+    nuevos = calcular_remarcacion(productos, aumento_costo, margen, margen_minimo, modo_redondeo)
+    valido = nuevos["valido"]
+    cambia = valido & (
+        _distintos(productos["costo_unitario"], nuevos["costo_unitario"])
+        | _distintos(productos["margen_ganancia"], nuevos["margen_ganancia"])
+        | _distintos(productos["precio_venta"], nuevos["precio_venta"])
+        | _distintos(productos["precio_redondeado"], nuevos["precio_redondeado"])
+    )
+
+    def _valor(arreglo, i):
+        return None if np.isnan(arreglo[i]) else float(arreglo[i])
+
+    cambios = [
+        {
+            "id": int(productos["id"][i]),
+            "nombre": productos["nombre"][i],
+            "costo_antes": _valor(productos["costo_unitario"], i),
+            "costo_despues": _valor(nuevos["costo_unitario"], i),
+            "margen_antes": _valor(productos["margen_ganancia"], i),
+            "margen_despues": _valor(nuevos["margen_ganancia"], i),
+            "precio_antes": _valor(productos["precio_venta"], i),
+            "precio_despues": _valor(nuevos["precio_venta"], i),
+            "redondeado_antes": _valor(productos["precio_redondeado"], i),
+            "redondeado_despues": _valor(nuevos["precio_redondeado"], i),
+        }
+        for i in np.flatnonzero(cambia)
+    ]
+    omitidos = [
+        {
+            "id": int(productos["id"][i]),
+            "nombre": productos["nombre"][i],
+            "motivo": "Sin costo" if np.isnan(nuevos["costo_unitario"][i])
+            else "Sin margen ni precio" if np.isnan(nuevos["margen_ganancia"][i])
+            else "El margen debe ser menor a 1",
+        }
+        for i in np.flatnonzero(~valido)
+    ]
+    return {"exito": True, "evaluados": len(productos["id"]), "cambios": cambios, "omitidos": omitidos}
+
+
+def aplicar_remarcacion(plan: Dict[str, Any], exportar: bool = True) -> Dict[str, Any]:
+    """
+    Escribe los cambios de un plan con un único UPDATE executemany y, con
+    exportar=True, actualiza stock.json y el catálogo en memoria.
+
+    Returns:
+        dict: {"exito", "actualizados"}
+    """
+    if not plan["cambios"]:
+        return {"exito": True, "actualizados": 0}
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                update(Producto)
+                .where(Producto.id == bindparam("pid"))
+                .values(
+                    costo_unitario=bindparam("n_costo"),
+                    margen_ganancia=bindparam("n_margen"),
+                    precio_venta=bindparam("n_precio"),
+                    precio_redondeado=bindparam("n_redondeado"),
+                ),
+                [
+                    {"pid": c["id"], "n_costo": c["costo_despues"], "n_margen": c["margen_despues"],
+                     "n_precio": c["precio_despues"], "n_redondeado": c["redondeado_despues"]}
+                    for c in plan["cambios"]
+                ]
+            )
+    except Exception as e:
+        print(f"[ERROR] Remarcación deshecha: {e}")
+        return {"exito": False, "mensaje": str(e)}
+
+    print(f"[INFO] Remarcación aplicada a {len(plan['cambios'])} productos")
+    if exportar:
+        from aplicacion.backend.stock.crud import exportar_productos_json
+        exportar_productos_json()
+    return {"exito": True, "actualizados": len(plan["cambios"])}
+
+
+def imprimir_vista_previa(plan: Dict[str, Any], limite: int = 30):
+    print(f"{'ID':>6}  {'Producto':<32} {'Costo':>18} {'Precio':>20} {'Redondeado':>18}")
+    print("-" * 100)
+    for c in plan["cambios"][:limite]:
+        print(f"{c['id']:>6}  {str(c['nombre'])[:32]:<32} "
+              f"{c['costo_antes'] or 0:>8.2f} → {c['costo_despues']:<8.2f}"
+              f"{c['precio_antes'] or 0:>9.2f} → {c['precio_despues']:<9.2f}"
+              f"{c['redondeado_antes'] or 0:>8.2f} → {c['redondeado_despues']:<8.2f}")
+    if len(plan["cambios"]) > limite:
+        print(f"... y {len(plan['cambios']) - limite} productos más")
+    print("-" * 100)
+    print(f"{plan['evaluados']} productos evaluados, {len(plan['cambios'])} cambian, "
+          f"{len(plan['omitidos'])} omitidos")
+    for o in plan["omitidos"][:10]:
+        print(f"  ✗ [{o['id']}] {o['nombre']}: {o['motivo']}")
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+
+    def _opcion(nombre, tipo):
+        return tipo(argumentos[argumentos.index(nombre) + 1]) if nombre in argumentos else None
+
+    plan = planificar_remarcacion(
+        categoria_id=_opcion("--categoria", int),
+        proveedor_id=_opcion("--proveedor", int),
+        aumento_costo=(_opcion("--costo", float) or 0.0) / 100,
+        margen=_opcion("--margen", float),
+        margen_minimo=_opcion("--margen-minimo", float),
+        modo_redondeo=_opcion("--redondeo", str) or "superior",
+    )
+    if not plan["exito"]:
+        print(f"✗ {plan['mensaje']}")
+        sys.exit(1)
+    imprimir_vista_previa(plan)
+    if "--aplicar" in argumentos:
+        resultado = aplicar_remarcacion(plan)
+        if not resultado["exito"]:
+            print(f"✗ {resultado['mensaje']}")
+            sys.exit(1)
+    else:
+        print("Para aplicar, repetir con --aplicar")
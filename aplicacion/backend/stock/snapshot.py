@@ -0,0 +1,250 @@
+"""
+Snapshot incremental de stock.json.
+
+exportar_productos_json volvía a consultar todo el catálogo, resolvía la
+categoría de cada producto con una consulta aparte, formateaba todos los
+precios y reescribía el archivo con indent=4 después de cada venta o
+edición. Acá se guarda en memoria la entrada ya serializada de cada
+producto y en cada exportación solo se rearman las que cambiaron:
+
+- productos con ultima_modificacion posterior a la última exportación
+  (con un margen, por transacciones que confirman con una marca anterior)
+- productos nuevos, eliminados o pedidos explícitamente por id
+- productos de categorías renombradas
+
+stock.json se sigue escribiendo completo (lo leen las pestañas), pero en
+forma compacta y uniendo fragmentos ya serializados. Cada exportación con
+cambios agrega además una línea a stock_cambios.jsonl:
+
+    {"version": 12, "upsert": [...], "eliminados": [3, 7]}
+    {"version": 13, "completo": true}      -> releer stock.json
+
+así un lector que tiene la versión N solo aplica las líneas posteriores.
+"""
+from __future__ import annotations
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Iterable
+
+from sqlalchemy import or_
+
+from aplicacion.backend.database.database import SessionLocal, Producto, StockClasificacion
+from aplicacion.backend.stock.crud import producto_a_dict
+
+JSON_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "frontend", "json"
+)
+STOCK_JSON = os.path.join(JSON_DIR, "stock.json")
+CAMBIOS_JSONL = os.path.join(JSON_DIR, "stock_cambios.jsonl")
+
+# Cambios confirmados con una marca de tiempo anterior a la última exportación
+MARGEN_SEGUNDOS = 10
+# Más allá de esto conviene reconstruir que armar un IN (...) enorme
+MAX_IDS_INCREMENTAL = 500
+# Líneas del log antes de compactarlo a un único marcador "completo"
+MAX_LINEAS_CAMBIOS = 500
+
+
+def _ultima_version_en_disco() -> int:
+    try:
+        with open(CAMBIOS_JSONL, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64 * 1024))
+            lineas = f.read().decode("utf-8", errors="ignore").strip().splitlines()
+        return int(json.loads(lineas[-1])["version"]) if lineas else 0
+    except Exception:
+        return 0
+
+
+class SnapshotStock:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._productos: Dict[int, Dict[str, Any]] = {}
+        self._fragmentos: Dict[int, str] = {}
+        self._categorias: Dict[int, str] = {}
+        self._marca: Optional[str] = None
+        self._cargado = False
+        self._historial = deque(maxlen=MAX_LINEAS_CAMBIOS)
+        self._lineas_log = 0
+        self.version = _ultima_version_en_disco()
+
+    # ---------------- armado ----------------
+    def _guardar(self, filas, marca_previa: Optional[str]):
+        """Actualiza las entradas de las filas (Producto, nombre_categoria); devuelve las que cambiaron"""
+        cambiados = []
+        # Todo lo que se modifique después de esta lectura tendrá una marca posterior
+        marca = max(marca_previa or "", datetime.now().isoformat())
+        for producto, categoria in filas:
+            if producto.ultima_modificacion and producto.ultima_modificacion > marca:
+                marca = producto.ultima_modificacion
+            d = producto_a_dict(producto, categoria)
+            if self._productos.get(producto.id) != d:
+                self._productos[producto.id] = d
+                self._fragmentos[producto.id] = json.dumps(d, ensure_ascii=False, separators=(",", ":"))
+                cambiados.append(d)
+        self._marca = marca
+        return cambiados
+
+    def _reconstruir(self, session):
+        filas = (
+            session.query(Producto, StockClasificacion.nombre)
+            .outerjoin(StockClasificacion, Producto.categoria_id == StockClasificacion.id)
+            .all()
+        )
+        self._productos, self._fragmentos = {}, {}
+        self._categorias = dict(session.query(StockClasificacion.id, StockClasificacion.nombre).all())
+        self._guardar(filas, None)
+        self._cargado = True
+
+    def _desde_marca(self) -> Optional[str]:
+        if not self._marca:
+            return None
+        try:
+            return (datetime.fromisoformat(self._marca) - timedelta(seconds=MARGEN_SEGUNDOS)).isoformat()
+        except ValueError:
+            return self._marca
+
+    def actualizar(self, ids: Optional[Iterable[int]] = None, completo: bool = False) -> Dict[str, Any]:
+        """
+        Sincroniza el snapshot con la base.
+
+        Returns:
+            dict: {"version", "completo", "upsert", "eliminados"}; con completo=True
+                  hay que releer todo (upsert y eliminados vienen vacíos)
+        """
+        with self._lock:
+            session = SessionLocal()
+            try:
+                if completo or not self._cargado:
+                    self._reconstruir(session)
+                    return self._registrar({"completo": True, "upsert": [], "eliminados": []})
+
+                ids_actuales = {i for (i,) in session.query(Producto.id).all()}
+                eliminados = sorted(set(self._productos) - ids_actuales)
+                forzados = (ids_actuales - set(self._productos)) | (set(ids or []) & ids_actuales)
+
+                categorias = dict(session.query(StockClasificacion.id, StockClasificacion.nombre).all())
+                categorias_cambiadas = {
+                    c for c in set(categorias) | set(self._categorias)
+                    if categorias.get(c) != self._categorias.get(c)
+                }
+
+                if len(forzados) + len(categorias_cambiadas) > MAX_IDS_INCREMENTAL:
+                    self._reconstruir(session)
+                    return self._registrar({"completo": True, "upsert": [], "eliminados": []})
+
+                condiciones = []
+                desde = self._desde_marca()
+                if desde:
+                    condiciones.append(Producto.ultima_modificacion >= desde)
+                if forzados:
+                    condiciones.append(Producto.id.in_(forzados))
+                if categorias_cambiadas:
+                    condiciones.append(Producto.categoria_id.in_(categorias_cambiadas))
+
+                cambiados = []
+                if condiciones:
+                    filas = (
+                        session.query(Producto, StockClasificacion.nombre)
+                        .outerjoin(StockClasificacion, Producto.categoria_id == StockClasificacion.id)
+                        .filter(or_(*condiciones))
+                        .all()
+                    )
+                    cambiados = self._guardar(filas, self._marca)
+
+                for pid in eliminados:
+                    self._productos.pop(pid, None)
+                    self._fragmentos.pop(pid, None)
+                self._categorias = categorias
+
+                if not cambiados and not eliminados:
+                    return {"version": self.version, "completo": False, "upsert": [], "eliminados": []}
+                return self._registrar({"completo": False, "upsert": cambiados, "eliminados": eliminados})
+            finally:
+                session.close()
+
+    def _registrar(self, cambio: Dict[str, Any]) -> Dict[str, Any]:
+        self.version += 1
+        cambio["version"] = self.version
+        if cambio["completo"]:
+            self._historial.clear()
+        self._historial.append(cambio)
+        return cambio
+
+    # ---------------- consulta ----------------
+    def productos(self) -> List[Dict[str, Any]]:
+        """Lista completa, ordenada por id (mismo contenido que stock.json)"""
+        with self._lock:
+            if not self._cargado:
+                self.actualizar()
+            return [self._productos[pid] for pid in sorted(self._productos)]
+
+    def cambios_desde(self, version: int) -> Dict[str, Any]:
+        """
+        Cambios acumulados después de `version`, listos para aplicar sobre una copia.
+        Si el historial ya no alcanza devuelve completo=True.
+        """
+        with self._lock:
+            pendientes = [c for c in self._historial if c["version"] > version]
+            if version >= self.version:
+                return {"version": self.version, "completo": False, "upsert": [], "eliminados": []}
+            if not pendientes or pendientes[0]["version"] != version + 1 or any(c["completo"] for c in pendientes):
+                return {"version": self.version, "completo": True, "upsert": [], "eliminados": []}
+
+            upsert: Dict[int, Dict[str, Any]] = {}
+            eliminados = set()
+            for c in pendientes:
+                for d in c["upsert"]:
+                    upsert[d["id"]] = d
+                    eliminados.discard(d["id"])
+                for pid in c["eliminados"]:
+                    upsert.pop(pid, None)
+                    eliminados.add(pid)
+            return {
+                "version": self.version,
+                "completo": False,
+                "upsert": list(upsert.values()),
+                "eliminados": sorted(eliminados),
+            }
+
+    # ---------------- escritura ----------------
+    def exportar(self, ids: Optional[Iterable[int]] = None, completo: bool = False) -> bool:
+        """Sincroniza y, si hubo cambios, reescribe stock.json y agrega la línea al log"""
+        with self._lock:
+            cambio = self.actualizar(ids=ids, completo=completo)
+            sin_cambios = not (cambio["completo"] or cambio["upsert"] or cambio["eliminados"])
+            if sin_cambios and os.path.exists(STOCK_JSON):
+                print("stock.json sin cambios, no se reescribe.")
+                return True
+
+            os.makedirs(JSON_DIR, exist_ok=True)
+            contenido = "[" + ",".join(self._fragmentos[pid] for pid in sorted(self._fragmentos)) + "]"
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=JSON_DIR, delete=False) as tmp:
+                tmp.write(contenido)
+                tmp_path = tmp.name
+            os.replace(tmp_path, STOCK_JSON)
+
+            self._escribir_log(cambio)
+            print(f"Productos exportados a {STOCK_JSON} (versión {self.version}, "
+                  f"{'completo' if cambio['completo'] else str(len(cambio['upsert'])) + ' modificados'})")
+            return True
+
+    def _escribir_log(self, cambio: Dict[str, Any]):
+        if cambio["completo"] or self._lineas_log >= MAX_LINEAS_CAMBIOS:
+            linea = {"version": self.version, "completo": True}
+            modo = "w"
+            self._lineas_log = 0
+        else:
+            linea = {"version": self.version, "upsert": cambio["upsert"], "eliminados": cambio["eliminados"]}
+            modo = "a"
+        with open(CAMBIOS_JSONL, modo, encoding="utf-8") as f:
+            f.write(json.dumps(linea, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._lineas_log += 1
+
+
+# Instancia compartida por todo el proceso
+snapshot_stock = SnapshotStock()
@@ -13,7 +13,6 @@ from aplicacion.backend.stock.crud import (
 from aplicacion.backend.stock.utils import (
     generar_codigo_barras,
     buscar_productos_por_nombre,
-    buscar_productos_por_codigo,
     verificar_stock_bajo,
     fecha_actual_iso,
     obtener_codigos_por_producto,
@@ -237,14 +236,9 @@ def menu():
 
         elif opcion == "7":
             codigo = input("Ingresa el codigo de barras exacto: ")
-            productos = controller.listar_productos_controller()
-            unidades = []
-            for p in productos:
-                unidades += controller.obtener_unidades_de_producto_controller(p.id)
-            encontrados = buscar_productos_por_codigo(unidades, codigo)
-            if encontrados:
-                unidad = encontrados[0]
-                print(f"Codigo encontrado. Producto ID: {unidad.producto_id}, Codigo: {unidad.codigo_barras}")
+            unidad = controller.buscar_unidad_por_codigo_controller(codigo)
+            if unidad:
+                print(f"Codigo encontrado. Producto ID: {unidad['producto_id']}, Codigo: {unidad['codigo_barras']}")
             else:
                 print("No se encontro el codigo.")
 
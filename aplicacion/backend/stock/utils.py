@@ -81,10 +81,11 @@ import random
 
 def generar_codigo_barras():
     """
-    Genera un código de barras numérico de 13 dígitos.
-    Compatible con el estándar EAN-13 (sin cálculo de checksum por ahora).
+    Devuelve un código EAN-13 interno nuevo (prefijo del local + contador +
+    dígito verificador), sin consultar stock_unidades. Ver stock/codigos.py.
     """
-    return ''.join([str(random.randint(0, 9)) for _ in range(13)])
+    from aplicacion.backend.stock.codigos import asignador_codigos
+    return asignador_codigos.siguiente()
 
 
 # ----- FECHA ACTUAL -----
@@ -0,0 +1,164 @@
+"""
+Verificación del modo fusión (fusion.py) contra productos cargados a mano.
+
+Arma una base temporal con productos dados de alta como lo hace
+AgregarProductoDialog (unidad "unidades"/"kilogramos", margen y redondeo)
+y le fusiona listas de proveedor en CSV y en Excel. Verifica:
+
+- que los productos cargados a mano se encuentren (actualización o sin
+  cambios, nunca alta) aunque el archivo diga "unidad"/"kg";
+- que una lista que solo trae el costo conserve el margen y recalcule
+  precio y precio redondeado, sin tocar el redondeo;
+- que un margen o un precio del archivo se respeten;
+- que la base quede con los valores del plan y sin productos duplicados.
+
+Sale con código 1 si algo no coincide.
+
+python -m aplicacion.backend.stock.verificar_fusion
+"""
+import csv
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+from aplicacion.backend.database.base_temporal import DIRECTORIO  # antes que database
+
+import pandas as pd
+from sqlalchemy import func, select
+
+from aplicacion.backend.database.database import crear_tablas, engine, Producto
+from aplicacion.backend.stock.controller import agregar_producto_controller
+from aplicacion.backend.stock.fusion import aplicar_fusion, planificar_fusion
+from aplicacion.backend.stock.importacion import COLUMNAS_EXCEL
+from aplicacion.backend.stock.utils import calcular_margen_con_precio, calcular_precio_con_margen, redondear_precio
+
+# Como los guarda AgregarProductoDialog
+PRODUCTOS_A_MANO = [
+    {"nombre": "Leche Entera", "unidad_medida": "unidades", "costo_unitario": 100.0, "margen_ganancia": 0.3},
+    {"nombre": "Yerba Mate", "unidad_medida": "unidades", "costo_unitario": 40.0, "margen_ganancia": 0.3},
+    {"nombre": "Queso Cremoso XKG", "unidad_medida": "kilogramos", "costo_unitario": 900.0, "margen_ganancia": 0.35},
+    {"nombre": "Arroz Largo", "unidad_medida": "unidades", "costo_unitario": 80.0, "margen_ganancia": 0.25},
+    {"nombre": "Fideos Moño", "unidad_medida": "unidades", "costo_unitario": 60.0, "margen_ganancia": 0.2},
+]
+
+# Lista de proveedor en CSV: nombre y lo que trae cada fila
+LISTA_CSV = [
+    {"nombre": "LECHE ENTERA", "costo_unitario": "110"},                           # solo costo
+    {"nombre": "yerba mate", "costo_unitario": "50"},                              # solo costo
+    {"nombre": "Queso Cremoso XKG", "costo_unitario": "900"},                      # igual
+    {"nombre": "Arroz Largo", "costo_unitario": "80", "margen_ganancia": "40"},     # margen nuevo
+    {"nombre": "Fideos Moño", "costo_unitario": "66", "precio_venta": "90"},       # precio nuevo
+    {"nombre": "Galletitas", "costo_unitario": "30", "margen_ganancia": "0.3"},    # nuevo
+]
+
+
+def _esperado(producto, costo, margen=None, precio=None):
+    """Valores que tiene que dejar la fusión en un producto cargado a mano"""
+    if precio is not None:
+        margen = calcular_margen_con_precio(costo, precio)
+    else:
+        margen = producto["margen_ganancia"] if margen is None else margen
+        precio = calcular_precio_con_margen(costo, margen)
+    return {"costo_unitario": costo, "margen_ganancia": margen, "precio_venta": precio,
+            "precio_redondeado": redondear_precio(precio), "usa_redondeo": True}
+
+
+ESPERADOS_CSV = {
+    "Leche Entera": _esperado(PRODUCTOS_A_MANO[0], 110.0),
+    "Yerba Mate": _esperado(PRODUCTOS_A_MANO[1], 50.0),
+    "Arroz Largo": _esperado(PRODUCTOS_A_MANO[3], 80.0, margen=0.4),
+    "Fideos Moño": _esperado(PRODUCTOS_A_MANO[4], 66.0, precio=90.0),
+}
+
+
+def _escribir_csv(ruta, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.DictWriter(f, fieldnames=["nombre", "costo_unitario", "precio_venta", "margen_ganancia",
+                                                 "usa_redondeo", "proveedor_id", "categoria_id", "codigo_barras"])
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+
+def _productos():
+    with engine.connect() as conn:
+        return {
+            fila.nombre: dict(fila._mapping)
+            for fila in conn.execute(select(Producto.nombre, Producto.costo_unitario, Producto.margen_ganancia,
+                                            Producto.precio_venta, Producto.precio_redondeado, Producto.usa_redondeo))
+        }
+
+
+def _cantidad_productos():
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(Producto.id))).scalar()
+
+
+def _comparar(nombre, obtenido, esperado):
+    distintos = [c for c, v in esperado.items() if round(float(obtenido[c]), 6) != round(float(v), 6)]
+    for campo in distintos:
+        print(f"✗ {nombre}: {campo} = {obtenido[campo]}, se esperaba {esperado[campo]}")
+    return not distintos
+
+
+def main():
+    crear_tablas()
+    with redirect_stdout(io.StringIO()):
+        for producto in PRODUCTOS_A_MANO:
+            agregar_producto_controller(dict(producto, cantidad=0, usa_redondeo=True))
+    ok = True
+
+    # ---- CSV ----
+    ruta_csv = os.path.join(DIRECTORIO, "lista.csv")
+    _escribir_csv(ruta_csv, LISTA_CSV)
+    with redirect_stdout(io.StringIO()):
+        plan = planificar_fusion(ruta_csv)
+    altas = sorted(datos["nombre"] for datos in plan["altas"].values())
+    if altas != ["Galletitas"]:
+        ok = False
+        print(f"✗ CSV: altas {altas}, se esperaba solo Galletitas")
+    if plan["sin_cambios"] != 1:
+        ok = False
+        print(f"✗ CSV: {plan['sin_cambios']} productos sin cambios, se esperaba 1 (Queso Cremoso XKG)")
+    actualizados = {a["nombre"] for a in plan["actualizaciones"]}
+    if actualizados != set(ESPERADOS_CSV):
+        ok = False
+        print(f"✗ CSV: se actualizan {sorted(actualizados)}")
+
+    with redirect_stdout(io.StringIO()):
+        resultado = aplicar_fusion(plan)
+    en_base = _productos()
+    if not resultado["exito"] or _cantidad_productos() != len(PRODUCTOS_A_MANO) + 1:
+        ok = False
+        print(f"✗ CSV: {_cantidad_productos()} productos después de aplicar")
+    for nombre, esperado in ESPERADOS_CSV.items():
+        ok = _comparar(nombre, en_base[nombre], esperado) and ok
+
+    # ---- Excel: una fila sin precio ni margen no borra los de la tienda ----
+    ruta_excel = os.path.join(DIRECTORIO, "lista.xlsx")
+    pd.DataFrame([{"nombre": "Yerba Mate", "unidad_medida": "unidad", "costo_unitario": 55.0}],
+                 columns=COLUMNAS_EXCEL).to_excel(ruta_excel, index=False)
+    with redirect_stdout(io.StringIO()):
+        plan = planificar_fusion(ruta_excel)
+        aplicar_fusion(plan)
+    if plan["altas"]:
+        ok = False
+        print("✗ Excel: Yerba Mate quedó como alta")
+    ok = _comparar("Yerba Mate (Excel)", _productos()["Yerba Mate"], _esperado(PRODUCTOS_A_MANO[1], 55.0)) and ok
+
+    # ---- Repetir la misma lista no cambia nada ----
+    with redirect_stdout(io.StringIO()):
+        plan = planificar_fusion(ruta_excel)
+    if plan["actualizaciones"] or plan["altas"]:
+        ok = False
+        print("✗ Repetir la lista de Excel vuelve a planificar cambios")
+
+    engine.dispose()
+    if not ok:
+        sys.exit(1)
+    print(f"✓ Fusión contra {len(PRODUCTOS_A_MANO)} productos cargados a mano: sin duplicados, "
+          f"márgenes conservados y columnas vacías del archivo ignoradas")
+
+
+if __name__ == "__main__":
+    main()
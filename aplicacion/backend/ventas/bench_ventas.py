@@ -0,0 +1,140 @@
+"""
+Benchmark de confirmación de ventas: motor transaccional vs. camino anterior
+(una sesión y un commit por cada línea del carrito).
+
+python -m aplicacion.backend.ventas.bench_ventas [ventas] [lineas_por_venta]
+"""
+import sys
+import time
+
+from aplicacion.backend.database.base_temporal import RUTA  # antes que database
+
+from datetime import datetime
+
+from aplicacion.backend.database.database import (
+    crear_tablas, engine, SessionLocal, Producto, StockUnidad, VentaRegistro, VentaDetalle
+)
+from aplicacion.backend.ventas import crud
+from aplicacion.backend.ventas.motor_ventas import registrar_venta
+
+
+def _confirmar_venta_por_linea(items, data):
+    """Reproducción del confirmar_venta anterior (2N+2 transacciones por venta)"""
+    session = SessionLocal()
+    try:
+        total = sum(item["precio_unitario"] * item["cantidad"] for item in items)
+        venta = VentaRegistro(
+            fecha=datetime.now().isoformat(),
+            total=total,
+            metodo_pago=data["metodo_pago"],
+            usuario_id=data["usuario_id"]
+        )
+        session.add(venta)
+        session.commit()
+        session.refresh(venta)
+
+        for item in items:
+            session.add(VentaDetalle(
+                venta_id=venta.id,
+                unidad_id=item["unidad_id"],
+                producto_id=item["producto_id"],
+                cantidad=item["cantidad"],
+                precio_unitario=item["precio_unitario"],
+                subtotal=item["precio_unitario"] * item["cantidad"],
+                tipo_venta=item["tipo_venta"]
+            ))
+            if item["tipo_venta"] == "codigo_barras":
+                crud.actualizar_estado_unidad_inactivo_por_codigo(item["codigo_barras"])
+                crud.descontar_stock_producto(item["producto_id"], 1)
+            else:
+                crud.descontar_stock_producto(item["producto_id"], item["cantidad"])
+        session.commit()
+    finally:
+        session.close()
+
+
+def _preparar_datos(cant_productos, cant_unidades):
+    session = SessionLocal()
+    try:
+        productos = [
+            Producto(nombre=f"PRODUCTO {i}", unidad_medida="unidad", cantidad=1_000_000,
+                     costo_unitario=100, precio_venta=150, precio_redondeado=150,
+                     usa_redondeo=True, margen_ganancia=0.33, es_divisible=False)
+            for i in range(cant_productos)
+        ]
+        session.add_all(productos)
+        session.flush()
+        ahora = datetime.now().isoformat()
+        session.bulk_insert_mappings(StockUnidad, [
+            {"producto_id": productos[i % cant_productos].id, "codigo_barras": f"B{i:012d}",
+             "estado": "activo", "fecha_ingreso": ahora, "fecha_modificacion": ahora}
+            for i in range(cant_unidades)
+        ])
+        session.commit()
+        filas = session.query(StockUnidad.id, StockUnidad.producto_id, StockUnidad.codigo_barras).all()
+        return [p.id for p in productos], filas
+    finally:
+        session.close()
+
+
+def _armar_ventas(ids_productos, unidades, cant_ventas, lineas):
+    ventas = []
+    pos = 0
+    for v in range(cant_ventas):
+        items = []
+        for l in range(lineas):
+            if l % 2 == 0:
+                uid, pid, codigo = unidades[pos]
+                pos += 1
+                items.append({"unidad_id": uid, "producto_id": pid, "nombre": "x",
+                              "precio_unitario": 150.0, "codigo_barras": codigo,
+                              "cantidad": 1, "tipo_venta": "codigo_barras"})
+            else:
+                pid = ids_productos[(v + l) % len(ids_productos)]
+                items.append({"unidad_id": None, "producto_id": pid, "nombre": "x",
+                              "precio_unitario": 150.0, "codigo_barras": None,
+                              "cantidad": 2, "tipo_venta": "producto_id"})
+        ventas.append(items)
+    return ventas
+
+
+def main():
+    cant_ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lineas = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    unidades_por_camino = cant_ventas * ((lineas + 1) // 2)
+
+    crear_tablas()
+    ids_productos, unidades = _preparar_datos(200, unidades_por_camino * 2)
+    ventas_anterior = _armar_ventas(ids_productos, unidades[:unidades_por_camino], cant_ventas, lineas)
+    ventas_motor = _armar_ventas(ids_productos, unidades[unidades_por_camino:], cant_ventas, lineas)
+    data = {"metodo_pago": "efectivo", "usuario_id": 1}
+
+    print(f"Base temporal: {RUTA}")
+    print(f"{cant_ventas} ventas de {lineas} líneas por camino\n")
+
+    inicio = time.perf_counter()
+    for items in ventas_anterior:
+        _confirmar_venta_por_linea(items, data)
+    t_anterior = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for items in ventas_motor:
+        resultado = registrar_venta(items, data["metodo_pago"], data["usuario_id"],
+                                    publicar_evento=False)
+        if not resultado["exito"]:
+            print(f"Error en el motor: {resultado['mensaje']}")
+            return
+    t_motor = time.perf_counter() - inicio
+
+    print(f"{'Camino':<28} {'Tiempo (s)':>12} {'Ventas/s':>12}")
+    print("-" * 54)
+    print(f"{'Una transacción por línea':<28} {t_anterior:>12.3f} {cant_ventas / t_anterior:>12.1f}")
+    print(f"{'Motor transaccional':<28} {t_motor:>12.3f} {cant_ventas / t_motor:>12.1f}")
+    print("-" * 54)
+    print(f"Aceleración: x{t_anterior / t_motor:.1f}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
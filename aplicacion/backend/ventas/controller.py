@@ -77,7 +77,8 @@ def eliminar_item_carrito_controller(indice: int) -> dict:
 def confirmar_venta_controller(data: dict) -> dict:
     """
     Confirma la venta, registra en la base de datos y limpia el carrito.
-    Espera un diccionario con método de pago y usuario_id.
+    Espera un diccionario con método de pago y usuario_id (y opcionalmente
+    'codigos_escaneados' para inactivar esas unidades en la misma transacción).
     """
     return crud.confirmar_venta(data)
 
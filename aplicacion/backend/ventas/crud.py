@@ -3,6 +3,10 @@ from sqlalchemy import and_
 from datetime import datetime
 from aplicacion.backend.database.database import engine, Producto, StockUnidad
 from aplicacion.backend.database.database import VentaRegistro, VentaDetalle
+from aplicacion.backend.stock.indice_codigos import indice_codigos
+from aplicacion.backend.ventas.motor_ventas import registrar_venta
+from aplicacion.backend.ventas import postventa  # registra el post-proceso en el bus de eventos
+from aplicacion.backend.metricas.ganancias import resumen_diario
 
 Session = sessionmaker(bind=engine)
 
@@ -38,6 +42,7 @@ def actualizar_estado_unidad_inactivo_por_codigo(codigo_barras):
             unidad.estado = "inactivo"
             unidad.fecha_modificacion = datetime.now().isoformat()
             session.commit()
+            indice_codigos.quitar(codigo_barras)
         return unidad
     finally:
         session.close()
@@ -153,111 +158,33 @@ def calcular_total_carrito():
     """Calcula el total del carrito"""
     return sum(item["precio_unitario"] * item["cantidad"] for item in carrito)
 
-# Reemplazar el método confirmar_venta en crud.py con esta versión:
-
 def confirmar_venta(data: dict):
-    """Confirma la venta, registra en la base de datos y limpia el carrito"""
+    """
+    Confirma la venta, registra en la base de datos y limpia el carrito.
+    Todo (venta, detalles, unidades y stock) se aplica en una sola transacción.
+    """
     if not carrito:
         return {"exito": False, "mensaje": "El carrito está vacío"}
 
-    session = Session()
-    try:
-        # Calcular total correctamente para productos a granel
-        total = 0.0
-        for item in carrito:
-            if item.get("es_granel", False):
-                # Para productos a granel: precio_por_kilo * (gramos / 1000)
-                # O directamente precio_por_kilo * cantidad_kg si ya está convertido
-                if "cantidad_gramos" in item:
-                    gramos = item["cantidad_gramos"]
-                    subtotal = item["precio_unitario"] * (gramos / 1000.0)
-                else:
-                    # Si ya está en kg
-                    subtotal = item["precio_unitario"] * item["cantidad"]
-            else:
-                # Para productos normales
-                subtotal = item["precio_unitario"] * item["cantidad"]
-            total += subtotal
-
-        # Crear registro de venta
-        nueva_venta = VentaRegistro(
-            fecha=datetime.now().isoformat(),
-            total=total,
-            metodo_pago=data["metodo_pago"],
-            usuario_id=data["usuario_id"]
-        )
-        session.add(nueva_venta)
-        session.commit()
-        session.refresh(nueva_venta)
-
-        # Crear detalles de venta y actualizar stock según el tipo
-        for item in carrito:
-            # Calcular subtotal correctamente para el detalle
-            if item.get("es_granel", False):
-                if "cantidad_gramos" in item:
-                    gramos = item["cantidad_gramos"]
-                    subtotal = item["precio_unitario"] * (gramos / 1000.0)
-                    cantidad_para_detalle = gramos / 1000.0  # Guardar en kg en el detalle
-                else:
-                    subtotal = item["precio_unitario"] * item["cantidad"]
-                    cantidad_para_detalle = item["cantidad"]
-            else:
-                subtotal = item["precio_unitario"] * item["cantidad"]
-                cantidad_para_detalle = item["cantidad"]
-
-            # Crear detalle de venta
-            detalle = VentaDetalle(
-                venta_id=nueva_venta.id,
-                unidad_id=item["unidad_id"],  # Puede ser None
-                producto_id=item["producto_id"],
-                cantidad=cantidad_para_detalle,  # En kg para granel, en unidades para normal
-                precio_unitario=item["precio_unitario"],
-                subtotal=subtotal,  # Subtotal calculado correctamente
-                tipo_venta=item["tipo_venta"]
-            )
-            session.add(detalle)
-
-            # Procesar según el tipo de venta
-            if item["tipo_venta"] == "codigo_barras":
-                # Venta por código de barras: marcar unidad específica como inactiva
-                if item["codigo_barras"]:
-                    actualizar_estado_unidad_inactivo_por_codigo(item["codigo_barras"])
-                # Descontar 1 unidad del stock
-                descontar_stock_producto(item["producto_id"], 1)
-                
-            elif item["tipo_venta"] == "producto_id":
-                # Venta por ID: solo descontar del stock, NO tocar stock_unidades
-                descontar_stock_producto(item["producto_id"], item["cantidad"])
-                
-            elif item["tipo_venta"] in ["granel", "granel_codigo"]:
-                # Ventas a granel: descontar en kilogramos
-                if "cantidad_gramos" in item:
-                    cantidad_kg = item["cantidad_gramos"] / 1000.0
-                else:
-                    cantidad_kg = item["cantidad"]
-                
-                descontar_stock_producto_granel(item["producto_id"], cantidad_kg)
-                
-                # Si fue por código de barras, también inactivar la unidad
-                if item["tipo_venta"] == "granel_codigo" and item.get("codigo_barras"):
-                    actualizar_estado_unidad_inactivo_por_codigo(item["codigo_barras"])
+    resultado = registrar_venta(
+        carrito,
+        metodo_pago=data["metodo_pago"],
+        usuario_id=data["usuario_id"],
+        codigos_extra=data.get("codigos_escaneados")
+    )
+    if not resultado.get("exito"):
+        return resultado
 
-        session.commit()
-        vendidos = carrito.copy()
-        limpiar_carrito()
-        
-        return {
-            "exito": True,
-            "venta_id": nueva_venta.id,
-            "total": total,
-            "productos": vendidos
-        }
-    except Exception as e:
-        session.rollback()
-        return {"exito": False, "mensaje": str(e)}
-    finally:
-        session.close()
-    
+    vendidos = carrito.copy()
+    limpiar_carrito()
+
+    return {
+        "exito": True,
+        "venta_id": resultado["venta_id"],
+        "total": resultado["total"],
+        "productos": vendidos,
+        "lineas": resultado["lineas"]
+    }
 
 def obtener_productos_por_kg():
     """Devuelve los productos que se venden por kilo con su info principal"""
@@ -302,6 +229,8 @@ def cancelar_ultima_venta():
     - Cambia estado de ventas_registro a 0 (cancelada).
     - Restaura las cantidades de los productos.
     - Reactiva las unidades en stock_unidades SOLO si fueron vendidas por código de barras.
+    - Descuenta la venta del resumen diario.
+    Todo en una sola transacción.
     """
     session = Session()
     try:
@@ -312,11 +241,11 @@ def cancelar_ultima_venta():
 
         # Cambiar estado de la venta
         ultima_venta.estado = 0
-        session.commit()
 
         # Obtener los detalles de la venta
         detalles = session.query(VentaDetalle).filter_by(venta_id=ultima_venta.id).all()
         restaurados = []
+        reactivadas = []
 
         for det in detalles:
             producto = session.query(Producto).filter_by(id=det.producto_id).first()
@@ -332,6 +261,7 @@ def cancelar_ultima_venta():
                     if unidad:
                         unidad.estado = "activo"
                         unidad.fecha_modificacion = datetime.now().isoformat()
+                        reactivadas.append((unidad.codigo_barras, unidad.id, unidad.producto_id))
 
                 restaurados.append({
                     "producto": producto.nombre,
@@ -339,7 +269,10 @@ def cancelar_ultima_venta():
                     "tipo_venta": det.tipo_venta
                 })
 
+        resumen_diario.aplicar_venta(session, ultima_venta.id, -1)
         session.commit()
+        for codigo, unidad_id, producto_id in reactivadas:
+            indice_codigos.registrar(codigo, unidad_id, producto_id)
         return {"exito": True, "venta_id": ultima_venta.id, "restaurados": restaurados}
     except Exception as e:
         session.rollback()
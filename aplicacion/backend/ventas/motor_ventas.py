@@ -0,0 +1,198 @@
+"""
+Motor de confirmación de ventas en una sola transacción.
+
+Antes cada línea del carrito abría su propia sesión (inactivar unidad,
+descontar stock) y la venta se confirmaba por separado: con N líneas eran
+unas 2N+2 transacciones y un corte a mitad de camino dejaba la venta a medio
+aplicar. Acá se inserta la venta, todos sus detalles, se inactivan las
+unidades y se descuenta el stock dentro de la misma transacción, usando
+UPDATE ... WHERE id IN (...) en bloque.
+
+Las reglas por tipo de venta son las mismas que tenía confirmar_venta:
+- codigo_barras: inactiva la unidad escaneada y descuenta 1
+- producto_id: descuenta la cantidad del ítem
+- granel / granel_codigo: descuenta kilos (granel_codigo además inactiva la unidad)
+- el descuento solo se aplica si hay stock suficiente para esa línea
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from aplicacion.backend.database.database import (
+    engine, Producto, StockUnidad, VentaRegistro, VentaDetalle
+)
+from aplicacion.backend.stock.indice_codigos import indice_codigos
+from aplicacion.backend.eventos.bus import bus, VENTA_CONFIRMADA
+from aplicacion.backend.metricas.ganancias import resumen_diario
+
+Session = sessionmaker(bind=engine)
+
+
+def _subtotal_y_cantidad(item: Dict[str, Any]):
+    """Subtotal y cantidad para el detalle (en kg para granel, en unidades para el resto)"""
+    if item.get("es_granel", False) and "cantidad_gramos" in item:
+        gramos = item["cantidad_gramos"]
+        return item["precio_unitario"] * (gramos / 1000.0), gramos / 1000.0
+    return item["precio_unitario"] * item["cantidad"], item["cantidad"]
+
+
+def _descuento_y_codigo(item: Dict[str, Any]):
+    """Cuánto stock descuenta la línea y qué código de unidad inactiva"""
+    tipo = item.get("tipo_venta")
+    if tipo == "codigo_barras":
+        return 1, item.get("codigo_barras") or None
+    if tipo == "producto_id":
+        return item["cantidad"], None
+    if tipo in ("granel", "granel_codigo"):
+        if "cantidad_gramos" in item:
+            cantidad_kg = item["cantidad_gramos"] / 1000.0
+        else:
+            cantidad_kg = item["cantidad"]
+        codigo = item.get("codigo_barras") if tipo == "granel_codigo" else None
+        return cantidad_kg, codigo or None
+    return 0, None
+
+
+def registrar_venta(items: List[Dict[str, Any]], metodo_pago: str, usuario_id: int,
+                    codigos_extra: Optional[Iterable[str]] = None,
+                    publicar_evento: bool = True) -> Dict[str, Any]:
+    """
+    Registra una venta completa en una única transacción.
+
+    Args:
+        items: líneas del carrito (mismo formato que ventas.crud.carrito)
+        metodo_pago: 'efectivo' o 'transferencia'
+        usuario_id: usuario que realiza la venta
+        codigos_extra: códigos escaneados a inactivar además de los del carrito
+        publicar_evento: publicar VENTA_CONFIRMADA al terminar (dispara el post-proceso)
+
+    Returns:
+        dict: {"exito", "venta_id", "total", "lineas"} donde cada línea informa
+              si se descontó stock y si se inactivó la unidad
+    """
+    if not items:
+        return {"exito": False, "mensaje": "El carrito está vacío"}
+
+    ahora = datetime.now().isoformat()
+    lineas = []
+    total = 0.0
+    for indice, item in enumerate(items):
+        subtotal, cantidad_detalle = _subtotal_y_cantidad(item)
+        descuento, codigo = _descuento_y_codigo(item)
+        total += subtotal
+        lineas.append({
+            "indice": indice,
+            "producto_id": item["producto_id"],
+            "tipo_venta": item.get("tipo_venta"),
+            "codigo_barras": codigo,
+            "subtotal": subtotal,
+            "cantidad_detalle": cantidad_detalle,
+            "descuento": descuento,
+            "stock_descontado": False,
+            "unidad_inactivada": None if codigo is None else False,
+        })
+
+    session = Session()
+    try:
+        # El INSERT toma el lock de escritura antes de leer el stock
+        venta = VentaRegistro(
+            fecha=ahora,
+            total=total,
+            metodo_pago=metodo_pago,
+            usuario_id=usuario_id
+        )
+        session.add(venta)
+        session.flush()
+
+        session.execute(insert(VentaDetalle), [
+            {
+                "venta_id": venta.id,
+                "unidad_id": item["unidad_id"],
+                "producto_id": item["producto_id"],
+                "cantidad": linea["cantidad_detalle"],
+                "precio_unitario": item["precio_unitario"],
+                "subtotal": linea["subtotal"],
+                "tipo_venta": item["tipo_venta"],
+            }
+            for item, linea in zip(items, lineas)
+        ])
+
+        # Unidades a inactivar: una lectura y un UPDATE para todas
+        codigos = {l["codigo_barras"] for l in lineas if l["codigo_barras"]}
+        codigos.update(c for c in (codigos_extra or []) if c)
+        codigos_inactivados = set()
+        if codigos:
+            filas = session.execute(
+                select(StockUnidad.id, StockUnidad.codigo_barras)
+                .where(StockUnidad.codigo_barras.in_(codigos))
+            ).all()
+            if filas:
+                session.execute(
+                    update(StockUnidad)
+                    .where(StockUnidad.id.in_([f.id for f in filas]))
+                    .values(estado="inactivo", fecha_modificacion=ahora),
+                    execution_options={"synchronize_session": False}
+                )
+            codigos_inactivados = {f.codigo_barras for f in filas}
+            for linea in lineas:
+                if linea["codigo_barras"]:
+                    linea["unidad_inactivada"] = linea["codigo_barras"] in codigos_inactivados
+
+        # Stock: se simula línea por línea (mismo criterio que antes) y se escribe una vez
+        ids_producto = {l["producto_id"] for l in lineas if l["descuento"]}
+        if ids_producto:
+            stock = {
+                f.id: f.cantidad or 0
+                for f in session.execute(
+                    select(Producto.id, Producto.cantidad).where(Producto.id.in_(ids_producto))
+                )
+            }
+            modificados = {}
+            for linea in lineas:
+                pid = linea["producto_id"]
+                if not linea["descuento"] or pid not in stock:
+                    continue
+                if stock[pid] >= linea["descuento"]:
+                    stock[pid] = max(0, stock[pid] - linea["descuento"])
+                    modificados[pid] = stock[pid]
+                    linea["stock_descontado"] = True
+
+            if modificados:
+                session.execute(
+                    update(Producto)
+                    .where(Producto.id.in_(list(modificados)))
+                    .values(
+                        cantidad=case(modificados, value=Producto.id),
+                        ultima_modificacion=ahora
+                    ),
+                    execution_options={"synchronize_session": False}
+                )
+
+        resumen_diario.aplicar_venta(session, venta.id, 1)
+        session.commit()
+        venta_id = venta.id
+    except Exception as e:
+        session.rollback()
+        return {"exito": False, "mensaje": str(e)}
+    finally:
+        session.close()
+
+    for codigo in codigos_inactivados:
+        indice_codigos.quitar(codigo)
+
+    for linea in lineas:
+        del linea["cantidad_detalle"], linea["descuento"]
+
+    if publicar_evento:
+        productos_ids = sorted({l["producto_id"] for l in lineas if l["producto_id"]})
+        bus.publicar(VENTA_CONFIRMADA, {"venta_id": venta_id, "productos_ids": productos_ids})
+
+    return {
+        "exito": True,
+        "venta_id": venta_id,
+        "total": total,
+        "lineas": lineas
+    }
@@ -0,0 +1,50 @@
+"""
+Post-proceso de ventas, fuera del hilo de la interfaz.
+
+El motor de ventas publica VENTA_CONFIRMADA después del commit con los IDs
+de los productos afectados. Como el evento llega recién cuando la
+transacción ya está confirmada, no hace falta esperar a que el stock
+"aparezca" en la base (lo que antes hacía esperar_stock en VentasTab).
+
+Este manejador purga las unidades inactivas de esos productos, regenera
+stock.json, registra las ganancias del día y publica
+POSTVENTA_COMPLETADA para que la interfaz se refresque.
+"""
+from __future__ import annotations
+from typing import Dict, Any
+
+from aplicacion.backend.eventos.bus import bus, VENTA_CONFIRMADA, POSTVENTA_COMPLETADA
+from aplicacion.backend.stock.crud import exportar_productos_json
+from aplicacion.backend.ventas.utils import purgar_unidades_inactivas
+from aplicacion.backend.metricas.ganancias.crud import GananciasCRUD
+
+
+def procesar_venta_confirmada(datos: Dict[str, Any]):
+    venta_id = datos.get("venta_id")
+    productos_ids = datos.get("productos_ids") or []
+
+    # Las diferencias entre cantidad y unidades activas las corrige la
+    # conciliación periódica (stock/conciliacion.py), no cada venta
+    for pid in productos_ids:
+        resultado = purgar_unidades_inactivas(pid)
+        if not resultado.get("exito"):
+            print(f"[WARN] purgar_unidades_inactivas({pid}) falló: {resultado.get('mensaje')}")
+
+    try:
+        exportar_productos_json(ids=productos_ids)
+    except Exception as e:
+        print(f"[WARN] No se pudo exportar stock.json: {e}")
+
+    try:
+        registro = GananciasCRUD.registrar_ganancias_hoy(sobrescribir=True)
+        if registro.get("success"):
+            print(f"[INFO] Ganancias registradas automáticamente: {registro.get('message', 'Éxito')}")
+        else:
+            print(f"[WARN] No se pudo registrar ganancias automáticamente: {registro.get('message', 'Error desconocido')}")
+    except Exception as e:
+        print(f"[ERROR] Error al registrar ganancias automáticamente: {e}")
+
+    bus.publicar(POSTVENTA_COMPLETADA, {"venta_id": venta_id, "productos_ids": productos_ids})
+
+
+bus.suscribir(VENTA_CONFIRMADA, procesar_venta_confirmada)
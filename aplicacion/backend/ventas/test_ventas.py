@@ -1,6 +1,7 @@
 from aplicacion.backend.ventas import controller
 from aplicacion.backend.ventas import crud
 from aplicacion.backend.stock import controller as stock_controller
+from aplicacion.backend.eventos.bus import bus
 
 def mostrar_productos_disponibles():
     """Muestra todos los productos disponibles para venta"""
@@ -176,10 +177,9 @@ def menu_ventas():
                 print(f"\n✅ Venta confirmada con éxito. ID: {resultado['venta_id']}")
                 print(f"💰 Total: ${resultado['total']}")
                 
-                # Ejecutar limpieza automática de unidades fantasma
-                for item in resultado["productos"]:
-                    if hasattr(stock_controller, 'limpiar_unidades_fantasma_controller'):
-                        stock_controller.limpiar_unidades_fantasma_controller(item["producto_id"])
+                # La limpieza de unidades fantasma corre en el bus de eventos
+                bus.esperar()
+                print("🧹 Post-proceso de la venta completado.")
             else:
                 print(f"❌ Error al confirmar la venta: {resultado.get('mensaje')}")
 
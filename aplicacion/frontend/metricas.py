@@ -603,33 +603,24 @@ class MetricasTab(QWidget):
         try:
             self.log_message("Verificando días con ventas sin registrar...", "INFO")
             
-            # Verificar últimos 30 días
+            # Últimos 30 días: un cálculo agrupado y un alta en bloque de los que falten
             today = date.today()
+            desde = today - timedelta(days=29)
             
-            missing_days = []
-            for i in range(30):
-                check_date = today - timedelta(days=i)
-                fecha_str = check_date.isoformat()
-                
-                # Verificar si ya está registrado
-                consulta_result = controller.consultar_ganancia_fecha_controller(fecha_str)
-                
-                if not consulta_result["success"]:
-                    # No está registrado, verificar si hay ventas
-                    calc_result = controller.calcular_ganancias_fecha_controller(fecha_str)
-                    
-                    if calc_result["success"] and calc_result["data"]["cantidad_ventas"] > 0:
-                        missing_days.append(fecha_str)
+            register_result = controller.registrar_ganancias_rango_controller(
+                desde.isoformat(), today.isoformat()
+            )
+            
+            if not register_result["success"]:
+                self.log_message(f"Error registrando días faltantes: {register_result['message']}", "ERROR")
+                return
             
+            missing_days = register_result["data"]["creados"]
             if missing_days:
                 self.log_message(f"Encontrados {len(missing_days)} días con ventas sin registrar", "INFO")
                 
                 for fecha in missing_days:
-                    register_result = controller.registrar_ganancias_fecha_controller(fecha)
-                    if register_result["success"]:
-                        self.log_message(f"Registrado retroactivamente: {fecha}", "INFO")
-                    else:
-                        self.log_message(f"Error registrando {fecha}: {register_result['message']}", "ERROR")
+                    self.log_message(f"Registrado retroactivamente: {fecha}", "INFO")
                 
                 # Actualizar interfaz
                 self.refresh_all_data()
@@ -778,23 +769,23 @@ class MetricasTab(QWidget):
             self.log_message(f"Error actualizando métricas de hoy: {str(e)}", "ERROR")
     
     def refresh_period_metrics(self):
-        """Actualizar métricas por período"""
+        """Actualizar métricas por período (desde el resumen diario de ventas)"""
         try:
             # Semana
-            week_result = controller.listar_ganancias_semana_controller()
+            week_result = controller.resumen_ventas_semana_controller()
             if week_result["success"] and week_result["data"]["ganancias"]:
                 week_total = week_result["data"]["resumen"]["total_neta"]
                 week_days = week_result["data"]["resumen"]["cantidad_dias"]
                 self.week_card.update_value(
                     f"${week_total:,.0f}",
-                    f"{week_days} días registrados",
+                    f"{week_days} días con ventas",
                     "success" if week_total > 0 else "normal"
                 )
             else:
-                self.week_card.update_value("$0", "Sin registros", "normal")
+                self.week_card.update_value("$0", "Sin ventas", "normal")
             
             # Mes actual
-            month_result = controller.obtener_resumen_mes_actual_controller()
+            month_result = controller.resumen_ventas_mes_actual_controller()
             if month_result["success"] and month_result["data"]["ganancias"]:
                 month_total = month_result["data"]["resumen"]["total_neta"]
                 month_days = month_result["data"]["resumen"]["cantidad_dias"]
@@ -805,11 +796,11 @@ class MetricasTab(QWidget):
                     "success" if month_total > 0 else "normal"
                 )
             else:
-                self.month_card.update_value("$0", "Sin registros", "normal")
+                self.month_card.update_value("$0", "Sin ventas", "normal")
             
             # Año actual
             year = date.today().year
-            year_result = controller.listar_ganancias_rango_controller(
+            year_result = controller.resumen_ventas_rango_controller(
                 f"{year}-01-01", f"{year}-12-31"
             )
             if year_result["success"] and year_result["data"]["ganancias"]:
@@ -817,11 +808,11 @@ class MetricasTab(QWidget):
                 year_days = year_result["data"]["resumen"]["cantidad_dias"]
                 self.year_card.update_value(
                     f"${year_total:,.0f}",
-                    f"{year_days} días registrados",
+                    f"{year_days} días con ventas",
                     "success" if year_total > 0 else "normal"
                 )
             else:
-                self.year_card.update_value("$0", "Sin registros", "normal")
+                self.year_card.update_value("$0", "Sin ventas", "normal")
                 
         except Exception as e:
             self.log_message(f"Error actualizando métricas de período: {str(e)}", "ERROR")
@@ -846,12 +837,23 @@ class MetricasTab(QWidget):
             # Determinar días del mes
             days_in_month = calendar.monthrange(year, month)[1]
             
+            # Días sin registrar: se calculan todos juntos con una consulta agrupada
+            calculated_data = {}
+            if len(registered_data) < days_in_month:
+                calc_result = controller.calcular_ganancias_rango_controller(
+                    f"{year}-{month:02d}-01", f"{year}-{month:02d}-{days_in_month:02d}"
+                )
+                if calc_result["success"]:
+                    for dia in calc_result["data"]["dias"]:
+                        calculated_data[int(dia["fecha"][8:10])] = dia
+                else:
+                    self.log_message(f"Error calculando días sin registrar: {calc_result['message']}", "ERROR")
+            
             # Llenar tabla
             self.monthly_table.setRowCount(days_in_month)
             
             for day in range(1, days_in_month + 1):
                 row = day - 1
-                fecha_dia = f"{year}-{month:02d}-{day:02d}"
                 
                 # Día
                 self.monthly_table.setItem(row, 0, QTableWidgetItem(str(day)))
@@ -869,12 +871,10 @@ class MetricasTab(QWidget):
                     self.monthly_table.setItem(row, 4, QTableWidgetItem("✅ Registrado"))
                     self.monthly_table.setItem(row, 5, QTableWidgetItem("N/A"))
                 else:
-                    # Calcular datos en tiempo real para ver si hay ventas
-                    calc_result = controller.calcular_ganancias_fecha_controller(fecha_dia)
+                    data = calculated_data.get(day)
                     
-                    if calc_result["success"] and calc_result["data"]["cantidad_ventas"] > 0:
+                    if data and data["cantidad_ventas"] > 0:
                         # Hay ventas pero no está registrado
-                        data = calc_result["data"]
                         neta = data["ganancia_neta"]
                         bruta = data["ganancia_bruta"]
                         ventas = data["cantidad_ventas"]
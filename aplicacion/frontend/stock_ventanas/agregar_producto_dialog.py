@@ -1,7 +1,7 @@
 # stock_ventanas/agregar_producto_dialog.py
 from __future__ import annotations
 
-from PyQt6.QtCore import Qt, QDate, QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, QDate, QThread, pyqtSignal, QTimer, QEventLoop
 from PyQt6.QtGui import QFont, QIntValidator, QDoubleValidator, QValidator
 from PyQt6.QtWidgets import (
     QDialog, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
@@ -19,7 +19,7 @@ from datetime import datetime
 
 # Imports para integración con backend
 from aplicacion.backend.stock import controller
-from aplicacion.backend.stock.utils import fecha_actual_iso, generar_codigo_barras
+from aplicacion.backend.stock.utils import clasificar_producto_por_unidad, generar_codigo_barras
 
 
 # ===== WIDGET DE AUTO-FORMATO DE FECHA =====
@@ -302,6 +302,40 @@ class CodigoGeneratorThread(QThread):
             self.msleep(1)
 
 
+# ===== THREAD PARA GUARDAR UNIDADES =====
+class GuardarProductoThread(QThread):
+    """Thread que guarda el producto y todas sus unidades en una sola transacción"""
+    progress = pyqtSignal(int, int)  # unidades guardadas, total
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, datos_producto, unidades, observaciones=""):
+        super().__init__()
+        self.datos_producto = datos_producto
+        self.unidades = unidades
+        self.observaciones = observaciones
+        self.cancelado = False
+        self.producto = None
+        self.guardadas = 0
+
+    def cancelar(self):
+        """Pedido de cancelación: el próximo lote deshace la transacción entera"""
+        self.cancelado = True
+
+    def _avanzar(self, hechas, total):
+        if self.cancelado:
+            raise RuntimeError("Guardado cancelado")
+        self.progress.emit(hechas, total)
+
+    def run(self):
+        try:
+            self.producto, creadas = controller.agregar_producto_con_unidades_controller(
+                self.datos_producto, self.unidades, observaciones=self.observaciones, al_avanzar=self._avanzar
+            )
+            self.guardadas = len(creadas)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+
 # ===== TABLA OPTIMIZADA =====
 class OptimizedTableWidget(QTableWidget):
     """Tabla optimizada con paginación virtual"""
@@ -1058,73 +1092,54 @@ class AgregarProductoDialog(QDialog):
                 progress.show()
                 QApplication.processEvents()
             
-            # 1. Crear producto
+            # 1. Unidades: las físicas o, si es divisible (kg), una unidad especial con código interno
+            if clasificar_producto_por_unidad(self.datos_producto.get("unidad_medida", "")):
+                from aplicacion.backend.stock.utils import generar_codigo_barras_con_letras
+                unidades = [{"codigo_barras": generar_codigo_barras_con_letras(), "fecha_vencimiento": None}]
+                observaciones = "Producto a granel (kg)"
+            else:
+                unidades = self.unidades_temp
+                observaciones = ""
+
+            # 2. Producto y unidades en una transacción, en un thread: cancelar o un
+            # código repetido no deja el producto sin unidades
+            hilo = GuardarProductoThread(self.datos_producto, unidades, observaciones)
+            errores = []
+            hilo.error_occurred.connect(errores.append)
+
             if total_unidades > 100:
-                progress.setLabelText("Creando producto...")
+                progress.setLabelText(f"Guardando producto y unidades... (0 de {len(unidades)})")
                 progress.setValue(10)
-                QApplication.processEvents()
-                
-            producto_creado = controller.agregar_producto_controller(self.datos_producto)
-            print(f"Producto creado: {producto_creado.nombre} con ID {producto_creado.id}")
-            
-            if total_unidades > 100:
-                progress.setValue(20)
-                QApplication.processEvents()
-                
+
+                def _on_progreso(hechas, total):
+                    progress.setLabelText(f"Guardando producto y unidades... ({hechas} de {total})")
+                    progress.setValue(10 + int(hechas / total * 70))
+
+                hilo.progress.connect(_on_progreso)
+                progress.canceled.connect(hilo.cancelar)
                 if progress.wasCanceled():
                     return False
-            
-            # 2. Crear unidades físicas si no es divisible
-            if not producto_creado.es_divisible and self.unidades_temp:
-                ahora = fecha_actual_iso()
-                batch_size = 50  # Batches pequeños para mantener responsividad
-                
-                for i in range(0, len(self.unidades_temp), batch_size):
-                    if total_unidades > 100:
-                        if progress.wasCanceled():
-                            return False
-                            
-                        progress_value = 20 + int((i / len(self.unidades_temp)) * 60)
-                        progress.setLabelText(f"Guardando unidades... ({i+1}-{min(i+batch_size, len(self.unidades_temp))} de {len(self.unidades_temp)})")
-                        progress.setValue(progress_value)
-                        QApplication.processEvents()
-                    
-                    batch = self.unidades_temp[i:i+batch_size]
-                    for unidad_data in batch:
-                        controller.agregar_unidad_controller({
-                            "producto_id": producto_creado.id,
-                            "codigo_barras": unidad_data["codigo_barras"],
-                            "estado": "activo",
-                            "fecha_ingreso": ahora,
-                            "fecha_modificacion": ahora,
-                            "observaciones": "",
-                            "fecha_vencimiento": unidad_data["fecha_vencimiento"]
-                        })
-                
-                print(f"Se registraron {len(self.unidades_temp)} unidades físicas.")
-                
-            # 3. Si es divisible (kg), crear una unidad especial
-            elif producto_creado.es_divisible:
-                if total_unidades > 100:
-                    progress.setLabelText("Creando unidad de kilogramos...")
-                    progress.setValue(80)
-                    QApplication.processEvents()
-                    
-                from aplicacion.backend.stock.utils import generar_codigo_barras_con_letras
-                codigo = generar_codigo_barras_con_letras()
-                ahora = fecha_actual_iso()
-                controller.agregar_unidad_controller({
-                    "producto_id": producto_creado.id,
-                    "codigo_barras": codigo,
-                    "estado": "activo",
-                    "fecha_ingreso": ahora,
-                    "fecha_modificacion": ahora,
-                    "observaciones": "Producto a granel (kg)",
-                    "fecha_vencimiento": None
-                })
-                print(f"Producto por kg registrado con código interno: {codigo}")
-            
-            # 4. Exportar JSON actualizado - SECCIÓN MEJORADA
+
+            # La UI sigue respondiendo mientras el thread escribe
+            espera = QEventLoop()
+            hilo.finished.connect(espera.quit)
+            hilo.start()
+            espera.exec()
+
+            if errores:
+                if hilo.cancelado:
+                    print("Guardado cancelado; no se registró el producto ni sus unidades.")
+                    return False
+                raise Exception(errores[0])
+
+            producto_creado = hilo.producto
+            print(f"Producto creado: {producto_creado.nombre} con ID {producto_creado.id}")
+            if producto_creado.es_divisible:
+                print(f"Producto por kg registrado con código interno: {unidades[0]['codigo_barras']}")
+            else:
+                print(f"Se registraron {hilo.guardadas} unidades físicas.")
+
+            # 3. Exportar JSON actualizado - SECCIÓN MEJORADA
             if total_unidades > 100:
                 progress.setLabelText("Actualizando inventario...")
                 progress.setValue(90)
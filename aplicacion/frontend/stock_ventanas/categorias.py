@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
 from typing import List, Dict
 
 from PyQt6.QtCore import Qt, pyqtSignal
@@ -14,10 +13,7 @@ from PyQt6.QtWidgets import (
     QSpacerItem, QComboBox, QListView
 )
 
-THIS_DIR = Path(__file__).resolve().parent
-FRONTEND_DIR = THIS_DIR.parent
-JSON_CATEGORIAS = FRONTEND_DIR / "json" / "categorias.json"
-JSON_STOCK = FRONTEND_DIR / "json" / "stock.json"
+from aplicacion.backend.stock.catalogo import catalogo
 
 
 # =========================
@@ -411,14 +407,10 @@ class CategoryProductsTable(QWidget):
     # ---- data ----
     def _load_products_data(self):
         try:
-            if JSON_STOCK.exists():
-                self.products_data = json.loads(JSON_STOCK.read_text(encoding="utf-8"))
-                print(f"Productos disponibles para venta: {len(self.products_data)}")
-            else:
-                print(f"No existe {JSON_STOCK}")
-                self.products_data = []
+            self.products_data = catalogo.listar_productos()
+            print(f"Productos disponibles para venta: {len(self.products_data)}")
         except Exception as e:
-            print(f"[categorias] Error leyendo {JSON_STOCK}: {e}")
+            print(f"[categorias] Error leyendo el catálogo: {e}")
             self.products_data = []
 
     def set_category(self, categoria: str):
@@ -701,32 +693,22 @@ class CategoriasScreen(QWidget):
     # ---------- datos ----------
     def _read_json(self) -> List[Dict]:
         try:
-            if not JSON_CATEGORIAS.exists():
-                return [{"id": None, "nombre": "SIN CATEGORÍA", "descripcion": "", "activa": True}]
-            raw = json.loads(JSON_CATEGORIAS.read_text(encoding="utf-8"))
-            src = raw.get("categorias") if isinstance(raw, dict) else raw
             items: List[Dict] = []
-            if isinstance(src, list) and src and isinstance(src[0], dict):
-                for it in src:
-                    nombre = str(it.get("nombre", "")).strip()
-                    if not nombre or not bool(it.get("activa", True)):
-                        continue
-                    items.append({
-                        "id": it.get("id"),
-                        "nombre": nombre,
-                        "descripcion": str(it.get("descripcion", "")).strip(),
-                        "activa": True
-                    })
-            elif isinstance(src, list):
-                for s in src:
-                    s = str(s).strip()
-                    if s:
-                        items.append({"id": None, "nombre": s, "descripcion": "", "activa": True})
+            for it in catalogo.listar_categorias(solo_activas=True):
+                nombre = str(it.get("nombre", "")).strip()
+                if not nombre:
+                    continue
+                items.append({
+                    "id": it.get("id"),
+                    "nombre": nombre,
+                    "descripcion": str(it.get("descripcion", "")).strip(),
+                    "activa": True
+                })
             if not items:
                 items = [{"id": None, "nombre": "SIN CATEGORÍA", "descripcion": "", "activa": True}]
             return items
         except Exception as e:
-            print(f"[categorias] Error leyendo {JSON_CATEGORIAS}: {e}")
+            print(f"[categorias] Error leyendo categorías del catálogo: {e}")
             return [{"id": None, "nombre": "SIN CATEGORÍA", "descripcion": "", "activa": True}]
 
     def refresh(self):
@@ -755,10 +737,9 @@ class CategoriasScreen(QWidget):
     # ---------- utilidades stock ----------
     def _read_stock(self) -> List[Dict]:
         try:
-            if JSON_STOCK.exists():
-                return json.loads(JSON_STOCK.read_text(encoding="utf-8"))
+            return catalogo.listar_productos()
         except Exception as e:
-            print(f"[categorias] Error leyendo {JSON_STOCK}: {e}")
+            print(f"[categorias] Error leyendo el catálogo: {e}")
         return []
 
     def _get_all_products_from_backend(self) -> List[Dict]:
@@ -0,0 +1,98 @@
+# stock_ventanas/modelos_tabla.py
+"""
+Modelos de tabla compartidos por las pantallas de stock.
+
+Las grillas de productos, vencimientos y unidades creaban un
+QTableWidgetItem (o un widget entero) por celda y por fila: memoria y tiempo
+de carga crecían con el total de filas aunque se vieran veinte. Con un
+QTableView sobre estos modelos, Qt pide data() solo para las celdas que
+pinta; cada fila es el diccionario que ya venía del backend y el texto se
+arma al pedirlo.
+
+- ModeloFilas: lista de diccionarios de solo lectura; las subclases definen
+  `columnas` y `dato(fila, columna, role)`.
+- FiltroFilas: QSortFilterProxyModel que filtra con una función sobre el
+  diccionario de la fila, sin tocar el modelo de origen. Los índices que da
+  la vista son del proxy: usar `fila_de(indice)` para llegar al diccionario.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+
+class ModeloFilas(QAbstractTableModel):
+    """Modelo sobre una lista de diccionarios; las celdas se formatean en data()"""
+
+    columnas: List[str] = []
+
+    def __init__(self, filas: Optional[List[Dict[str, Any]]] = None, parent=None):
+        super().__init__(parent)
+        self._filas: List[Dict[str, Any]] = list(filas or [])
+
+    # ---------------- datos ----------------
+    def set_filas(self, filas: List[Dict[str, Any]]):
+        """Reemplaza todas las filas (la vista vuelve a pedir solo lo visible)"""
+        self.beginResetModel()
+        self._filas = list(filas)
+        self.endResetModel()
+
+    def filas(self) -> List[Dict[str, Any]]:
+        return self._filas
+
+    def fila(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._filas[row] if 0 <= row < len(self._filas) else None
+
+    def refrescar_fila(self, row: int):
+        """Avisa a la vista que cambió el contenido de una fila"""
+        if 0 <= row < len(self._filas):
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columnas) - 1))
+
+    def dato(self, fila: Dict[str, Any], columna: int, role: int):
+        """Valor de la celda para `role`; None si la columna no lo define"""
+        return None
+
+    # ---------------- QAbstractTableModel ----------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columnas)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.columnas[section] if 0 <= section < len(self.columnas) else None
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        return self.dato(self._filas[index.row()], index.column(), role)
+
+
+class FiltroFilas(QSortFilterProxyModel):
+    """Proxy que muestra las filas cuyo diccionario cumple la condición (todas si no hay)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condicion: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+    def set_condicion(self, condicion: Optional[Callable[[Dict[str, Any]], bool]]):
+        self._condicion = condicion
+        # invalidate() rehace el mapeo de una vez; invalidateFilter() emite una
+        # inserción/borrado por cada tramo de filas que cambia y con filtros
+        # alternados sobre 100k filas tarda segundos
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._condicion is None:
+            return True
+        fila = self.sourceModel().fila(source_row)
+        return fila is not None and self._condicion(fila)
+
+    def fila_de(self, indice: QModelIndex) -> Optional[Dict[str, Any]]:
+        """Diccionario de la fila para un índice de la vista (o None)"""
+        if not indice.isValid():
+            return None
+        return self.sourceModel().fila(self.mapToSource(indice).row())
@@ -1,42 +1,122 @@
 # stock_ventanas/productos.py
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                             QLineEdit, QComboBox, QTableWidget, QTableWidgetItem, 
+                             QLineEdit, QComboBox, QTableView, 
                              QPushButton, QFrame, QHeaderView, QMessageBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont, QPixmap
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont, QPixmap, QColor
 from pathlib import Path
-import json
 import os
 
+from aplicacion.backend.eventos.bus import bus, CATALOGO_ACTUALIZADO
+from aplicacion.backend.stock.catalogo import catalogo
+from aplicacion.backend.stock import busqueda
+from aplicacion.frontend.stock_ventanas.modelos_tabla import ModeloFilas, FiltroFilas
+
+
+def _formatear_margen(margen_ganancia) -> str:
+    """Texto de la columna MARGEN DE GANANCIA a partir de product["margen"]"""
+    if margen_ganancia == "" or margen_ganancia is None:
+        return "0%"
+    if isinstance(margen_ganancia, (int, float)):
+        # Si es decimal (ej: 0.2), convertir a porcentaje
+        return f"{margen_ganancia * 100:.1f}%"
+    if isinstance(margen_ganancia, str):
+        # Si ya es string con %, usarlo tal como está
+        if "%" in margen_ganancia:
+            return margen_ganancia
+        try:
+            # Intentar convertir string a float y luego a porcentaje
+            margen_float = float(margen_ganancia)
+            if margen_float <= 1:  # Asumimos que es decimal (0.2)
+                return f"{margen_float * 100:.1f}%"
+            return f"{margen_float}%"  # Asumimos que ya es porcentaje (20)
+        except ValueError:
+            return str(margen_ganancia)
+    return "0%"
+
+
+def _texto_opcional(valor) -> str:
+    return "" if valor is None else str(valor)
+
+
+class ProductosTableModel(ModeloFilas):
+    """Grilla de productos (formato stock.json); el texto de cada celda se arma al pintarla"""
+
+    columnas = ["NOMBRE", "CATEGORIA", "STOCK", "COSTO", "PRECIO", "ESTADO",
+                "MARGEN DE GANANCIA", "GANANCIA BRUTA UNIT.", "GANANCIA NETA UNIT.",
+                "GANANCIA BRUTA TOTAL", "GANANCIA NETA TOTAL"]
+
+    _IZQUIERDA = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+    _CENTRO = Qt.AlignmentFlag.AlignCenter
+    _DERECHA = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+    _ALINEACION = [_IZQUIERDA, _CENTRO, _CENTRO, _DERECHA, _DERECHA, _CENTRO,
+                   _CENTRO, _DERECHA, _DERECHA, _DERECHA, _DERECHA]
+
+    _TEXTO = [
+        lambda p: str(p.get("nombre", "")),
+        lambda p: str(p.get("categoria", "")),
+        lambda p: str(p.get("stock", "")),
+        lambda p: str(p.get("costo", "")),
+        lambda p: str(p.get("precio", "")),
+        lambda p: str(p.get("estado", "")),
+        lambda p: _formatear_margen(p.get("margen", "")),
+        lambda p: _texto_opcional(p.get("ganancia_bruta_unitaria")),
+        lambda p: _texto_opcional(p.get("ganancia_neta_unitaria")),
+        lambda p: _texto_opcional(p.get("ganancia_bruta_total")),
+        lambda p: _texto_opcional(p.get("ganancia_neta_total")),
+    ]
+
+    _VERDE = QColor(Qt.GlobalColor.green)
+    _ROJO = QColor(Qt.GlobalColor.red)
+    _NEGRO = QColor(Qt.GlobalColor.black)
+    _BLANCO = QColor(Qt.GlobalColor.white)
+
+    def dato(self, product, columna, role):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._TEXTO[columna](product)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._ALINEACION[columna]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            # ESTADO lleva texto blanco sobre el color de fondo
+            return self._BLANCO if columna == 5 else self._NEGRO
+        if role == Qt.ItemDataRole.BackgroundRole and columna == 5:
+            activo = str(product.get("estado", "")).lower() == "activo"
+            return self._VERDE if activo else self._ROJO
+        return None
+
+
 class ProductosScreen(QWidget):
+    # Aviso del bus de eventos, re-emitido en el hilo de la UI
+    _catalogo_actualizado = pyqtSignal(dict)
+
     def __init__(self):
         super().__init__()
         self.products_data = []
         self.load_products_data()
         self.init_ui()
+
+        self._catalogo_actualizado.connect(self._al_actualizar_catalogo)
+        bus.suscribir_widget(self, [(CATALOGO_ACTUALIZADO, self._catalogo_actualizado.emit)])
+
+    def _al_actualizar_catalogo(self, datos: dict):
+        if datos.get("productos") or datos.get("eliminados"):
+            self.reload_data()
+        if datos.get("categorias"):
+            seleccion = self.categories_combo.currentText()
+            self.categories_combo.blockSignals(True)
+            self.categories_combo.clear()
+            self._load_categories()
+            indice = self.categories_combo.findText(seleccion)
+            self.categories_combo.setCurrentIndex(max(indice, 0))
+            self.categories_combo.blockSignals(False)
         
     def load_products_data(self):
-        """Cargar datos desde aplicacion/frontend/json/stock.json"""
+        """Cargar productos desde el catálogo compartido del backend"""
         try:
-            # Obtener la ruta absoluta del archivo JSON
-            base_dir = Path(__file__).resolve().parent.parent  # Sube 2 niveles desde stock_ventanas/
-            json_path = base_dir / "json" / "stock.json"
-            
-            print(f"Intentando cargar JSON desde: {json_path}")
-            
-            if json_path.exists():
-                with open(json_path, 'r', encoding='utf-8') as file:
-                    self.products_data = json.load(file)
-                print(f"✅ JSON cargado exitosamente: {len(self.products_data)} productos encontrados")
-            else:
-                print(f"❌ Archivo no encontrado en: {json_path}")
-                self._cargar_datos_ejemplo()
-                
-        except json.JSONDecodeError as e:
-            print(f"❌ Error al decodificar JSON: {e}")
-            self._cargar_datos_ejemplo()
+            self.products_data = catalogo.listar_productos()
+            print(f"✅ Catálogo cargado: {len(self.products_data)} productos")
         except Exception as e:
-            print(f"❌ Error al cargar stock.json: {e}")
+            print(f"❌ Error al cargar el catálogo: {e}")
             self._cargar_datos_ejemplo()
     
     def _cargar_datos_ejemplo(self):
@@ -222,7 +302,11 @@ class ProductosScreen(QWidget):
         search_layout.addWidget(self.categories_combo)
         
         # Tabla de productos
-        self.products_table = QTableWidget()
+        self.products_table = QTableView()
+        self.products_model = ProductosTableModel(parent=self)
+        self.products_proxy = FiltroFilas(self)
+        self.products_proxy.setSourceModel(self.products_model)
+        self.products_table.setModel(self.products_proxy)
         self.setup_table()
         
         # Botones de acción
@@ -337,48 +421,24 @@ class ProductosScreen(QWidget):
         self.categories_combo.currentTextChanged.connect(self.filter_products)
     
     def _load_categories(self):
-        """Cargar categorías desde aplicacion/frontend/json/categorias.json"""
+        """Cargar categorías desde el catálogo compartido del backend"""
         self.categories_combo.addItem("Todas..")
         
         try:
-            # Obtener la ruta absoluta del archivo JSON de categorías
-            base_dir = Path(__file__).resolve().parent.parent  # Sube 2 niveles desde stock_ventanas/
-            json_path = base_dir / "json" / "categorias.json"
-            
-            print(f"Intentando cargar categorías desde: {json_path}")
-            
-            if json_path.exists():
-                with open(json_path, 'r', encoding='utf-8') as file:
-                    categorias_data = json.load(file)
-                print(f"JSON de categorías cargado exitosamente")
-                
-                # Agregar categorías activas ordenadas alfabéticamente
-                if isinstance(categorias_data, list):
-                    # Extraer nombres de categorías activas
-                    categorias_activas = []
-                    for categoria in categorias_data:
-                        if isinstance(categoria, dict) and categoria.get("activa", False):
-                            nombre = categoria.get("nombre", "").strip()
-                            if nombre:
-                                categorias_activas.append(nombre)
-                    
-                    # Agregar categorías ordenadas alfabéticamente al combo
-                    for categoria in sorted(categorias_activas):
-                        self.categories_combo.addItem(categoria)
-                        
-                    print(f"Se cargaron {len(categorias_activas)} categorías activas")
-                else:
-                    print("Formato de JSON de categorías no válido (debe ser una lista)")
-                    self._cargar_categorias_defecto()
-            else:
-                print(f"Archivo de categorías no encontrado en: {json_path}")
-                self._cargar_categorias_defecto()
-                
-        except json.JSONDecodeError as e:
-            print(f"Error al decodificar JSON de categorías: {e}")
-            self._cargar_categorias_defecto()
+            # Agregar categorías activas ordenadas alfabéticamente
+            categorias_activas = []
+            for categoria in catalogo.listar_categorias(solo_activas=True):
+                nombre = (categoria.get("nombre") or "").strip()
+                if nombre:
+                    categorias_activas.append(nombre)
+
+            for categoria in sorted(categorias_activas):
+                self.categories_combo.addItem(categoria)
+
+            print(f"Se cargaron {len(categorias_activas)} categorías activas")
+
         except Exception as e:
-            print(f"Error al cargar categorias.json: {e}")
+            print(f"Error al cargar categorías del catálogo: {e}")
             self._cargar_categorias_defecto()
 
     def _cargar_categorias_defecto(self):
@@ -390,15 +450,11 @@ class ProductosScreen(QWidget):
     
     def setup_table(self):
         """Configurar la tabla de productos"""
-        # Definir columnas sin CODIGO y sin VENCIMIENTO
-        headers = ["NOMBRE", "CATEGORIA", "STOCK", "COSTO", "PRECIO", "ESTADO", 
-                  "MARGEN DE GANANCIA", "GANANCIA BRUTA UNIT.", "GANANCIA NETA UNIT.", "GANANCIA BRUTA TOTAL", "GANANCIA NETA TOTAL"]
-        self.products_table.setColumnCount(len(headers))
-        self.products_table.setHorizontalHeaderLabels(headers)
+        # Columnas (sin CODIGO y sin VENCIMIENTO) definidas en ProductosTableModel
         
         # Estilo de la tabla - FORZAMOS COLOR NEGRO PARA EL TEXTO
         self.products_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #CCCCCC;
                 border-radius: 5px;
@@ -407,12 +463,12 @@ class ProductosScreen(QWidget):
                 selection-background-color: #E3F2FD;
                 color: black;  /* Forzamos texto negro */
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #EEEEEE;
                 color: black;  /* Forzamos texto negro en items */
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #E3F2FD;
                 color: black;  /* Forzamos texto negro en selección */
             }
@@ -426,11 +482,11 @@ class ProductosScreen(QWidget):
         """)
         
         # Configurar selección
-        self.products_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.products_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.products_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.products_table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         
         # Hacer tabla de solo lectura
-        self.products_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.products_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         
         # Configurar anchos de columnas fijos
         header = self.products_table.horizontalHeader()
@@ -449,129 +505,38 @@ class ProductosScreen(QWidget):
         # Desactivar redimensionamiento automático
         header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         
+        # Alto de fila fijo: la vista ubica cualquier fila sin medir las anteriores
+        self.products_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        
         # Cargar datos desde JSON
         self.load_table_data()
     
     def load_table_data(self):
-        """Cargar datos en la tabla desde products_data"""
-        self.products_table.setRowCount(len(self.products_data))
-        
-        for row, product in enumerate(self.products_data):
-            # NOMBRE (ahora es la primera columna - índice 0)
-            nombre_item = QTableWidgetItem(str(product.get("nombre", "")))
-            nombre_item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            nombre_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 0, nombre_item)
-            
-            # CATEGORIA (índice 1)
-            categoria_item = QTableWidgetItem(str(product.get("categoria", "")))
-            categoria_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            categoria_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 1, categoria_item)
-            
-            # STOCK (índice 2)
-            stock_item = QTableWidgetItem(str(product.get("stock", "")))
-            stock_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            stock_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 2, stock_item)
-            
-            # COSTO (índice 3)
-            costo_item = QTableWidgetItem(str(product.get("costo", "")))
-            costo_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            costo_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 3, costo_item)
-            
-            # PRECIO (índice 4)
-            precio_item = QTableWidgetItem(str(product.get("precio", "")))
-            precio_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            precio_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 4, precio_item)
-            
-            # ESTADO (índice 5)
-            estado_item = QTableWidgetItem(str(product.get("estado", "")))
-            estado_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            
-            # Colorear según el estado (mantenemos el color de fondo pero con texto blanco)
-            if product.get("estado", "").lower() == "activo":
-                estado_item.setBackground(Qt.GlobalColor.green)
-                estado_item.setForeground(Qt.GlobalColor.white)  # Texto blanco para contraste
-            else:
-                estado_item.setBackground(Qt.GlobalColor.red)
-                estado_item.setForeground(Qt.GlobalColor.white)  # Texto blanco para contraste
-                
-            self.products_table.setItem(row, 5, estado_item)
-            
-            # MARGEN DE GANANCIA (índice 6) - CORREGIDO PARA USAR "margen"
-            margen_ganancia = product.get("margen", "")  # Cambio de "margen_ganancia" a "margen"
-            
-            # Formatear margen según su tipo
-            if margen_ganancia == "" or margen_ganancia is None:
-                margen_display = "0%"
-            elif isinstance(margen_ganancia, (int, float)):
-                # Si es decimal (ej: 0.2), convertir a porcentaje
-                margen_display = f"{margen_ganancia * 100:.1f}%"
-            elif isinstance(margen_ganancia, str):
-                # Si ya es string, usarlo tal como está
-                if "%" not in margen_ganancia:
-                    try:
-                        # Intentar convertir string a float y luego a porcentaje
-                        margen_float = float(margen_ganancia)
-                        if margen_float <= 1:  # Asumimos que es decimal (0.2)
-                            margen_display = f"{margen_float * 100:.1f}%"
-                        else:  # Asumimos que ya es porcentaje (20)
-                            margen_display = f"{margen_float}%"
-                    except ValueError:
-                        margen_display = str(margen_ganancia)
-                else:
-                    margen_display = str(margen_ganancia)
-            else:
-                margen_display = "0%"
-            
-            margen_item = QTableWidgetItem(margen_display)
-            margen_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            margen_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 6, margen_item)
-            
-            # GANANCIA BRUTA UNITARIA (índice 7)
-            ganancia_bruta_unit_item = QTableWidgetItem(str(product.get("ganancia_bruta_unitaria", "") if product.get("ganancia_bruta_unitaria") is not None else ""))
-            ganancia_bruta_unit_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            ganancia_bruta_unit_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 7, ganancia_bruta_unit_item)
-            
-            # GANANCIA NETA UNITARIA (índice 8)
-            ganancia_neta_unit_item = QTableWidgetItem(str(product.get("ganancia_neta_unitaria", "") if product.get("ganancia_neta_unitaria") is not None else ""))
-            ganancia_neta_unit_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            ganancia_neta_unit_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 8, ganancia_neta_unit_item)
-            
-            # GANANCIA BRUTA TOTAL (índice 9)
-            ganancia_bruta_total_item = QTableWidgetItem(str(product.get("ganancia_bruta_total", "") if product.get("ganancia_bruta_total") is not None else ""))
-            ganancia_bruta_total_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            ganancia_bruta_total_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 9, ganancia_bruta_total_item)
-            
-            # GANANCIA NETA TOTAL (índice 10)
-            ganancia_neta_total_item = QTableWidgetItem(str(product.get("ganancia_neta_total", "") if product.get("ganancia_neta_total") is not None else ""))
-            ganancia_neta_total_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            ganancia_neta_total_item.setForeground(Qt.GlobalColor.black)
-            self.products_table.setItem(row, 10, ganancia_neta_total_item)
+        """Pasar products_data al modelo; la vista formatea solo las filas visibles"""
+        self.products_model.set_filas(self.products_data)
     
     def filter_products(self):
         """Filtrar productos según búsqueda y categoría"""
-        search_text = self.search_input.text().lower()
+        search_text = self.search_input.text().strip()
         selected_category = self.categories_combo.currentText()
         
-        for row in range(self.products_table.rowCount()):
-            # Obtener datos de la fila (ahora nombre está en índice 0, categoría en índice 1)
-            nombre = self.products_table.item(row, 0).text().lower() if self.products_table.item(row, 0) else ""
-            categoria = self.products_table.item(row, 1).text() if self.products_table.item(row, 1) else ""
-            
-            # Verificar filtros (solo buscar en nombre)
-            matches_search = search_text in nombre
-            matches_category = selected_category == "Todas.." or categoria == selected_category
-            
-            # Mostrar/ocultar fila
-            self.products_table.setRowHidden(row, not (matches_search and matches_category))
+        # Ids que coinciden con la búsqueda (índice FTS: nombre, proveedor y categoría, sin acentos)
+        ids_encontrados = set(busqueda.buscar_ids(search_text, limite=None)) if search_text else None
+        
+        if ids_encontrados is None and selected_category == "Todas..":
+            self.products_proxy.set_condicion(None)
+            return
+        
+        def coincide(product):
+            if ids_encontrados is not None and product.get("id") not in ids_encontrados:
+                return False
+            return selected_category == "Todas.." or str(product.get("categoria", "")) == selected_category
+        
+        self.products_proxy.set_condicion(coincide)
+    
+    def _producto_seleccionado(self):
+        """Diccionario del producto en la fila seleccionada (None si no hay selección)"""
+        return self.products_proxy.fila_de(self.products_table.currentIndex())
     
     def add_product(self):
         """Función para agregar producto"""
@@ -595,9 +560,9 @@ class ProductosScreen(QWidget):
     
     def edit_product(self):
         """Función para editar producto seleccionado"""
-        selected_row = self.products_table.currentRow()
+        producto = self._producto_seleccionado()
         
-        if selected_row < 0:
+        if producto is None:
             # Mostrar mensaje si no hay producto seleccionado
             QMessageBox.warning(
                 self, 
@@ -608,26 +573,7 @@ class ProductosScreen(QWidget):
         
         try:
             # Obtener datos del producto seleccionado
-            producto_data = {}
-            
-            # Si tenemos los datos en products_data, usarlos
-            if selected_row < len(self.products_data):
-                producto_data = self.products_data[selected_row].copy()
-            else:
-                # Si no, obtener los datos directamente de la tabla
-                producto_data = {
-                    "nombre": self.products_table.item(selected_row, 0).text() if self.products_table.item(selected_row, 0) else "",
-                    "categoria": self.products_table.item(selected_row, 1).text() if self.products_table.item(selected_row, 1) else "",
-                    "stock": self.products_table.item(selected_row, 2).text() if self.products_table.item(selected_row, 2) else "",
-                    "costo": self.products_table.item(selected_row, 3).text() if self.products_table.item(selected_row, 3) else "",
-                    "precio": self.products_table.item(selected_row, 4).text() if self.products_table.item(selected_row, 4) else "",
-                    "estado": self.products_table.item(selected_row, 5).text() if self.products_table.item(selected_row, 5) else "",
-                    "margen_ganancia": self.products_table.item(selected_row, 6).text() if self.products_table.item(selected_row, 6) else "",
-                }
-                
-                # Si hay código en products_data, agregarlo
-                if selected_row < len(self.products_data) and "codigo" in self.products_data[selected_row]:
-                    producto_data["codigo"] = self.products_data[selected_row]["codigo"]
+            producto_data = producto.copy()
             
             print(f"Editando producto: {producto_data.get('nombre', 'Sin nombre')}")
             
@@ -686,9 +632,9 @@ class ProductosScreen(QWidget):
     
     def delete_product(self):
         """Función para eliminar producto seleccionado"""
-        selected_row = self.products_table.currentRow()
+        producto = self._producto_seleccionado()
         
-        if selected_row < 0:
+        if producto is None:
             QMessageBox.warning(
                 self, 
                 "Sin selección", 
@@ -697,27 +643,21 @@ class ProductosScreen(QWidget):
             return
         
         # Obtener nombre del producto para mostrar en confirmación
-        nombre_producto = ""
-        if self.products_table.item(selected_row, 0):
-            nombre_producto = self.products_table.item(selected_row, 0).text()
-        
-        # Obtener ID del producto desde products_data
-        producto_id = None
-        if selected_row < len(self.products_data):
-            # Buscar el ID en los datos del producto
-            if "id" in self.products_data[selected_row]:
-                producto_id = self.products_data[selected_row]["id"]
-            elif "codigo" in self.products_data[selected_row]:
-                # Si no hay ID, intentar buscar por nombre en el backend
-                try:
-                    from aplicacion.backend.stock import controller
-                    productos = controller.listar_productos_controller()
-                    for p in productos:
-                        if p.nombre == nombre_producto:
-                            producto_id = p.id
-                            break
-                except Exception as e:
-                    print(f"Error buscando producto por nombre: {e}")
+        nombre_producto = str(producto.get("nombre", ""))
+        
+        # Obtener ID del producto
+        producto_id = producto.get("id")
+        if producto_id is None and "codigo" in producto:
+            # Si no hay ID, intentar buscar por nombre en el backend
+            try:
+                from aplicacion.backend.stock import controller
+                productos = controller.listar_productos_controller()
+                for p in productos:
+                    if p.nombre == nombre_producto:
+                        producto_id = p.id
+                        break
+            except Exception as e:
+                print(f"Error buscando producto por nombre: {e}")
         
         if producto_id is None:
             QMessageBox.warning(
@@ -4,14 +4,16 @@ from __future__ import annotations
 from pathlib import Path
 from typing import List, Dict, Iterable
 
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont, QPixmap
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QRectF
+from PyQt6.QtGui import QFont, QPixmap, QColor, QPainter
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QLineEdit,
-    QComboBox, QTableWidget, QTableWidgetItem, QHeaderView, QSizePolicy,
-    QSpacerItem, QProgressDialog, QApplication, QMessageBox
+    QComboBox, QTableView, QHeaderView, QSizePolicy, QStyle,
+    QStyledItemDelegate, QSpacerItem, QProgressDialog, QApplication, QMessageBox
 )
 
+from aplicacion.frontend.stock_ventanas.modelos_tabla import ModeloFilas, FiltroFilas
+
 BASE_DIR = Path(__file__).resolve().parent.parent  # .../frontend
 ICON_IMG = BASE_DIR / "stock_ventanas" / "Lo de manoli.png"
 
@@ -60,35 +62,46 @@ def _table_header_stylesheet() -> str:
         }
     """
 
-def _estado_cell_widget(texto: str) -> QWidget:
-    """
-    Crea el widget de la celda ESTADO:
-    • puntito de color + texto en negro
-    • rojo si VENCIDO, naranja si POR VENCER
-    • sin recuadros negros (fondos transparentes)
-    """
-    estado = (texto or "").strip().upper()
-    is_vencido = (estado == "VENCIDO")
-    color = COLOR_RED if is_vencido else COLOR_ORANGE
-    label_text = "VENCIDO" if is_vencido else "POR VENCER"
+class VencimientosTableModel(ModeloFilas):
+    """Filas "listas para pintar" de DataLoader; ESTADO lo dibuja EstadoDelegate"""
 
-    w = QWidget()
-    w.setStyleSheet("background: transparent;")
-    lay = QHBoxLayout(w)
-    lay.setContentsMargins(6, 2, 6, 2)
-    lay.setSpacing(6)
+    columnas = ["CÓDIGO", "NOMBRE", "CATEGORÍA", "FECHA VENC.", "DÍAS RESTAN.", "ESTADO"]
+    _CLAVES = ["codigo", "nombre", "categoria", "fecha_venc", "dias_rest", "estado"]
 
-    dot = QFrame()
-    dot.setFixedSize(12, 12)
-    dot.setStyleSheet(f"border-radius: 6px; background-color: {color};")
+    def dato(self, r, columna, role):
+        if role == Qt.ItemDataRole.DisplayRole:
+            valor = r[self._CLAVES[columna]]
+            return "" if valor is None else str(valor)
+        return None
 
-    lbl = QLabel(label_text)
-    lbl.setStyleSheet("color: black; background: transparent; border: none;")
 
-    lay.addWidget(dot, 0, Qt.AlignmentFlag.AlignVCenter)
-    lay.addWidget(lbl, 0, Qt.AlignmentFlag.AlignVCenter)
-    lay.addStretch(1)
-    return w
+class EstadoDelegate(QStyledItemDelegate):
+    """
+    Pinta la celda ESTADO sin crear widgets:
+    • puntito de color + texto en negro
+    • rojo si VENCIDO, naranja si POR VENCER
+    """
+    _ROJO = QColor(COLOR_RED)
+    _NARANJA = QColor(COLOR_ORANGE)
+
+    def paint(self, painter, option, index):
+        estado = (index.data() or "").strip().upper()
+        is_vencido = (estado == "VENCIDO")
+        color = self._ROJO if is_vencido else self._NARANJA
+        label_text = "VENCIDO" if is_vencido else "POR VENCER"
+
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        rect = option.rect.adjusted(6, 2, -6, -2)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(color)
+        painter.drawEllipse(QRectF(rect.left(), rect.center().y() - 5.5, 12, 12))
+        painter.setPen(Qt.GlobalColor.black)
+        painter.drawText(rect.adjusted(18, 0, 0, 0),
+                         int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter), label_text)
+        painter.restore()
 
 
 class DataLoader(QThread):
@@ -151,7 +164,6 @@ class VencimientosScreen(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._all_rows: List[Dict] = []
-        self._filtered_rows: List[Dict] = []
         self._categories: List[str] = ["Todas.."]
         self._loading = False
         self._data_loader = None
@@ -266,7 +278,11 @@ class VencimientosScreen(QWidget):
         inner_l.addLayout(header)
 
         # Tabla
-        self.table = QTableWidget()
+        self.table = QTableView()
+        self.model = VencimientosTableModel(parent=self)
+        self.proxy = FiltroFilas(self)
+        self.proxy.setSourceModel(self.model)
+        self.table.setModel(self.proxy)
         self._setup_table()
         inner_l.addWidget(self.table)
 
@@ -295,16 +311,13 @@ class VencimientosScreen(QWidget):
         root.addWidget(outer)
 
     def _setup_table(self):
-        headers = ["CÓDIGO", "NOMBRE", "CATEGORÍA", "FECHA VENC.", "DÍAS RESTAN.", "ESTADO"]
-        self.table.setColumnCount(len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: white;
                 border: 1px solid #CFCFCF;
                 border-radius: 6px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 color: black;  /* <- fuerza texto negro siempre */
                 selection-background-color: #CDEEF2;
                 selection-color: black;
@@ -315,6 +328,10 @@ class VencimientosScreen(QWidget):
         hh.setHighlightSections(False)
         hh.setStretchLastSection(True)
         hh.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self._estado_delegate = EstadoDelegate(self.table)
+        self.table.setItemDelegateForColumn(5, self._estado_delegate)
 
         # Anchos
         self.table.setColumnWidth(0, 130)  # código
@@ -338,24 +355,35 @@ class VencimientosScreen(QWidget):
             self._load_data()
 
     def _on_clean_clicked(self):
-        """Confirma, limpia vencidos en BD y recarga tabla."""
+        """Muestra qué se va a borrar, confirma, limpia vencidos en BD y recarga tabla."""
+        from aplicacion.backend.stock import controller
+        try:
+            vista_previa = controller.purgar_unidades_vencidas_controller(simular=True)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo revisar los vencidos:\n{e}")
+            return
+        if not vista_previa["eliminadas"]:
+            QMessageBox.information(self, "Limpiar vencidos", "No hay unidades vencidas para borrar.")
+            return
+
         resp = QMessageBox.question(
             self,
             "Limpiar vencidos",
-            "¿Seguro que querés BORRAR todas las unidades vencidas?\n"
-            "Esta acción no se puede deshacer.",
+            f"Se van a BORRAR {vista_previa['eliminadas']} unidades vencidas "
+            f"de {len(vista_previa['productos'])} productos.\n"
+            "Esta acción no se puede deshacer. ¿Continuar?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         if resp != QMessageBox.StandardButton.Yes:
             return
         try:
-            from aplicacion.backend.stock import controller
-            borrados = controller.limpiar_unidades_vencidas_controller()
+            resultado = controller.purgar_unidades_vencidas_controller(fecha_corte=vista_previa["fecha_corte"])
             QMessageBox.information(
                 self,
                 "Limpieza completada",
-                f"Se eliminaron {borrados} unidades vencidas."
+                f"Se eliminaron {resultado['eliminadas']} unidades vencidas "
+                f"de {len(resultado['productos'])} productos."
             )
             self._load_data()
         except Exception as e:
@@ -418,7 +446,8 @@ class VencimientosScreen(QWidget):
             self.combo_categoria.addItem(c)
         self.combo_categoria.blockSignals(False)
 
-        # Aplicar filtros activos (si los hay)
+        # Pasar al modelo y aplicar filtros activos (si los hay)
+        self.model.set_filas(rows)
         self._apply_filters()
 
         # Resumen
@@ -439,44 +468,10 @@ class VencimientosScreen(QWidget):
                     ok = False
             return ok
 
-        self._filtered_rows = [r for r in self._all_rows if _match(r)]
-        self._paint_table()
-
-    # ---------- Pintado ----------
-    def _paint_table(self):
-        rows = self._filtered_rows
-        self.table.setRowCount(len(rows))
-
-        for i, r in enumerate(rows):
-            # CÓDIGO
-            item0 = QTableWidgetItem(r["codigo"])
-            item0.setFlags(item0.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            self.table.setItem(i, 0, item0)
-
-            # NOMBRE
-            item1 = QTableWidgetItem(r["nombre"])
-            item1.setFlags(item1.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            self.table.setItem(i, 1, item1)
-
-            # CATEGORÍA
-            item2 = QTableWidgetItem(r["categoria"])
-            item2.setFlags(item2.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            self.table.setItem(i, 2, item2)
-
-            # FECHA VENC.
-            item3 = QTableWidgetItem(r["fecha_venc"])
-            item3.setFlags(item3.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            self.table.setItem(i, 3, item3)
-
-            # DÍAS RESTAN.
-            dias_txt = "" if r["dias_rest"] is None else str(r["dias_rest"])
-            item4 = QTableWidgetItem(dias_txt)
-            item4.setFlags(item4.flags() ^ Qt.ItemFlag.ItemIsEditable)
-            self.table.setItem(i, 4, item4)
-
-            # ESTADO (widget)
-            estado_w = _estado_cell_widget(r["estado"])
-            self.table.setCellWidget(i, 5, estado_w)
+        if not text and (not cat or cat == "Todas.."):
+            self.proxy.set_condicion(None)
+        else:
+            self.proxy.set_condicion(_match)
 
     # ---------- Resumen ----------
     def _update_footer(self, stats: Dict):
@@ -3,23 +3,19 @@ from __future__ import annotations
 
 import json
 import os
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QPainter, QPen
 from PyQt6.QtWidgets import (
     QDialog, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
-    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QProgressBar,
-    QApplication, QLineEdit
+    QTableView, QHeaderView, QMessageBox, QProgressBar,
+    QApplication, QLineEdit, QStyle, QStyledItemDelegate
 )
 
 # Importar los widgets optimizados del diálogo de agregar producto
 from .agregar_producto_dialog import AutoFormatDateEdit, OptimizedTableWidget
 
 # Importar las funciones de utils.py para obtener códigos de barras
-from aplicacion.backend.stock.utils import (
-    obtener_codigos_por_producto,
-    obtener_codigos_activos_por_producto,
-    mostrar_codigos_producto
-)
+from aplicacion.backend.stock.utils import mostrar_codigos_producto
 
 # Importar controller para obtener información del producto
 from aplicacion.backend.stock import controller
@@ -30,16 +26,200 @@ from aplicacion.backend.stock.controller import (
     actualizar_fechas_vencimiento_lote_controller
 )
 
+from .modelos_tabla import ModeloFilas
+
+TOOLTIP_FECHA = ("📅 Click para editar fecha de vencimiento\n"
+                 "Formato: YYYY-MM-DD\n"
+                 "Ejemplo: 2024-12-31\n"
+                 "Deja vacío para 'Sin vencimiento'")
+
+# (fondo, borde) de la celda de fecha según su estado
+COLORES_FECHA = {
+    "sin_cambios": ("#ffffff", "#22C55E"),
+    "vacia": ("#fffbeb", "#f59e0b"),
+    "valida": ("#f0fdf4", "#22c55e"),
+    "invalida": ("#fef2f2", "#ef4444"),
+    "error": ("#ffe6e6", "#dc2626"),
+}
+
+
+def _validar_fecha(texto):
+    """("vacia" | "valida" | "invalida", tooltip) para una fecha de vencimiento editada"""
+    fecha_limpia = (texto or "").strip()
+    if not fecha_limpia or fecha_limpia == "Sin vencimiento":
+        return "vacia", "📅 Sin fecha de vencimiento"
+    # Validación de formato YYYY-MM-DD
+    if not (len(fecha_limpia) == 10 and fecha_limpia[4] == '-' and fecha_limpia[7] == '-'):
+        return "invalida", "❌ Formato inválido. Use: YYYY-MM-DD"
+    try:
+        from datetime import datetime
+        fecha_obj = datetime.strptime(fecha_limpia, '%Y-%m-%d')
+    except ValueError:
+        return "invalida", "❌ Fecha inválida. Verifique día/mes."
+    # Verificar que la fecha no sea muy antigua
+    if fecha_obj.year < 2020:
+        return "valida", "⚠️ Fecha muy antigua. Verifique el año."
+    if fecha_obj.year > 2050:
+        return "valida", "⚠️ Fecha muy lejana. Verifique el año."
+    return "valida", f"✅ Fecha válida: {fecha_obj.strftime('%d/%m/%Y')}"
+
+
+def _estilo_editor_fecha(estado):
+    fondo, borde = COLORES_FECHA[estado]
+    return f"""
+        QLineEdit {{
+            background: {fondo};
+            color: #111;
+            border: 3px solid {borde};
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-family: 'Segoe UI', Arial, sans-serif;
+            font-size: 14px;
+            font-weight: 500;
+        }}
+    """
+
+
+class UnidadesTableModel(ModeloFilas):
+    """
+    Página de unidades de VerStockDialog. La fecha de las unidades activas es
+    editable: muestra el cambio pendiente (de `cambios`, la lista
+    cambios_realizados del diálogo) y emite fecha_editada al modificarla.
+    """
+    columnas = ["Código de barras", "📅 Fecha de Vencimiento", "Estado"]
+    fecha_editada = pyqtSignal(int, str)
+
+    def __init__(self, cambios, parent=None):
+        super().__init__(parent=parent)
+        self._cambios = cambios
+        self._fuente = QFont("Segoe UI", 12)
+        self._gris = QColor(Qt.GlobalColor.lightGray)
+
+    def pendiente(self, unidad):
+        """Fecha editada y aún no guardada de la unidad (None si no se tocó)"""
+        unidad_id = unidad.get("unidad_id")
+        return next((c["nueva_fecha"] for c in self._cambios if c["unidad_id"] == unidad_id), None)
+
+    def estado_fecha(self, unidad):
+        """(clave de COLORES_FECHA, tooltip) de la celda de fecha de una unidad activa"""
+        if not unidad.get("unidad_id"):
+            return "error", "❌ ERROR: No se encontró ID de unidad"
+        pendiente = self.pendiente(unidad)
+        if pendiente is None:
+            return "sin_cambios", TOOLTIP_FECHA
+        return _validar_fecha(pendiente)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        unidad = self.fila(index.row())
+        if index.column() == 1 and unidad and unidad.get("estado_raw") == "activo":
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def dato(self, unidad, columna, role):
+        es_activo = unidad.get("estado_raw") == "activo"
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if columna == 0:
+                return unidad.get("codigo", "")
+            if columna == 2:
+                return unidad.get("estado", "")
+            if not es_activo:
+                return unidad.get("vencimiento_display", "Sin vencimiento")
+            pendiente = self.pendiente(unidad)
+            return (unidad.get("vencimiento") or "") if pendiente is None else pendiente
+        if role == Qt.ItemDataRole.FontRole and (columna == 2 or (columna == 1 and not es_activo)):
+            return self._fuente
+        if role == Qt.ItemDataRole.BackgroundRole and columna == 1 and not es_activo:
+            return self._gris
+        if role == Qt.ItemDataRole.ToolTipRole and columna == 1 and es_activo:
+            return self.estado_fecha(unidad)[1]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not (self.flags(index) & Qt.ItemFlag.ItemIsEditable):
+            return False
+        self.fecha_editada.emit(index.row(), str(value or ""))
+        return True
+
+
+class FechaVencimientoDelegate(QStyledItemDelegate):
+    """
+    Dibuja la fecha editable como un campo (borde y fondo según la validación)
+    y crea el QLineEdit solo para la celda que se está editando.
+    """
+
+    def paint(self, painter, option, index):
+        model = index.model()
+        unidad = model.fila(index.row())
+        if not (index.flags() & Qt.ItemFlag.ItemIsEditable) or unidad is None:
+            super().paint(painter, option, index)
+            return
+
+        fondo, borde = COLORES_FECHA[model.estado_fecha(unidad)[0]]
+        texto = index.data() or ""
+
+        painter.save()
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        caja = option.rect.adjusted(6, 6, -6, -6)
+        painter.setPen(QPen(QColor(borde), 2))
+        painter.setBrush(QColor(fondo))
+        painter.drawRoundedRect(caja, 8, 8)
+
+        fuente = QFont("Segoe UI")
+        fuente.setPixelSize(14)
+        painter.setFont(fuente)
+        painter.setPen(QColor("#111") if texto else QColor("#9CA3AF"))
+        painter.drawText(caja.adjusted(14, 0, -8, 0),
+                         int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter),
+                         texto or "YYYY-MM-DD")
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setPlaceholderText("YYYY-MM-DD")
+        editor.setToolTip(TOOLTIP_FECHA)
+        # Validar y registrar el cambio en cada tecla, como hacían los campos por celda
+        editor.textEdited.connect(lambda texto, e=editor: self._al_escribir(e, texto))
+        return editor
+
+    @staticmethod
+    def _mostrar_validacion(editor, texto):
+        estado, tooltip = _validar_fecha(texto)
+        editor.setStyleSheet(_estilo_editor_fecha(estado))
+        editor.setToolTip(tooltip)
+
+    def _al_escribir(self, editor, texto):
+        self._mostrar_validacion(editor, texto)
+        self.commitData.emit(editor)
+
+    def setEditorData(self, editor, index):
+        texto = index.data(Qt.ItemDataRole.EditRole) or ""
+        if editor.text() != texto:
+            editor.setText(texto)
+            editor.selectAll()
+            self._mostrar_validacion(editor, texto)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text().strip(), Qt.ItemDataRole.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect.adjusted(4, 4, -4, -4))
+
 
 class VerStockDialog(QDialog):
     def __init__(self, parent=None, nombre_producto=None, producto_id=None):
         super().__init__(parent)
         self.producto_id = producto_id
         self.nombre_producto = nombre_producto or ""
-        self.unidades_datos = []
+        self.unidades_datos = []  # solo la página visible
+        self.modo = "activos"
+        self.conteo_unidades = {"total": 0, "activas": 0, "inactivas": 0}
+        self._cursores_paginas = [None]
+        self._siguiente_cursor = None
         self.producto_info = {}
         self.cambios_realizados = []  # Para trackear cambios en fechas
-        self.fecha_widgets = {}  # Para almacenar referencias a los widgets de fecha
         
         self.setWindowTitle("VER UNIDADES REGISTRADAS")
         self.setModal(True)
@@ -190,7 +370,7 @@ class VerStockDialog(QDialog):
                 border-radius: 14px; 
             }
 
-            #box2 QTableWidget {
+            #box2 QTableView {
                 background: white; 
                 color: #111;
                 gridline-color: #e0e0e0;
@@ -199,17 +379,17 @@ class VerStockDialog(QDialog):
                 border: 1px solid #dcdcdc; 
                 border-radius: 8px;
             }
-            #box2 QTableWidget::item {
+            #box2 QTableView::item {
                 background: white;
                 color: #111;
                 border: none;
                 padding: 8px;
             }
-            #box2 QTableWidget::item:selected {
+            #box2 QTableView::item:selected {
                 background: #E3F2FD;
                 color: #111;
             }
-            #box2 QTableWidget::item:alternate {
+            #box2 QTableView::item:alternate {
                 background: #f8f9fa;
                 color: #111;
             }
@@ -272,9 +452,18 @@ class VerStockDialog(QDialog):
         gl.addWidget(self.info_label)
 
         # Tabla - con encabezados mejorados y configuración de tamaños
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Código de barras", "📅 Fecha de Vencimiento", "Estado"])
+        self.table = QTableView()
+        self.unidades_model = UnidadesTableModel(self.cambios_realizados, parent=self)
+        self.unidades_model.fecha_editada.connect(self._on_fecha_changed)
+        self.table.setModel(self.unidades_model)
+        self.table.setItemDelegateForColumn(1, FechaVencimientoDelegate(self.table))
+        # La fecha se edita con un click (o escribiendo) sobre la celda
+        self.table.setEditTriggers(
+            QTableView.EditTrigger.CurrentChanged
+            | QTableView.EditTrigger.SelectedClicked
+            | QTableView.EditTrigger.DoubleClicked
+            | QTableView.EditTrigger.AnyKeyPressed
+        )
         
         # Configurar el redimensionamiento de columnas - MEJORADO PARA FECHA MÁS ANCHA
         header = self.table.horizontalHeader()
@@ -287,7 +476,7 @@ class VerStockDialog(QDialog):
         
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         
         # IMPORTANTE: Aumentar la altura de las filas para que los campos se vean mejor
         self.table.verticalHeader().setDefaultSectionSize(60)  # Altura de 60 píxeles por fila
@@ -385,7 +574,7 @@ class VerStockDialog(QDialog):
         parent_layout.addLayout(footer)
 
     def _cargar_unidades(self):
-        """Carga las unidades usando las funciones de utils.py - SOLO ACTIVOS por defecto"""
+        """Carga la primera página de unidades ACTIVAS (por defecto) y los conteos"""
         if not self.producto_id:
             self._mostrar_error("No se pudo obtener el ID del producto")
             return
@@ -401,40 +590,8 @@ class VerStockDialog(QDialog):
                     self._mostrar_error(f"ID de producto inválido: {self.producto_id}")
                     return
             
-            # Usar la función obtener_codigos_activos_por_producto para obtener SOLO códigos activos
-            codigos_activos = obtener_codigos_activos_por_producto(self.producto_id)
-            print(f"Códigos activos obtenidos: {len(codigos_activos)} códigos encontrados")
-            
-            if not codigos_activos:
-                self.info_label.setText("Este producto no tiene códigos de barras activos")
-                self.unidades_datos = []
-                self._actualizar_tabla()
-                print("No se encontraron códigos activos para este producto")
-                return
-
-            # Convertir los datos al formato esperado por la tabla
-            self.unidades_datos = []
-            for codigo, vencimiento in codigos_activos.items():
-                venc_display = vencimiento or "Sin vencimiento"
-                
-                print(f"  Código: {codigo} | Vence: {venc_display} | Estado: activo")
-                
-                self.unidades_datos.append({
-                    "codigo": codigo,
-                    "vencimiento": vencimiento,  # Mantener el valor original para edición
-                    "vencimiento_display": venc_display,  # Para mostrar
-                    "estado": "✅ Activo",
-                    "estado_raw": "activo",
-                    "unidad_id": None  # Se llenará a continuación
-                })
-
-            print(f"Total de unidades activas procesadas: {len(self.unidades_datos)}")
-            
-            # Siempre obtener los IDs de las unidades para edición
-            self._obtener_ids_unidades()
-            
-            # Actualizar tabla
-            self._actualizar_tabla()
+            self.modo = "activos"
+            self._reiniciar_paginas()
             
         except Exception as e:
             print(f"Error al cargar unidades: {e}")
@@ -442,29 +599,40 @@ class VerStockDialog(QDialog):
             traceback.print_exc()
             self._mostrar_error(f"Error al cargar códigos de barras: {e}")
 
-    def _obtener_ids_unidades(self):
-        """Obtiene los IDs de las unidades para poder editarlas"""
-        try:
-            from aplicacion.backend.stock.controller import obtener_unidades_de_producto_controller
-            
-            unidades_completas = obtener_unidades_de_producto_controller(self.producto_id)
-            
-            # Crear un mapeo de código_barras -> unidad_id
-            codigo_a_id = {}
-            for unidad in unidades_completas:
-                if unidad.codigo_barras and unidad.estado == "activo":
-                    codigo_a_id[unidad.codigo_barras] = unidad.id
-            
-            # Actualizar los datos con los IDs
-            for datos in self.unidades_datos:
-                codigo = datos["codigo"]
-                if codigo in codigo_a_id:
-                    datos["unidad_id"] = codigo_a_id[codigo]
-                    
-            print(f"IDs de unidades obtenidos: {len(codigo_a_id)} unidades")
-            
-        except Exception as e:
-            print(f"Error al obtener IDs de unidades: {e}")
+    def _reiniciar_paginas(self):
+        """Vuelve a la primera página del modo actual y refresca los conteos"""
+        self.conteo_unidades = controller.contar_unidades_producto_controller(self.producto_id)
+        self.current_page = 0
+        self._cursores_paginas = [None]   # cursor de inicio de cada página visitada
+        self._cargar_pagina()
+
+    def _cargar_pagina(self):
+        """Trae de la base solo las unidades de la página actual"""
+        resultado = controller.listar_unidades_pagina_controller(
+            self.producto_id,
+            estado="activo" if self.modo == "activos" else None,
+            despues=self._cursores_paginas[self.current_page],
+            limite=self.page_size
+        )
+        self.unidades_datos = [self._unidad_a_fila(u) for u in resultado["unidades"]]
+        self._siguiente_cursor = resultado["siguiente"]
+        print(f"Página {self.current_page + 1}: {len(self.unidades_datos)} unidades")
+        self._actualizar_tabla()
+
+    @staticmethod
+    def _unidad_a_fila(unidad):
+        """Convierte una unidad del backend al formato esperado por la tabla"""
+        vencimiento = unidad.get("fecha_vencimiento")
+        estado = unidad.get("estado") or "desconocido"
+        return {
+            "codigo": unidad.get("codigo_barras"),
+            "vencimiento": vencimiento,  # Mantener el valor original para edición
+            "vencimiento_display": vencimiento or "Sin vencimiento",  # Para mostrar
+            "estado": "✅ Activo" if estado == "activo" else "❌ Inactivo",
+            "estado_raw": estado,
+            "unidad_id": unidad.get("id"),
+            "observaciones": unidad.get("observaciones", "")
+        }
 
     def _mostrar_todos_codigos(self):
         """Muestra todos los códigos (activos e inactivos)"""
@@ -473,40 +641,8 @@ class VerStockDialog(QDialog):
 
         try:
             print(f"Cargando TODOS los códigos (activos + inactivos) para producto_id: {self.producto_id}")
-            
-            # Usar la función obtener_codigos_por_producto para obtener todos los códigos
-            codigos_completos = obtener_codigos_por_producto(self.producto_id)
-            
-            if not codigos_completos:
-                self.info_label.setText("Este producto no tiene códigos de barras registrados")
-                self.unidades_datos = []
-                self.current_page = 0
-                self._actualizar_tabla()
-                return
-
-            # Convertir los datos al formato esperado por la tabla
-            self.unidades_datos = []
-            for codigo, info in codigos_completos.items():
-                vencimiento = info.get("vencimiento")
-                venc_display = vencimiento or "Sin vencimiento"
-                estado = info.get("estado", "desconocido")
-                
-                # Agregar emoji para el estado
-                estado_display = "✅ Activo" if estado == "activo" else "❌ Inactivo"
-                
-                self.unidades_datos.append({
-                    "codigo": codigo,
-                    "vencimiento": vencimiento,  # Mantener el valor original
-                    "vencimiento_display": venc_display,  # Para mostrar
-                    "estado": estado_display,
-                    "estado_raw": estado,
-                    "unidad_id": info.get("id_unidad"),
-                    "observaciones": info.get("observaciones", "")
-                })
-
-            # Resetear página y actualizar tabla
-            self.current_page = 0
-            self._actualizar_tabla()
+            self.modo = "todos"
+            self._reiniciar_paginas()
             
             # Actualizar estilos de botones
             self._actualizar_estilos_botones("todos")
@@ -521,36 +657,8 @@ class VerStockDialog(QDialog):
             return
 
         try:
-            # Usar la función obtener_codigos_activos_por_producto
-            codigos_activos = obtener_codigos_activos_por_producto(self.producto_id)
-            
-            if not codigos_activos:
-                self.info_label.setText("Este producto no tiene códigos activos")
-                self.unidades_datos = []
-                self.current_page = 0
-                self._actualizar_tabla()
-                return
-
-            # Convertir los datos al formato esperado por la tabla
-            self.unidades_datos = []
-            for codigo, vencimiento in codigos_activos.items():
-                venc_display = vencimiento or "Sin vencimiento"
-                
-                self.unidades_datos.append({
-                    "codigo": codigo,
-                    "vencimiento": vencimiento,  # Mantener el valor original
-                    "vencimiento_display": venc_display,  # Para mostrar
-                    "estado": "✅ Activo",
-                    "estado_raw": "activo",
-                    "unidad_id": None  # Se llenará si es necesario
-                })
-
-            # Siempre obtener IDs para edición
-            self._obtener_ids_unidades()
-
-            # Resetear página y actualizar tabla
-            self.current_page = 0
-            self._actualizar_tabla()
+            self.modo = "activos"
+            self._reiniciar_paginas()
             
             # Actualizar estilos de botones
             self._actualizar_estilos_botones("activos")
@@ -596,168 +704,21 @@ class VerStockDialog(QDialog):
             self.btn_mostrar_activos.setStyleSheet(estilo_normal)
 
     def _actualizar_tabla(self):
-        """Actualiza la tabla con los datos de las unidades - CAMPOS MÁS GRANDES"""
+        """Pasa la página cargada al modelo; las celdas se pintan con el delegate, sin widgets por fila"""
         print(f"Actualizando tabla con {len(self.unidades_datos)} unidades")
-        
-        # Limpiar tabla y widgets previos
-        self.table.setRowCount(0)
-        self.fecha_widgets.clear()
-        
-        # Calcular datos para la página actual
-        start_idx = self.current_page * self.page_size
-        end_idx = min(start_idx + self.page_size, len(self.unidades_datos))
-        
-        # Mostrar datos de la página actual
-        datos_pagina = self.unidades_datos[start_idx:end_idx]
-        self.table.setRowCount(len(datos_pagina))
-        
-        for row, unidad in enumerate(datos_pagina):
-            global_idx = start_idx + row  # Índice global en la lista completa
-            
-            # Código de barras (no editable)
-            codigo_item = QTableWidgetItem(unidad.get("codigo", ""))
-            codigo_item.setFlags(codigo_item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # No editable
-            self.table.setItem(row, 0, codigo_item)
-            
-            # Vencimiento (editable para códigos activos) - CAMPOS MÁS GRANDES
-            vencimiento_valor = unidad.get("vencimiento") or ""
-            es_activo = unidad.get("estado_raw") == "activo"
-            
-            if es_activo:
-                # Crear widget editable para la fecha con TAMAÑO MEJORADO
-                fecha_edit = QLineEdit()
-                fecha_edit.setPlaceholderText("YYYY-MM-DD")
-                fecha_edit.setText(vencimiento_valor)
-                
-                # Estilos MEJORADOS para campos más grandes y legibles
-                fecha_edit.setStyleSheet("""
-                    QLineEdit {
-                        background: #ffffff;
-                        color: #111;
-                        border: 2px solid #22C55E;
-                        border-radius: 8px;
-                        padding: 12px 16px;
-                        font-family: 'Segoe UI', Arial, sans-serif;
-                        font-size: 14px;
-                        font-weight: 500;
-                        min-height: 30px;
-                        min-width: 150px;
-                    }
-                    QLineEdit:hover {
-                        border-color: #16A34A;
-                        background: #f0fff0;
-                        cursor: text;
-                    }
-                    QLineEdit:focus {
-                        border-color: #059669;
-                        background: #ecfdf5;
-                        outline: none;
-                        border-width: 3px;
-                    }
-                    QLineEdit:disabled {
-                        background: #f8f9fa;
-                        color: #666;
-                        border-color: #d0d0d0;
-                    }
-                """)
-                
-                # Conectar señal para trackear cambios
-                fecha_edit.textChanged.connect(
-                    lambda text, idx=global_idx, widget=fecha_edit: self._on_fecha_changed(idx, text, widget)
-                )
-                
-                # Agregar evento de click para mejor UX
-                fecha_edit.mousePressEvent = lambda event, widget=fecha_edit: self._on_fecha_click(event, widget)
-                
-                # Agregar tooltip mejorado
-                fecha_edit.setToolTip("📅 Click para editar fecha de vencimiento\n" + 
-                                    "Formato: YYYY-MM-DD\n" +
-                                    "Ejemplo: 2024-12-31\n" +
-                                    "Deja vacío para 'Sin vencimiento'")
-                
-                self.table.setCellWidget(row, 1, fecha_edit)
-                self.fecha_widgets[global_idx] = fecha_edit
-            else:
-                # Mostrar como texto no editable para códigos inactivos
-                venc_display = unidad.get("vencimiento_display", "Sin vencimiento")
-                vencimiento_item = QTableWidgetItem(venc_display)
-                vencimiento_item.setFlags(vencimiento_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                # Estilo para campos no editables con mejor tamaño
-                vencimiento_item.setBackground(Qt.GlobalColor.lightGray)
-                vencimiento_item.setFont(QFont("Segoe UI", 12))
-                self.table.setItem(row, 1, vencimiento_item)
-            
-            # Estado (no editable)
-            estado_item = QTableWidgetItem(unidad.get("estado", ""))
-            estado_item.setFlags(estado_item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-            estado_item.setFont(QFont("Segoe UI", 12))
-            self.table.setItem(row, 2, estado_item)
-            
-            print(f"  Fila {row+1}: {unidad.get('codigo')} | {vencimiento_valor} | {unidad.get('estado')}")
-        
+        self.unidades_model.set_filas(self.unidades_datos)
         self._update_pagination_info()
-        print("Tabla actualizada correctamente")
 
-    def _on_fecha_changed(self, global_idx, nuevo_texto, widget):
-        """Maneja cambios en los campos de fecha con validación mejorada - ESTILOS MÁS GRANDES"""
-        # Obtener datos de la unidad
-        if global_idx >= len(self.unidades_datos):
+    def _on_fecha_changed(self, global_idx, nuevo_texto):
+        """Registra la fecha editada de una unidad de la página como cambio pendiente"""
+        unidad = self.unidades_model.fila(global_idx)
+        if unidad is None or not unidad.get("unidad_id"):
             return
-            
-        unidad = self.unidades_datos[global_idx]
         unidad_id = unidad.get("unidad_id")
-        
-        if not unidad_id:
-            widget.setStyleSheet("""
-                QLineEdit {
-                    background: #ffe6e6;
-                    color: #111;
-                    border: 3px solid #dc2626;
-                    border-radius: 8px;
-                    padding: 12px 16px;
-                    font-family: 'Segoe UI', Arial, sans-serif;
-                    font-size: 14px;
-                    font-weight: 500;
-                    min-height: 30px;
-                }
-            """)
-            widget.setToolTip("❌ ERROR: No se encontró ID de unidad")
-            return
-        
-        # Validar formato de fecha
         fecha_limpia = nuevo_texto.strip()
-        es_valida = True
-        tooltip_mensaje = "📅 Click para editar fecha de vencimiento\nFormato: YYYY-MM-DD\nEjemplo: 2024-12-31"
-        
-        if fecha_limpia and fecha_limpia not in ["Sin vencimiento", ""]:
-            try:
-                # Validación de formato YYYY-MM-DD
-                if len(fecha_limpia) == 10 and fecha_limpia[4] == '-' and fecha_limpia[7] == '-':
-                    from datetime import datetime
-                    fecha_obj = datetime.strptime(fecha_limpia, '%Y-%m-%d')
-                    # Verificar que la fecha no sea muy antigua
-                    if fecha_obj.year < 2020:
-                        tooltip_mensaje = "⚠️ Fecha muy antigua. Verifique el año."
-                    elif fecha_obj.year > 2050:
-                        tooltip_mensaje = "⚠️ Fecha muy lejana. Verifique el año."
-                    else:
-                        tooltip_mensaje = f"✅ Fecha válida: {fecha_obj.strftime('%d/%m/%Y')}"
-                else:
-                    es_valida = False
-                    tooltip_mensaje = "❌ Formato inválido. Use: YYYY-MM-DD"
-            except ValueError:
-                es_valida = False
-                tooltip_mensaje = "❌ Fecha inválida. Verifique día/mes."
-        elif not fecha_limpia:
-            tooltip_mensaje = "📅 Sin fecha de vencimiento"
-        
+
         # Crear o actualizar el cambio
-        cambio_existente = None
-        for i, cambio in enumerate(self.cambios_realizados):
-            if cambio["unidad_id"] == unidad_id:
-                cambio_existente = cambio
-                break
-        
+        cambio_existente = next((c for c in self.cambios_realizados if c["unidad_id"] == unidad_id), None)
         if cambio_existente:
             cambio_existente["nueva_fecha"] = fecha_limpia
         else:
@@ -767,85 +728,7 @@ class VerStockDialog(QDialog):
                 "codigo": unidad.get("codigo", ""),
                 "fecha_original": unidad.get("vencimiento", "")
             })
-        
-        # Aplicar estilo según validez con CAMPOS MÁS GRANDES
-        estilo_base = """
-            QLineEdit {{
-                color: #111;
-                border-radius: 8px;
-                padding: 12px 16px;
-                font-family: 'Segoe UI', Arial, sans-serif;
-                font-size: 14px;
-                font-weight: 500;
-                min-height: 30px;
-                min-width: 150px;
-            }}
-            QLineEdit:hover {{
-                cursor: text;
-            }}
-            QLineEdit:focus {{
-                outline: none;
-                border-width: 3px;
-            }}
-        """
-        
-        if fecha_limpia == "" or fecha_limpia == "Sin vencimiento":
-            widget.setStyleSheet(estilo_base.format() + """
-                QLineEdit {
-                    background: #fffbeb;
-                    border: 2px solid #f59e0b;
-                }
-                QLineEdit:hover {
-                    background: #fef3c7;
-                    border-color: #d97706;
-                }
-                QLineEdit:focus {
-                    background: #fef3c7;
-                    border-color: #92400e;
-                }
-            """)
-        elif es_valida:
-            widget.setStyleSheet(estilo_base.format() + """
-                QLineEdit {
-                    background: #f0fdf4;
-                    border: 2px solid #22c55e;
-                }
-                QLineEdit:hover {
-                    background: #dcfce7;
-                    border-color: #16a34a;
-                }
-                QLineEdit:focus {
-                    background: #dcfce7;
-                    border-color: #15803d;
-                }
-            """)
-        else:
-            widget.setStyleSheet(estilo_base.format() + """
-                QLineEdit {
-                    background: #fef2f2;
-                    border: 2px solid #ef4444;
-                }
-                QLineEdit:hover {
-                    background: #fee2e2;
-                    border-color: #dc2626;
-                }
-                QLineEdit:focus {
-                    background: #fee2e2;
-                    border-color: #b91c1c;
-                }
-            """)
-        
-        # Actualizar tooltip
-        widget.setToolTip(tooltip_mensaje)
-
-    def _on_fecha_click(self, event, widget):
-        """Maneja el click en los campos de fecha para mejor UX"""
-        # Seleccionar todo el texto cuando se hace click
-        widget.selectAll()
-        # Establecer el foco en el widget
-        widget.setFocus()
-        # Llamar al evento original
-        QLineEdit.mousePressEvent(widget, event)
+        self.unidades_model.refrescar_fila(global_idx)
 
     def _debug_consola(self):
         """Muestra información de debug en la consola usando mostrar_codigos_producto"""
@@ -876,40 +759,42 @@ class VerStockDialog(QDialog):
             self._mostrar_error(f"Error en debug: {e}")
 
     def _update_pagination_info(self):
-        """Actualiza la información de paginación"""
-        total = len(self.unidades_datos)
-        if total == 0:
-            self.info_label.setText("Sin códigos de barras registrados")
+        """Actualiza la información de paginación con los conteos del backend"""
+        activos = self.conteo_unidades.get("activas", 0)
+        total = activos if self.modo == "activos" else self.conteo_unidades.get("total", 0)
+        if total == 0 or not self.unidades_datos:
+            if self.modo == "activos":
+                self.info_label.setText("Este producto no tiene códigos de barras activos")
+            else:
+                self.info_label.setText("Sin códigos de barras registrados")
             self.page_info.setText("Página 0")
             self.btn_prev_page.setEnabled(False)
             self.btn_next_page.setEnabled(False)
             return
             
         start = self.current_page * self.page_size + 1
-        end = min((self.current_page + 1) * self.page_size, total)
+        end = start + len(self.unidades_datos) - 1
         max_page = (total - 1) // self.page_size + 1
         
-        # Mostrar cuántos activos hay
-        activos = sum(1 for u in self.unidades_datos if u.get("estado_raw") == "activo")
-        
         self.info_label.setText(f"Mostrando {start}-{end} de {total} códigos ({activos} activos)")
         self.page_info.setText(f"Página {self.current_page + 1} de {max_page}")
         
         self.btn_prev_page.setEnabled(self.current_page > 0)
-        self.btn_next_page.setEnabled(end < total)
+        self.btn_next_page.setEnabled(self._siguiente_cursor is not None)
 
     def _prev_page(self):
         """Página anterior"""
         if self.current_page > 0:
             self.current_page -= 1
-            self._actualizar_tabla()
+            self._cargar_pagina()
 
     def _next_page(self):
         """Página siguiente"""
-        max_page = (len(self.unidades_datos) - 1) // self.page_size
-        if self.current_page < max_page:
+        if self._siguiente_cursor is not None:
             self.current_page += 1
-            self._actualizar_tabla()
+            if len(self._cursores_paginas) <= self.current_page:
+                self._cursores_paginas.append(self._siguiente_cursor)
+            self._cargar_pagina()
 
     def _actualizar_datos(self):
         """Actualiza los datos o procesa cambios según si hay cambios realizados"""
@@ -1027,9 +912,8 @@ class VerStockDialog(QDialog):
             self.progress_bar.setVisible(True)
             self.progress_bar.setMaximum(0)  # Modo indeterminado
             
-            # Limpiar cambios y widgets
+            # Limpiar cambios
             self.cambios_realizados.clear()
-            self.fecha_widgets.clear()
             
             # Recargar datos del producto
             self._cargar_datos_producto()
@@ -1046,26 +930,30 @@ class VerStockDialog(QDialog):
 
     def _exportar_lista(self):
         """Exporta la lista de unidades a un archivo"""
-        if not self.unidades_datos:
-            self._mostrar_advertencia("No hay datos para exportar")
-            return
-            
         try:
+            # Todas las unidades del modo actual, no solo la página visible
+            unidades = [self._unidad_a_fila(u) for u in controller.listar_unidades_pagina_controller(
+                self.producto_id, estado="activo" if self.modo == "activos" else None, limite=None
+            )["unidades"]]
+            if not unidades:
+                self._mostrar_advertencia("No hay datos para exportar")
+                return
+            
             # Crear contenido de exportación
             contenido = [f"CÓDIGOS DE BARRAS - {self.nombre_producto}"]
             contenido.append("=" * 60)
             contenido.append(f"Producto: {self.producto_info.get('nombre', 'N/A')}")
             contenido.append(f"Stock actual: {self.producto_info.get('stock', 0)} {self.producto_info.get('unidad_medida', 'unidades')}")
-            contenido.append(f"Total de códigos: {len(self.unidades_datos)}")
+            contenido.append(f"Total de códigos: {len(unidades)}")
             
-            activos = sum(1 for u in self.unidades_datos if u.get("estado_raw") == "activo")
+            activos = sum(1 for u in unidades if u.get("estado_raw") == "activo")
             contenido.append(f"Códigos activos: {activos}")
             contenido.append("")
             
             contenido.append("LISTADO DE CÓDIGOS:")
             contenido.append("-" * 60)
             
-            for i, unidad in enumerate(self.unidades_datos, 1):
+            for i, unidad in enumerate(unidades, 1):
                 contenido.append(f"{i:3d}. {unidad['codigo']}")
                 contenido.append(f"     Vencimiento: {unidad['vencimiento_display']}")
                 contenido.append(f"     Estado: {unidad['estado']}")
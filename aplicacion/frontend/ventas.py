@@ -1,8 +1,5 @@
 # ventas.py
 import time
-from datetime import datetime
-from pathlib import Path
-import json
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
@@ -10,7 +7,7 @@ from PyQt6.QtWidgets import (
     QDialog, QDialogButtonBox, QComboBox, QFormLayout, QGraphicsDropShadowEffect,
     QSpinBox
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QTextCursor, QColor
 
 # ---- Backend (ventas) ----
@@ -21,13 +18,11 @@ from aplicacion.backend.ventas.controller import cancelar_ultima_venta_controlle
 
 # ---- Backend (stock) ----
 from aplicacion.backend.stock import controller as stock_controller
-from aplicacion.backend.stock.crud import exportar_productos_json
-
-# Búsqueda por código de barras en DB
-from aplicacion.backend.stock.utils import buscar_productos_por_codigo
 
 # ---- Backend (métricas) ----
-from aplicacion.backend.metricas.ganancias.controller import registrar_ganancias_hoy_controller
+from aplicacion.backend.eventos.bus import bus, POSTVENTA_COMPLETADA, CATALOGO_ACTUALIZADO
+from aplicacion.backend.stock.catalogo import catalogo
+from aplicacion.backend.stock.autocompletar import indice_autocompletar
 
 
 # --------------------- Diálogo método de pago (estilizado) ---------------------
@@ -222,6 +217,10 @@ class CantidadGramosDialog(QDialog):
 class VentasTab(QWidget):
     """Pantalla de Punto de Venta."""
 
+    # Emitidas desde el hilo del bus de eventos; las señales las traen al hilo de la UI
+    _postventa_lista = pyqtSignal(dict)
+    _catalogo_actualizado = pyqtSignal(dict)
+
     # --------------------- Utils precio ---------------------
     @staticmethod
     def _parse_price_ar(value) -> float:
@@ -254,6 +253,7 @@ class VentasTab(QWidget):
         self.UMBRAL_CARACTERES = 5
         self.VENTANA_SEGUNDOS = 0.05
         self.REVERTIR_MS = 500
+        self.MAX_RESULTADOS_BUSQUEDA = 200
         self._len_prev = 0
         self._inicio_ventana = None
         self._conteo_en_ventana = 0
@@ -274,6 +274,14 @@ class VentasTab(QWidget):
         self._codigo_timer.setSingleShot(True)
         self._codigo_timer.timeout.connect(self._procesar_codigo_completo)
 
+        # Avisos del bus de eventos (post-proceso de ventas y cambios de catálogo)
+        self._postventa_lista.connect(self._al_terminar_postventa)
+        self._catalogo_actualizado.connect(self._al_actualizar_catalogo)
+        bus.suscribir_widget(self, [
+            (POSTVENTA_COMPLETADA, self._postventa_lista.emit),
+            (CATALOGO_ACTUALIZADO, self._catalogo_actualizado.emit),
+        ])
+
         self.setup_ui()
 
     # ===================== Carga de datos MEJORADA =====================
@@ -294,35 +302,12 @@ class VentasTab(QWidget):
             print(f"❌ VentasTab: Error al recargar datos: {e}")
 
     def load_products_data(self):
-        """Carga JSON de stock con verificación mejorada de estabilidad del archivo."""
+        """Toma los productos del catálogo compartido (sin releer stock.json)."""
         try:
-            base_dir = Path(__file__).resolve().parent.parent
-            json_path = base_dir / "frontend" / "json" / "stock.json"
-
-            print(f"📁 VentasTab: Leyendo JSON desde {json_path}")
-
-            if json_path.exists():
-                # MEJORA: Verificar que el archivo no esté siendo escrito
-                import time
-                file_size = json_path.stat().st_size
-                time.sleep(0.1)  # Pequeña pausa
-                
-                # Verificar que el tamaño no cambió (archivo estable)
-                if json_path.stat().st_size == file_size and file_size > 0:
-                    with open(json_path, 'r', encoding='utf-8') as file:
-                        self.products_data = json.load(file)
-                    print(f"✅ VentasTab: JSON cargado correctamente - {len(self.products_data)} productos")
-                else:
-                    print("⏳ VentasTab: Archivo JSON siendo escrito, reintentando...")
-                    time.sleep(0.3)
-                    with open(json_path, 'r', encoding='utf-8') as file:
-                        self.products_data = json.load(file)
-                    print(f"✅ VentasTab: JSON cargado después de reintento - {len(self.products_data)} productos")
-            else:
-                print("❌ VentasTab: JSON no existe, usando datos de ejemplo")
-                self._cargar_datos_ejemplo()
+            self.products_data = catalogo.listar_productos()
+            print(f"✅ VentasTab: {len(self.products_data)} productos desde el catálogo")
         except Exception as e:
-            print(f"❌ VentasTab: Error cargando JSON: {e}")
+            print(f"❌ VentasTab: Error cargando catálogo: {e}")
             self._cargar_datos_ejemplo()
 
     def _cargar_datos_ejemplo(self):
@@ -543,10 +528,10 @@ class VentasTab(QWidget):
             self._codigo_timer.stop()
 
     def buscar_producto_por_id_en_json(self, producto_id):
-        for product in self.products_data:
-            if str(product.get("id", "")) == str(producto_id):
-                return product
-        return None
+        try:
+            return catalogo.obtener_producto(int(producto_id))
+        except (TypeError, ValueError):
+            return None
     #
     def filter_products(self):
         search_text = self.search_input.text().strip()
@@ -558,14 +543,9 @@ class VentasTab(QWidget):
             codigo_barras = search_text[1:]
             # REMOVIDO: self.reload_data() - causaba bucle infinito
             try:
-                productos = stock_controller.listar_productos_controller()
-                unidades = []
-                for p in productos:
-                    unidades += stock_controller.obtener_unidades_de_producto_controller(p.id)
-                encontrados = buscar_productos_por_codigo(unidades, codigo_barras)
-                if encontrados:
-                    unidad = encontrados[0]
-                    product_data = self.buscar_producto_por_id_en_json(unidad.producto_id)
+                unidad = stock_controller.buscar_unidad_por_codigo_controller(codigo_barras)
+                if unidad:
+                    product_data = self.buscar_producto_por_id_en_json(unidad["producto_id"])
                     if product_data:
                         self.mostrar_producto_en_lista(product_data)
                     else:
@@ -576,10 +556,13 @@ class VentasTab(QWidget):
                 print(f"⚠ Error búsqueda por código: {e}")
                 self.products_list.addItem(QListWidgetItem("⚠ Error en búsqueda por código"))
         else:
-            s = search_text.lower()
-            for product in self.products_data:
-                if s in product.get("nombre", "").lower():
+            # Índice en memoria: cada tecla filtra el resultado de la anterior
+            self.products_list.setUpdatesEnabled(False)
+            try:
+                for product in indice_autocompletar.buscar_productos(search_text, limite=self.MAX_RESULTADOS_BUSQUEDA):
                     self.mostrar_producto_en_lista(product)
+            finally:
+                self.products_list.setUpdatesEnabled(True)
 
     def mostrar_producto_en_lista(self, product):
         nombre = product.get("nombre", "Sin nombre")
@@ -789,13 +772,9 @@ class VentasTab(QWidget):
                     if tx.startswith("#") and len(tx) > 1:
                         codigo_barra = tx[1:]
                         try:
-                            productos = stock_controller.listar_productos_controller()
-                            unidades = []
-                            for p in productos:
-                                unidades += stock_controller.obtener_unidades_de_producto_controller(p.id)
-                            encontrados = buscar_productos_por_codigo(unidades, codigo_barra)
-                            if encontrados:
-                                unidad_id = int(encontrados[0].id)
+                            unidad = stock_controller.buscar_unidad_por_codigo_controller(codigo_barra)
+                            if unidad:
+                                unidad_id = int(unidad["unidad_id"])
                         except Exception as e:
                             print(f"[WARN] No pude resolver unidad por código: {e}")
 
@@ -896,9 +875,6 @@ class VentasTab(QWidget):
         self._confirm_and_process_sale(metodo)
 
     def _confirm_and_process_sale(self, metodo_pago: str):
-        # Marca temporal para esperar aplicación de cambios en DB
-        marca_inicio_iso = datetime.now().isoformat()
-
         # --- Normalizo carrito: asegurar 'tipo_venta' en todos los ítems ---
         try:
             for it in ventas_crud.carrito:
@@ -909,99 +885,46 @@ class VentasTab(QWidget):
             print(f"[WARN] Normalizando carrito: {e}")
         # -------------------------------------------------------------------
 
-        data = {"metodo_pago": metodo_pago, "usuario_id": 1}
+        # Los códigos escaneados se inactivan dentro de la misma transacción de la venta
+        data = {
+            "metodo_pago": metodo_pago,
+            "usuario_id": 1,
+            "codigos_escaneados": list(self._codigos_barras_usados)
+        }
         resultado = ventas_controller.confirmar_venta_controller(data)
         if not resultado.get("exito"):
             QMessageBox.critical(self, "Error", resultado.get("mensaje", "No se pudo confirmar la venta"))
             return
 
-        # 3.1 Inactivar unidad por cada código escaneado (no vuelve a descontar stock)
-        for codigo in list(self._codigos_barras_usados):
-            try:
-                ventas_crud.actualizar_estado_unidad_inactivo_por_codigo(codigo)
-            except Exception as e:
-                print(f"[WARN] No se pudo inactivar unidad {codigo}: {e}")
-
-        # 3.2 Esperar confirmación de cambios y limpiar unidades fantasma
-        productos_vendidos = {p.get("producto_id") for p in resultado.get("productos", []) if p.get("producto_id")}
-        if not productos_vendidos:
-            for it in ventas_controller.obtener_carrito_controller():
-                pid = it.get("producto_id")
-                if pid:
-                    productos_vendidos.add(int(pid))
-
-        def _parse_iso(dt_val):
-            from datetime import datetime as _dt
-            try:
-                return _dt.fromisoformat(str(dt_val))
-            except Exception:
-                return None
-
-        def esperar_stock(pid, timeout=3.0, interval=0.1):
-            ini = time.monotonic()
-            while time.monotonic() - ini < timeout:
-                try:
-                    prod = ventas_crud.obtener_producto_por_id(pid)
-                    um = getattr(prod, "ultima_modificacion", None)
-                    if um and _parse_iso(um) and _parse_iso(um) >= _parse_iso(marca_inicio_iso):
-                        return True
-                except Exception:
-                    pass
-                time.sleep(interval)
-            return False
-
-        for pid in productos_vendidos:
-            ok = esperar_stock(pid, timeout=3.0, interval=0.1)
-            if not ok:
-                time.sleep(2.0)  # colchón
-            try:
-                stock_controller.limpiar_unidades_fantasma_controller(pid)
-            except Exception as e:
-                print(f"[WARN] limpiar_unidades_fantasma_controller({pid}) falló: {e}")
-
-            # 3.2.1 NUEVO: Purga definitiva de unidades INACTIVAS del producto vendido
-            try:
-                ventas_controller.purgar_unidades_inactivas_controller(pid)
-            except Exception as e:
-                print(f"[WARN] purgar_unidades_inactivas_controller({pid}) falló: {e}")
+        # Limpieza de unidades, stock.json y ganancias corren en segundo plano
+        # (backend/ventas/postventa.py); al terminar llega _postventa_lista.
+        ventas_controller.limpiar_carrito_controller()
+        self._codigos_barras_usados.clear()
+        self.refresh_cart_view()
 
-        # 3.3 Regenerar JSON y refrescar UI
-        try:
-            exportar_productos_json()
-        except Exception as e:
-            print(f"[WARN] No se pudo exportar stock.json: {e}")
+        QMessageBox.information(self, "Venta realizada", "✅ Venta registrada con éxito.")
 
-        # 3.4 REGISTRAR GANANCIAS AUTOMÁTICAMENTE
-        try:
-            registro_result = registrar_ganancias_hoy_controller(sobrescribir=True)
-            if registro_result.get("success"):
-                print(f"[INFO] Ganancias registradas automáticamente: {registro_result.get('message', 'Éxito')}")
-            else:
-                print(f"[WARN] No se pudo registrar ganancias automáticamente: {registro_result.get('message', 'Error desconocido')}")
-        except Exception as e:
-            print(f"[ERROR] Error al registrar ganancias automáticamente: {e}")
+    def _al_actualizar_catalogo(self, datos: dict):
+        """Corre en el hilo de la interfaz cuando cambian productos del catálogo."""
+        if not (datos.get("productos") or datos.get("eliminados")):
+            return
+        self.reload_data()
+        self.filter_products()  # respeta el texto de búsqueda
 
-        # 3.5 ACTUALIZAR PANTALLA DE MÉTRICAS
+    def _al_terminar_postventa(self, datos: dict):
+        """Corre en el hilo de la interfaz cuando el post-proceso de una venta terminó."""
+        # Los productos ya se refrescan con CATALOGO_ACTUALIZADO; acá solo métricas
         try:
-            # Buscar la ventana principal que contiene el tab de métricas
             parent_window = self.parent()
             while parent_window and not hasattr(parent_window, 'metricas_tab'):
                 parent_window = parent_window.parent()
-            
+
             if parent_window and hasattr(parent_window, 'metricas_tab'):
                 parent_window.metricas_tab.refresh_all_data()
                 print("[INFO] Pantalla de métricas actualizada automáticamente")
         except Exception as e:
             print(f"[WARN] No se pudo actualizar pantalla de métricas: {e}")
 
-        ventas_controller.limpiar_carrito_controller()
-        self._codigos_barras_usados.clear()
-        self.refresh_cart_view()
-        self.reload_data()
-        self.filter_products()  # respeta el texto de búsqueda
-
-        QMessageBox.information(self, "Venta realizada", "✅ Venta registrada con éxito.")
-
 
     # ===================== NUEVO: cancelar última venta =====================
     def cancel_last_sale_confirmed(self):
@@ -21,6 +21,8 @@ def inicializar_sistema():
     if DB_PATH.exists():
         print("Base de datos existente - Inicialización normal")
         crear_tablas()  
+        from aplicacion.backend.metricas.ganancias.resumen_diario import inicializar_si_vacio
+        inicializar_si_vacio()
     else:
         print("Base de datos nueva - Creando admin")
         crear_tablas()
@@ -91,6 +93,9 @@ def main():
 
     snap_thread = inicializar_snap_en_hilo()
 
+    from aplicacion.backend.stock.conciliacion import iniciar_conciliacion_periodica
+    iniciar_conciliacion_periodica()
+
     login = LoginWindow(app)
 
     if hasattr(login, "login_success"):